@@ -1,28 +1,80 @@
+from __future__ import annotations
+import asyncio
 import os
+import time
 from typing import Any, Dict, List, Optional, Tuple
 
 from pydantic import BaseModel, Field
 from sqlalchemy import create_engine, text
 from sqlalchemy.engine import Engine, Result
 from sqlalchemy.exc import SQLAlchemyError
-from __future__ import annotations
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from src.data.image_assets import IMAGE_COLUMNS, load_payload, summarize, validate
+from src.data.keyword_index import MAX_QUERY_TERMS, tokenize
+from src.data.name_index import NameIndex
+from src.llm.embeddings import embedder_error, get_embedder
+from src.tools import aio
+from src.tools.profile_cache import get_profile_cache
+from src.tools.retrieval import hybrid_retrieve_async
 
 
 
 _DB_ENGINE:Optional[Engine] = None
+_DB_ASYNC_ENGINE:Optional[AsyncEngine] = None
+# Profiles of popular species; invalidated by the writes below that touch a taxon
+_PROFILE_CACHE = get_profile_cache("postgres")
+
+# Connection pool and per-statement limits (both engines)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "5000"))
+
+# occurrence_summary settings (keep OCC_TILE_ZOOM in step with the DuckDB ingest)
+OCC_TILE_ZOOM = int(os.getenv("OCC_TILE_ZOOM", "4"))
+OCC_YEAR_EXPR = os.getenv("OCC_YEAR_EXPR", "year")  # SQL giving an occurrence's year, e.g. EXTRACT(YEAR FROM event_date)::int
+# Matching chunks ranked per keyword query; bounds latency for taxa with very many chunks
+FTS_MAX_CANDIDATES = int(os.getenv("FTS_MAX_CANDIDATES", "5000"))
+
+
+def _db_url()->str:
+    """DB_URL with the driver set to psycopg 3, which both engines and the COPY-based image writes use."""
+    db_url=os.environ.get("DB_URL")
+    if not db_url:
+        raise RuntimeError("DB_URL environment variable is not set.")
+    scheme, sep, rest = db_url.partition("://")
+    if scheme in ("postgres", "postgresql", "postgresql+psycopg2"):
+        scheme = "postgresql+psycopg"
+    return scheme + sep + rest
 
 
 def get_engine()->Engine:
     """Get the SQLAlchemy engine for database operations."""
     global _DB_ENGINE
     if _DB_ENGINE is None:
-        db_url=os.environ.get("DB_URL")
-        if not db_url:
-            raise RuntimeError("DB_URL environment variable is not set.")
-        _DB_ENGINE = create_engine(db_url, pool_pre_ping=True)
+        _DB_ENGINE = create_engine(_db_url(), **_pool_options())
     return _DB_ENGINE
 
 
+def _pool_options()->Dict[str, Any]:
+    return {
+        "pool_pre_ping": True,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "connect_args": {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"},
+    }
+
+
+def get_async_engine()->AsyncEngine:
+    """Get the async (psycopg 3) engine used by the read path; only use it on the src.tools.aio loop."""
+    global _DB_ASYNC_ENGINE
+    if _DB_ASYNC_ENGINE is None:
+        _DB_ASYNC_ENGINE = create_async_engine(_db_url(), **_pool_options())
+    return _DB_ASYNC_ENGINE
+
+
 class DBResults(BaseModel):
     """Model to represent the results of a database query."""
 
@@ -37,53 +89,72 @@ class DBResults(BaseModel):
 
     occurrence_count:Optional[int]= None
     bbox:Optional[List[float]]= None
+    occurrence_years:Optional[Dict[int, int]]= None
+    occurrence_tiles:Optional[Dict[str, int]]= None
 
 class DBManagerOutput(BaseModel):
     """Model to represent the output of the DBManager."""
 
     db_results: DBResults=Field(default_factory=DBResults, description="Results from the database query")
+    profiles: List[DBResults] = Field(default_factory=list, description="One profile per resolved species (several for compare)")
     retrieval_context: List[Dict[str, Any]] = Field(default_factory=list, description="Context information for the retrieval")
     warnings: List[str] = Field(default_factory=list, description="Warnings generated during the retrieval process")
+    write_report: Optional[Dict[str, Any]] = Field(default=None, description="Per-row results and throughput of a write")
     
 
+# Set-based fallback when the name index can't be loaded
 _SPECIES_SELECT = text(
+    """
+    SELECT taxon_id, scientific_name, common_names
+    FROM taxon
+    WHERE lower(scientific_name) = ANY(:lq)
+        OR common_names && CAST(:q AS text[])
+    """
+)
+
+
+# Profile statements take a list of taxon ids, so N species cost the same round trips as one
+_TAXA_SELECT = text(
     """
     SELECT taxon_id, scientific_name, common_names,
         kingdom, phylum, class, "order", family, genus
-    FROM taxon
-    WHERE lower(scientific_name) = lower(:q)
-        OR (:q) = ANY(common_names)
-    LIMIT 1
+    FROM taxon WHERE taxon_id = ANY(:taxon_ids)
     """
 )
 
 
 _ASSESSMENT_SELECT = text(
     """
-    SELECT status, criteria, assessed_on, assessor, source, url, notes
-    FROM assessment WHERE taxon_id = :taxon_id
-    ORDER BY assessed_on DESC NULLS LAST
-    LIMIT 1
+    SELECT DISTINCT ON (taxon_id)
+        taxon_id, status, criteria, assessed_on, assessor, source, url, notes
+    FROM assessment WHERE taxon_id = ANY(:taxon_ids)
+    ORDER BY taxon_id, assessed_on DESC NULLS LAST
     """
 )
 
 
 _HABITAT_SELECT = text(
     """
-    SELECT habitat_type, importance, source
-    FROM habitat WHERE taxon_id = :taxon_id
-    ORDER BY importance DESC NULLS LAST
-    LIMIT :limit
+    SELECT taxon_id, habitat_type, importance, source
+    FROM (
+        SELECT *, row_number() OVER (PARTITION BY taxon_id ORDER BY importance DESC NULLS LAST) AS rn
+        FROM habitat WHERE taxon_id = ANY(:taxon_ids)
+    ) h
+    WHERE rn <= :limit
+    ORDER BY taxon_id, rn
     """
 )
 
 
 _IMAGES_SELECT = text(
     """
-    SELECT id, title, url, thumbnail_url, width, height, format, license, attribution, source, captured_on
-    FROM image_asset WHERE taxon_id = :taxon_id
-    ORDER BY added_at DESC
-    LIMIT :limit
+    SELECT taxon_id, id, title, url, thumbnail_url, width, height, format, license, attribution, source, captured_on
+    FROM (
+        SELECT *, row_number() OVER (PARTITION BY taxon_id ORDER BY added_at DESC) AS rn
+        FROM image_asset WHERE taxon_id = ANY(:taxon_ids)
+    ) i
+    WHERE rn <= :limit
+    ORDER BY taxon_id, rn
     """
 )
 
@@ -91,14 +162,104 @@ _IMAGES_SELECT = text(
 # Optional, only if PostGIS & occurrence table exist
 _OCC_SUMMARY = text(
     """
-    SELECT COUNT(*)::int AS n,
+    SELECT taxon_id, COUNT(*)::int AS n,
         MIN(ST_X(geom)) AS minlon, MIN(ST_Y(geom)) AS minlat,
         MAX(ST_X(geom)) AS maxlon, MAX(ST_Y(geom)) AS maxlat
-    FROM occurrence WHERE taxon_id = :taxon_id
+    FROM occurrence WHERE taxon_id = ANY(:taxon_ids)
+    GROUP BY taxon_id
+    """
+)
+
+
+# Pre-aggregated rollup (see refresh_occurrence_summary); a primary-key lookup instead of a scan
+_OCC_SUMMARY_FAST = text(
+    """
+    SELECT taxon_id, n, minlon, minlat, maxlon, maxlat, years, tiles
+    FROM occurrence_summary WHERE taxon_id = ANY(:taxon_ids)
+    """
+)
+
+
+_OCC_SUMMARY_DDL = text(
+    """
+    CREATE TABLE IF NOT EXISTS occurrence_summary (
+        taxon_id BIGINT PRIMARY KEY,
+        n BIGINT,
+        minlon DOUBLE PRECISION, minlat DOUBLE PRECISION,
+        maxlon DOUBLE PRECISION, maxlat DOUBLE PRECISION,
+        years JSONB,
+        tiles JSONB,
+        updated_at TIMESTAMPTZ DEFAULT now()
+    )
+    """
+)
+
+
+def _occ_summary_refresh_sql() -> Any:
+    scale = 2 ** OCC_TILE_ZOOM
+    lat = "GREATEST(LEAST(ST_Y(geom), 85.0511), -85.0511)"
+    tile = (
+        f"'{OCC_TILE_ZOOM}/' || LEAST(FLOOR((ST_X(geom) + 180) / 360 * {scale}), {scale - 1})::int"
+        f" || '/' || LEAST(FLOOR((1 - LN(TAN(RADIANS({lat})) + 1 / COS(RADIANS({lat}))) / PI()) / 2 * {scale}), {scale - 1})::int"
+    )
+    scope = "(CAST(:taxon_ids AS bigint[]) IS NULL OR taxon_id = ANY(CAST(:taxon_ids AS bigint[])))"
+    return text(
+        f"""
+        INSERT INTO occurrence_summary (taxon_id, n, minlon, minlat, maxlon, maxlat, years, tiles, updated_at)
+        SELECT s.taxon_id, s.n, s.minlon, s.minlat, s.maxlon, s.maxlat, y.years, t.tiles, now()
+        FROM (
+            SELECT taxon_id, COUNT(*) AS n,
+                MIN(ST_X(geom)) AS minlon, MIN(ST_Y(geom)) AS minlat,
+                MAX(ST_X(geom)) AS maxlon, MAX(ST_Y(geom)) AS maxlat
+            FROM occurrence WHERE {scope} GROUP BY taxon_id
+        ) s
+        LEFT JOIN (
+            SELECT taxon_id, jsonb_object_agg(yr, c) AS years
+            FROM (
+                SELECT taxon_id, {OCC_YEAR_EXPR} AS yr, COUNT(*) AS c
+                FROM occurrence WHERE {scope} AND {OCC_YEAR_EXPR} IS NOT NULL GROUP BY 1, 2
+            ) yy GROUP BY taxon_id
+        ) y USING (taxon_id)
+        LEFT JOIN (
+            SELECT taxon_id, jsonb_object_agg(tile, c) AS tiles
+            FROM (
+                SELECT taxon_id, {tile} AS tile, COUNT(*) AS c
+                FROM occurrence WHERE {scope} AND geom IS NOT NULL GROUP BY 1, 2
+            ) tt GROUP BY taxon_id
+        ) t USING (taxon_id)
+        ON CONFLICT (taxon_id) DO UPDATE SET
+            n = EXCLUDED.n, minlon = EXCLUDED.minlon, minlat = EXCLUDED.minlat,
+            maxlon = EXCLUDED.maxlon, maxlat = EXCLUDED.maxlat,
+            years = EXCLUDED.years, tiles = EXCLUDED.tiles, updated_at = EXCLUDED.updated_at
+        """
+    )
+
+
+# Rows of refreshed taxa that no longer have any occurrence (the upsert above never removes them)
+_OCC_SUMMARY_PRUNE = text(
+    """
+    DELETE FROM occurrence_summary s
+    WHERE (CAST(:taxon_ids AS bigint[]) IS NULL OR s.taxon_id = ANY(CAST(:taxon_ids AS bigint[])))
+        AND NOT EXISTS (SELECT 1 FROM occurrence o WHERE o.taxon_id = s.taxon_id)
     """
 )
 
 
+def refresh_occurrence_summary(engine:Engine, taxon_ids:Optional[List[int]]=None) -> None:
+    """Recompute occurrence_summary for the given taxa (all if None).
+
+    Call after loading or deleting occurrences with the taxa whose rows changed; taxa left
+    without occurrences lose their summary row. Reads fall back to scanning `occurrence` for
+    taxa that have no row yet.
+    """
+    params = {"taxon_ids": list(taxon_ids) if taxon_ids is not None else None}
+    with engine.begin() as conn:
+        conn.execute(_OCC_SUMMARY_DDL)
+        conn.execute(_occ_summary_refresh_sql(), params)
+        conn.execute(_OCC_SUMMARY_PRUNE, params)
+    _PROFILE_CACHE.invalidate(taxon_ids)
+
+
 # Vector search (pgvector) — adjust operator to your ops class (cosine/euclidean/inner)
 _DOC_VECTOR_SEARCH = text(
     """
@@ -111,17 +272,36 @@ _DOC_VECTOR_SEARCH = text(
     """
 )
 
-# Fallback keyword search (very simple ILIKE; replace with tsquery if available)
-_DOC_KEYWORD_SEARCH = text(
-    """
-    SELECT id, text, source_url, source_id, license,
-        CASE WHEN text ILIKE :kw THEN 0.9 ELSE 0.5 END AS score
-    FROM doc_chunk
-    WHERE taxon_id = :taxon_id AND text ILIKE :kw
-    ORDER BY id DESC
+# Full-text keyword search: query terms are OR-ed (a question rarely shares every word with a chunk)
+# and matches ranked by cover density, normalized by document length. {tsv} is the indexed
+# text_tsv column (see ensure_doc_fts) or, before that exists, the same expression computed inline.
+_DOC_KEYWORD_SQL = """
+    SELECT id, text, source_url, source_id, license, ts_rank_cd(tsv, q, 1) AS score
+    FROM (
+        SELECT id, text, source_url, source_id, license, {tsv} AS tsv
+        FROM doc_chunk
+        WHERE taxon_id = :taxon_id AND {tsv} @@ to_tsquery('english', :tsq)
+        LIMIT :max_candidates
+    ) d, to_tsquery('english', :tsq) q
+    ORDER BY score DESC
     LIMIT :k
-    """
-)
+"""
+_DOC_KEYWORD_SEARCH = text(_DOC_KEYWORD_SQL.format(tsv="text_tsv"))
+_DOC_KEYWORD_SEARCH_NOINDEX = text(_DOC_KEYWORD_SQL.format(tsv="to_tsvector('english', coalesce(text, ''))"))
+
+_DOC_FTS_DDL = [
+    "ALTER TABLE doc_chunk ADD COLUMN IF NOT EXISTS text_tsv tsvector"
+    " GENERATED ALWAYS AS (to_tsvector('english', coalesce(text, ''))) STORED",
+    "CREATE EXTENSION IF NOT EXISTS btree_gin",
+    "CREATE INDEX IF NOT EXISTS doc_chunk_taxon_tsv_idx ON doc_chunk USING GIN (taxon_id, text_tsv)",
+]
+
+
+def ensure_doc_fts(engine:Engine) -> None:
+    """Add doc_chunk.text_tsv and its (taxon_id, text_tsv) GIN index; run once as a migration (rewrites the table)."""
+    with engine.begin() as conn:
+        for ddl in _DOC_FTS_DDL:
+            conn.execute(text(ddl))
 
 def _first_nonempty(xs:List[str])->Optional[str]:
     """Return the first non-empty string from a list, or None."""
@@ -140,96 +320,183 @@ def _extract_user_query(state:Dict[str, Any])->str:
         ]) or ""
     )
 
-def _resolve_species(engine:Engine,entities:List[str])->Optional[str,Any]:
-    """Resolve a species name from the database."""
-    if not entities:
-        return None
+def _taxon_name_rows():
+    with get_engine().connect() as conn:
+        has_synonyms = conn.execute(
+            text("SELECT 1 FROM information_schema.columns WHERE table_name = 'taxon' AND column_name = 'synonyms'")
+        ).first() is not None
+        rows = conn.execution_options(stream_results=True, yield_per=100_000).execute(
+            text(f"SELECT taxon_id, scientific_name, common_names, {'synonyms' if has_synonyms else 'NULL'} FROM taxon ORDER BY taxon_id")
+        )
+        for row in rows:
+            yield tuple(row)
+
+
+# Change marker for the name index: a statement trigger bumps the version on every write to
+# taxon, renames included, so the index check is one single-row read
+_TAXON_VERSION_DDL = [
+    "CREATE TABLE IF NOT EXISTS taxon_version (id SMALLINT PRIMARY KEY CHECK (id = 1), version BIGINT NOT NULL)",
+    "INSERT INTO taxon_version VALUES (1, 0) ON CONFLICT (id) DO NOTHING",
+    """CREATE OR REPLACE FUNCTION bump_taxon_version() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN UPDATE taxon_version SET version = version + 1 WHERE id = 1; RETURN NULL; END $$""",
+    "DROP TRIGGER IF EXISTS taxon_version_bump ON taxon",
+    "CREATE TRIGGER taxon_version_bump AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON taxon"
+    " FOR EACH STATEMENT EXECUTE FUNCTION bump_taxon_version()",
+]
+
+
+def ensure_taxon_version(engine:Engine) -> None:
+    """Add the taxon_version table and the trigger that bumps it on writes to taxon; run once at setup."""
     with engine.begin() as conn:
-        for ent in entities:
-            r:Result=conn.execute(
-                _SPECIES_SELECT,
-                {"q": ent}
-            )
-            row=r.mappings().first()
-            if row:
-                return dict(row)
-    return None
+        for ddl in _TAXON_VERSION_DDL:
+            conn.execute(text(ddl))
 
 
-def _fetch_profile(engine:Engine,taxon_id:int, want_occ:bool,img_limit:int=8)->DBResults:
-    
-    out=DBResults()
+def _taxon_signature():
+    with get_engine().connect() as conn:
+        if conn.execute(text("SELECT to_regclass('taxon_version')")).scalar() is not None:
+            return conn.execute(text("SELECT version FROM taxon_version WHERE id = 1")).scalar()
+        # not migrated yet: catches loads and deletes, but not renames
+        return tuple(conn.execute(text("SELECT COUNT(*), MAX(taxon_id) FROM taxon")).one())
+
+
+_NAME_INDEX = NameIndex(_taxon_name_rows, _taxon_signature)
+
+
+def taxon_name_index() -> NameIndex:
+    """The backend's name index (e.g. to build it at startup rather than in the first request)."""
+    return _NAME_INDEX
+
+
+def _resolve_species(engine:Engine,entities:List[str],fuzzy_misses:bool=False)->List[Dict[str,Any]]:
+    """Resolve all entity names to taxa at once (see NameIndex.resolve); one row per taxon."""
+    if not entities:
+        return []
+    try:
+        return [
+            {"entity": ent, "taxon_id": taxon_id, "fuzzy_match": fuzzy}
+            for ent, taxon_id, fuzzy in _NAME_INDEX.resolve(entities, fuzzy_misses=fuzzy_misses)
+        ]
+    except SQLAlchemyError:
+        pass  # index unavailable: one set-based query instead
     with engine.begin() as conn:
-        #assessment
-        a=conn.execute(_ASSESSMENT_SELECT, {"taxon_id": taxon_id}).mappings().first()
-        #habitats
-        h=conn.execute(_HABITAT_SELECT, {"taxon_id": taxon_id, "limit": 15}).mappings().all()
-        #images
-        img=conn.execute(_IMAGES_SELECT, {"taxon_id": taxon_id, "limit": img_limit}).mappings().all()
-        
-        t=conn.execute(
-            text(
-                """
-                SELECT scientific_name, common_names, kingdom, phylum, class, \"order\", family, genus,
-                    from taxon WHERE taxon_id = :taxon_id
-                """
-            ),
-            {"taxon_id": taxon_id}
-        ).mappings().first()
-        out.taxon_id=taxon_id
-        
-        if t:
-            out.scientific_name=t.get("scientific_name")
-            out.common_names=t.get("common_names") or []
-            out.toxonomy={
-                "kingdom": t.get("kingdom"),
-                "phylum": t.get("phylum"),
-                "class": t.get("class"),
-                "order": t.get("order"),
-                "family": t.get("family"),
-                "genus": t.get("genus"),
-            }
-        if a:
-            out.assessment=dict(a)
-        if h:
-            out.habitats=[dict(habitat) for habitat in h]
-        if img:
-            out.images=[dict(image) for image in img]
-        
-        if want_occ:
-            try:
-                occ=conn.execute(_OCC_SUMMARY, {"taxon_id": taxon_id}).mappings().first()
-                if occ and occ.get("n") is not None:
-                    out.occurrence_count=int(occ["n"])
-                    out.bbox=[
-                        float(occ["minlon"]),
-                        float(occ["minlat"]),
-                        float(occ["maxlon"]),
-                        float(occ["maxlat"]),
-                    ]
-            except SQLAlchemyError as e:
-                pass
+        rows = conn.execute(
+            _SPECIES_SELECT, {"lq": [e.lower() for e in entities], "q": list(entities)}
+        ).mappings().all()
+    out: List[Dict[str, Any]] = []
+    seen = set()
+    for ent in entities:
+        for row in rows:
+            if row["taxon_id"] not in seen and (
+                (row["scientific_name"] or "").lower() == ent.lower() or ent in (row["common_names"] or [])
+            ):
+                seen.add(row["taxon_id"])
+                out.append({"entity": ent, "taxon_id": row["taxon_id"], "fuzzy_match": None})
+                break
     return out
 
 
+async def _rows(engine:AsyncEngine, stmt:Any, params:Dict[str, Any])->List[Dict[str, Any]]:
+    """Run one statement on its own pooled connection."""
+    async with engine.connect() as conn:
+        return [dict(row) for row in (await conn.execute(stmt, params)).mappings().all()]
 
-def _vector_retrieve(engine:Engine,taxon_id:int,query_vec:List[float],k:int) -> List[Dict[str, Any]]:
+
+async def _occurrence_rows(engine:AsyncEngine, params:Dict[str, Any])->List[Dict[str, Any]]:
+    """Rollup rows where present; taxa the rollup doesn't cover yet (no refresh since their load) scan occurrence."""
+    try:
+        found = await _rows(engine, _OCC_SUMMARY_FAST, params)
+    except SQLAlchemyError:
+        found = []  # no rollup table
+    have = {r["taxon_id"] for r in found}
+    missing = [t for t in params["taxon_ids"] if t not in have]
+    if not missing:
+        return found
+    try:
+        return found + await _rows(engine, _OCC_SUMMARY, {**params, "taxon_ids": missing})
+    except SQLAlchemyError:
+        return found
+
+
+async def _fetch_profiles(engine:AsyncEngine,taxon_ids:List[int], want_occ:bool,img_limit:int=8)->List[DBResults]:
+    """Profiles for all `taxon_ids`, in the given order; the batched section statements run concurrently."""
+    params = {"taxon_ids": list(taxon_ids)}
+    sections = [
+        _rows(engine, _TAXA_SELECT, params),
+        _rows(engine, _ASSESSMENT_SELECT, params),
+        _rows(engine, _HABITAT_SELECT, {**params, "limit": 15}),
+        _rows(engine, _IMAGES_SELECT, {**params, "limit": img_limit}),
+    ]
+    if want_occ:
+        sections.append(_occurrence_rows(engine, params))
+    taxa, assessments, habitats, images, *occ = await asyncio.gather(*sections)
+
+    by_id: Dict[int, DBResults] = {}
+    for t in taxa:
+        by_id[t["taxon_id"]] = DBResults(
+            taxon_id=t["taxon_id"],
+            scientific_name=t.get("scientific_name"),
+            common_names=t.get("common_names") or [],
+            taxonomy={k: t.get(k) for k in ("kingdom", "phylum", "class", "order", "family", "genus")},
+        )
+    for a in assessments:
+        if a["taxon_id"] in by_id:
+            by_id[a["taxon_id"]].assessment = {k: v for k, v in a.items() if k != "taxon_id"}
+    for h in habitats:
+        if h["taxon_id"] in by_id:
+            by_id[h["taxon_id"]].habitats.append({k: v for k, v in h.items() if k != "taxon_id"})
+    for img in images:
+        if img["taxon_id"] in by_id:
+            by_id[img["taxon_id"]].images.append({k: v for k, v in img.items() if k != "taxon_id"})
+    for occ_row in (occ[0] if occ else []):
+        out = by_id.get(occ_row["taxon_id"])
+        if out is not None and occ_row.get("n"):
+            out.occurrence_count=int(occ_row["n"])
+            out.bbox=[
+                float(occ_row["minlon"]),
+                float(occ_row["minlat"]),
+                float(occ_row["maxlon"]),
+                float(occ_row["maxlat"]),
+            ]
+            if occ_row.get("years") is not None:
+                out.occurrence_years={int(y): int(c) for y, c in occ_row["years"].items()}
+            if occ_row.get("tiles") is not None:
+                out.occurrence_tiles={t: int(c) for t, c in occ_row["tiles"].items()}
+    return [by_id[t] for t in taxon_ids if t in by_id]
+
+
+async def _cached_profiles(engine:AsyncEngine,taxon_ids:List[int], want_occ:bool)->List[DBResults]:
+    """_fetch_profiles through the profile cache; only uncached taxa are queried."""
+    variant = "occ" if want_occ else "base"
+    generation = _PROFILE_CACHE.generation()
+    hit = _PROFILE_CACHE.get_many(taxon_ids, variant)
+    missing = [t for t in taxon_ids if t not in hit]
+    fresh = {p.taxon_id: p for p in await _fetch_profiles(engine, missing, want_occ)} if missing else {}
+    _PROFILE_CACHE.put_many({t: p.dict() for t, p in fresh.items()}, variant, generation)
+    return [fresh[t] if t in fresh else DBResults(**hit[t]) for t in taxon_ids if t in fresh or t in hit]
+
+
+
+async def _vector_retrieve(engine:AsyncEngine,taxon_id:int,query_vec:List[float],k:int) -> List[Dict[str, Any]]:
     """Retrieve documents using vector search."""
     try:
-        with engine.begin() as conn:
-            rows=conn.execute(_DOC_VECTOR_SEARCH, {"taxon_id": taxon_id, "qvec": query_vec, "k": k}).mappings().all()
-            return [dict(row) for row in rows]
+        return await _rows(engine, _DOC_VECTOR_SEARCH, {"taxon_id": taxon_id, "qvec": query_vec, "k": k})
     except SQLAlchemyError as e:
         return []
-    
 
 
-def _keyword_retrieve(engine:Engine,taxon_id:int,query:str,k:int) -> List[Dict[str, Any]]:
-    """Retrieve documents using keyword search."""
-    kw=f"%{query[:200]}%" if query else "%"
-    with engine.begin() as conn:
-        rows=conn.execute(_DOC_KEYWORD_SEARCH, {"taxon_id": taxon_id, "kw": kw, "k": k}).mappings().all()
-        return [dict(row) for row in rows]
+
+async def _keyword_retrieve(engine:AsyncEngine,taxon_id:int,query:str,k:int) -> List[Dict[str, Any]]:
+    """Retrieve documents using full-text search, best-ranked first."""
+    terms = tokenize(query)[:MAX_QUERY_TERMS]
+    if not terms:
+        return []
+    params = {"taxon_id": taxon_id, "tsq": " | ".join(terms), "k": k, "max_candidates": FTS_MAX_CANDIDATES}
+    try:
+        return await _rows(engine, _DOC_KEYWORD_SEARCH, params)
+    except SQLAlchemyError:
+        # no text_tsv column yet: same ranking, computed per row
+        return await _rows(engine, _DOC_KEYWORD_SEARCH_NOINDEX, params)
 
 
 def db_manager(state:Dict[str, Any], *,embedder:Optional[Any]=None,retr_k:int=12)->DBManagerOutput:
@@ -246,14 +513,17 @@ def db_manager(state:Dict[str, Any], *,embedder:Optional[Any]=None,retr_k:int=12
         payload = state.get("write_payload") or {}
         write_kind = (payload.get("kind") or "").lower()
         if write_kind == "image_asset":
-            out = _insert_image_asset(engine, payload)
-            warnings.extend(out[1])
-            return DBManagerOutput(db_results=DBResults(), retrieval_context=[], warnings=warnings)
+            report, write_warnings = _write_image_assets(engine, payload)
+            warnings.extend(write_warnings)
+            return DBManagerOutput(db_results=DBResults(), retrieval_context=[], warnings=warnings, write_report=report)
         else:
             warnings.append("Unsupported write kind; no action taken.")
             return DBManagerOutput(db_results=DBResults(), retrieval_context=[], warnings=warnings)
 
-    resolved = _resolve_species(engine, entities)
+    # compare needs every species; other tasks are about the first one that resolves
+    resolved = _resolve_species(engine, entities, fuzzy_misses=task == "compare")
+    if task != "compare":
+        resolved = resolved[:1]
     if not resolved:
         return DBManagerOutput(
             db_results=DBResults(),
@@ -261,61 +531,131 @@ def db_manager(state:Dict[str, Any], *,embedder:Optional[Any]=None,retr_k:int=12
             warnings=["No matching species found in DB for provided entities."],
         )
 
-    taxon_id = int(resolved["taxon_id"])  # type: ignore
+    for r in resolved:
+        if r["fuzzy_match"]:
+            matched, score = r["fuzzy_match"]
+            warnings.append(f"No exact match for '{r['entity']}'; using closest name '{matched}' (similarity {score:.2f})")
 
     want_occ = task in {"map", "trend", "report"}
-    profile = _fetch_profile(engine, taxon_id, want_occ)
+    taxon_ids = [int(r["taxon_id"]) for r in resolved]
+    embedder = embedder or get_embedder()
+    if embedder is None and embedder_error():  # EMBED_MODEL unset is reported once at startup
+        warnings.append(f"Vector retrieval unavailable ({embedder_error()})")
+    profiles, ctx, retr_warnings = aio.run(_read_request(taxon_ids, want_occ, user_query, embedder, retr_k))
+    if not profiles:
+        return DBManagerOutput(warnings=warnings + ["No matching species found in DB for provided entities."])
+    warnings.extend(retr_warnings)
+    return DBManagerOutput(db_results=profiles[0], profiles=profiles, retrieval_context=ctx, warnings=warnings)
+
+
+async def _read_request(taxon_ids:List[int], want_occ:bool, user_query:str, embedder:Optional[Any], retr_k:int):
+    """Profile sections and retrieval for one request, all in flight at once."""
+    engine = get_async_engine()
+    profiles_task = asyncio.ensure_future(_cached_profiles(engine, taxon_ids, want_occ))
+    # retrieval grounds the primary (first) species
+    taxon_id = taxon_ids[0]
+    query_text = user_query
+    if not query_text:
+        # without a question retrieval searches by scientific name, so it waits for the profile
+        profiles = await profiles_task
+        query_text = (profiles[0].scientific_name or "") if profiles else ""
+
+    async def vector_search() -> List[Dict[str, Any]]:
+        qvec = await asyncio.to_thread(embedder, query_text)
+        return await _vector_retrieve(engine, taxon_id, qvec, retr_k) if qvec is not None else []
+
+    retrieval = hybrid_retrieve_async(
+        vector_search() if embedder is not None else None,
+        _keyword_retrieve(engine, taxon_id, query_text, retr_k),
+        retr_k,
+    )
+    profiles, (ctx, retr_warnings) = await asyncio.gather(profiles_task, retrieval)
+    return profiles, ctx, retr_warnings
 
-    ctx: List[Dict[str, Any]] = []
-    if embedder is not None:
-        try:
-            qvec = embedder(user_query) if user_query else embedder(profile.scientific_name or "")
-            if qvec is not None:
-                vec_ctx = _vector_retrieve(engine, taxon_id, qvec, retr_k)
-                ctx.extend(vec_ctx)
-        except Exception:
-            warnings.append("Vector retrieval failed; falling back to keyword.")
-    if not ctx:  
-        ctx = _keyword_retrieve(engine, taxon_id, user_query or (profile.scientific_name or ""), retr_k)
 
-    return DBManagerOutput(db_results=profile, retrieval_context=ctx, warnings=warnings)
 
+# Bulk image writes: rows are COPYed into a text staging table and upserted on url in one statement
+_IMAGE_URL_UNIQUE = text("CREATE UNIQUE INDEX IF NOT EXISTS image_asset_url_key ON image_asset (url)")
+_IMAGE_STAGE_DDL = (
+    "CREATE TEMP TABLE _image_stage (_row bigint, "
+    + ", ".join(f"{c} text" for c in IMAGE_COLUMNS)
+    + ") ON COMMIT DROP"
+)
+_IMAGE_UNKNOWN_TAXA = """
+    SELECT s._row FROM _image_stage s LEFT JOIN taxon t ON t.taxon_id = s.taxon_id::bigint
+    WHERE t.taxon_id IS NULL
+"""
+_IMAGE_UPSERT = """
+    INSERT INTO image_asset (taxon_id, title, url, thumbnail_url, width, height, format, license, attribution, source, captured_on)
+    SELECT s.taxon_id::bigint, s.title, s.url, s.thumbnail_url, s.width::int, s.height::int, s.format,
+        s.license, s.attribution, s.source, s.captured_on::date
+    FROM _image_stage s JOIN taxon t ON t.taxon_id = s.taxon_id::bigint
+    ON CONFLICT (url) DO UPDATE SET
+        taxon_id = EXCLUDED.taxon_id, title = EXCLUDED.title, thumbnail_url = EXCLUDED.thumbnail_url,
+        width = EXCLUDED.width, height = EXCLUDED.height, format = EXCLUDED.format, license = EXCLUDED.license,
+        attribution = EXCLUDED.attribution, source = EXCLUDED.source, captured_on = EXCLUDED.captured_on
+    RETURNING id, url, (xmax = 0) AS inserted
+"""
+
+
+def ensure_image_url_unique(engine:Engine) -> None:
+    """Unique index on image_asset.url that the upsert conflicts on; run once at setup. Fails if duplicate urls exist."""
+    with engine.begin() as conn:
+        conn.execute(_IMAGE_URL_UNIQUE)
 
 
-def _insert_image_asset(engine: Engine, payload: Dict[str, Any]) -> Tuple[Optional[int], List[str]]:
+def _write_image_assets(engine: Engine, payload: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """Validate and upsert (on url) one payload, a list of rows or a file of them; returns the write report."""
+    t0 = time.perf_counter()
     warnings: List[str] = []
-    required = ["taxon_id", "url", "license", "attribution"]
-    missing = [k for k in required if not payload.get(k)]
-    if missing:
-        warnings.append(f"Missing required fields for image_asset: {', '.join(missing)}")
-        return None, warnings
-
-    ins = text(
-        """
-        INSERT INTO image_asset (taxon_id, title, url, thumbnail_url, width, height, format, license, attribution, source, captured_on)
-        VALUES (:taxon_id, :title, :url, :thumbnail_url, :width, :height, :format, :license, :attribution, :source, :captured_on)
-        RETURNING id
-        """
-    )
-    params = {k: payload.get(k) for k in [
-        "taxon_id", "title", "url", "thumbnail_url", "width", "height", "format", "license", "attribution", "source", "captured_on"
-    ]}
-
     try:
-        with get_engine().begin() as conn:
-            rid = conn.execute(ins, params).scalar_one()
-            return int(rid), warnings
-    except SQLAlchemyError as e:
-        warnings.append(f"Insert failed: {e}")
-        return None, warnings
+        table = load_payload(payload)
+    except Exception as e:
+        return summarize(0, [], time.perf_counter() - t0), [f"Could not read image payload: {e}"]
+    rows, results = validate(table)
+    if rows.num_rows:
+        stage_cols = ["_row"] + IMAGE_COLUMNS
+        url_row = dict(zip(rows.column("url").to_pylist(), rows.column("_row").to_pylist()))
+        raw = engine.raw_connection()
+        try:
+            pg = raw.driver_connection
+            with pg.cursor() as cur:
+                cur.execute(_IMAGE_STAGE_DDL)
+                with cur.copy(f"COPY _image_stage ({', '.join(stage_cols)}) FROM STDIN") as copy:
+                    for rec in zip(*(rows.column(c).to_pylist() for c in stage_cols)):
+                        copy.write_row(rec)
+                unknown = [r for (r,) in cur.execute(_IMAGE_UNKNOWN_TAXA).fetchall()]
+                written = cur.execute(_IMAGE_UPSERT).fetchall()
+            pg.commit()
+        except Exception as e:
+            raw.rollback()
+            warnings.append(f"Insert failed: {e}")
+            if "ON CONFLICT" in str(e):
+                warnings.append("image_asset.url has no unique index; run ensure_image_url_unique(engine) once")
+            written, unknown = [], []
+            results.extend({"row": r, "status": "error", "error": str(e)} for r in url_row.values())
+        finally:
+            raw.close()
+        results.extend({"row": r, "status": "invalid", "error": "unknown taxon_id"} for r in unknown)
+        for rid, url, inserted in written:
+            results.append({"row": url_row[url], "status": "inserted" if inserted else "updated", "id": int(rid)})
+        if written:
+            _PROFILE_CACHE.invalidate({int(t) for t in rows.column("taxon_id").to_pylist()})
+    report = summarize(table.num_rows, results, time.perf_counter() - t0)
+    if report.get("invalid") or report.get("duplicate"):
+        warnings.append(f"{report.get('invalid', 0)} invalid and {report.get('duplicate', 0)} duplicate image rows skipped")
+    return report, warnings
 
 def db_manager_node(state: Dict[str, Any]) -> Dict[str, Any]:
     try:
         out = db_manager(state)
         patch: Dict[str, Any] = {
             "db_results": out.db_results.dict(),
+            "db_profiles": [p.dict() for p in out.profiles],
             "retrieval_context": out.retrieval_context,
         }
+        if out.write_report is not None:
+            patch["db_write_report"] = out.write_report
         if out.warnings:
             warnings = list(state.get("warnings", []) or [])
             warnings.extend(out.warnings)
@@ -1,10 +1,28 @@
 from __future__ import annotations
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+import atexit
+import math
 import os
+import re
+import threading
+import time
 import duckdb
 from pydantic import BaseModel, Field
+from src.data.image_assets import IMAGE_COLUMNS, load_payload, summarize, validate
+from src.data.keyword_index import BM25_B, BM25_K1, MAX_QUERY_TERMS, tokenize
+from src.data.name_index import NameIndex
+from src.llm.embeddings import embedder_error, get_embedder
+from src.tools.profile_cache import get_profile_cache
+from src.tools.retrieval import hybrid_retrieve
 
 DUCK_PATH = os.getenv("DUCKDB_PATH", "data/db.duckdb")
+DUCK_READ_ONLY = os.getenv("DUCKDB_READ_ONLY", "1") == "1"
+DUCK_THREADS = os.getenv("DUCKDB_THREADS")  # unset: DuckDB default (all cores)
+DUCK_MEMORY_LIMIT = os.getenv("DUCKDB_MEMORY_LIMIT")  # e.g. "2GB"
+# Taxa with more embedded chunks than this are searched through the HNSW index instead of exactly
+VEC_EXACT_MAX = int(os.getenv("DUCKDB_VEC_EXACT_MAX", "20000"))
+# Cap on candidates pulled from the HNSW index before the taxon filter
+VEC_MAX_CANDIDATES = int(os.getenv("DUCKDB_VEC_MAX_CANDIDATES", "5000"))
 
 class DBResults(BaseModel):
     taxon_id: int | None = None
@@ -16,68 +34,420 @@ class DBResults(BaseModel):
     images: List[Dict[str, Any]] = []
     occurrence_count: int | None = None
     bbox: List[float] | None = None
+    occurrence_years: Dict[int, int] | None = None  # year -> count
+    occurrence_tiles: Dict[str, int] | None = None  # "z/x/y" web-mercator tile -> count
 
 class DBManagerOutput(BaseModel):
     db_results: DBResults = Field(default_factory=DBResults)
+    profiles: List[DBResults] = Field(default_factory=list)  # one per resolved species (several for compare)
     retrieval_context: List[Dict[str, Any]] = Field(default_factory=list)
     warnings: List[str] = Field(default_factory=list)
+    write_report: Dict[str, Any] | None = None  # per-row results and throughput of a write
 
 
-def _conn():
-    os.makedirs(os.path.dirname(DUCK_PATH), exist_ok=True)
-    return duckdb.connect(DUCK_PATH)
+# One process-wide handle, so all sessions share DuckDB's buffer cache; each thread
+# queries through its own cursor since a connection must not be used concurrently.
+_DUCK_CON: duckdb.DuckDBPyConnection | None = None
+_DUCK_COLUMNS: Dict[str, set] = {}  # table -> column names, read once when the handle opens
+_PROFILE_SQL: Dict[bool, str] = {}  # want_occ -> profile statement for the current schema
+_DOC_VEC: Dict[str, Any] = {}  # doc_chunk_vec: embedding dim, row count, whether its HNSW index is usable
+_DOC_BM25: Dict[str, float] = {}  # doc_term_stats: corpus size and average chunk length
+_DUCK_CURSORS: List[duckdb.DuckDBPyConnection] = []
+_DUCK_LOCK = threading.Lock()
+_DUCK_LOCAL = threading.local()
 
 
-def db_manager_duckdb(state: Dict[str, Any]) -> DBManagerOutput:
+def _conn() -> duckdb.DuckDBPyConnection:
+    global _DUCK_CON
+    with _DUCK_LOCK:
+        if _DUCK_CON is None:
+            config: Dict[str, Any] = {}
+            if DUCK_THREADS:
+                config["threads"] = int(DUCK_THREADS)
+            if DUCK_MEMORY_LIMIT:
+                config["memory_limit"] = DUCK_MEMORY_LIMIT
+            # read-only needs an existing file; before the first ingest fall back to an empty db
+            read_only = DUCK_READ_ONLY and os.path.exists(DUCK_PATH)
+            if not read_only:
+                os.makedirs(os.path.dirname(DUCK_PATH) or ".", exist_ok=True)
+            _DUCK_CON = duckdb.connect(DUCK_PATH, read_only=read_only, config=config)
+            _DUCK_COLUMNS.clear()
+            _PROFILE_SQL.clear()
+            for table, column in _DUCK_CON.execute(
+                "SELECT table_name, column_name FROM information_schema.columns WHERE table_schema='main'"
+            ).fetchall():
+                _DUCK_COLUMNS.setdefault(table, set()).add(column)
+            _DOC_VEC.clear()
+            if "doc_chunk_vec" in _DUCK_COLUMNS:
+                _DOC_VEC.update(_doc_vec_info(_DUCK_CON))
+            _DOC_BM25.clear()
+            if "doc_term_stats" in _DUCK_COLUMNS:
+                row = _DUCK_CON.execute("SELECT n_docs, total_len FROM doc_term_stats").fetchone()
+                if row and row[0]:
+                    _DOC_BM25.update(n=float(row[0]), avgdl=max(1.0, row[1] / row[0]))
+        return _DUCK_CON
+
+
+def _doc_vec_info(con: duckdb.DuckDBPyConnection) -> Dict[str, Any]:
+    dtype = con.execute(
+        "SELECT data_type FROM information_schema.columns WHERE table_name='doc_chunk_vec' AND column_name='embedding'"
+    ).fetchone()[0]
+    m = re.fullmatch(r"FLOAT\[(\d+)\]", dtype)
+    info = {
+        "dim": int(m.group(1)) if m else None,
+        "rows": con.execute("SELECT count(*) FROM doc_chunk_vec").fetchone()[0],
+        "hnsw": False,
+    }
+    if con.execute("SELECT count(*) FROM duckdb_indexes() WHERE index_name='doc_chunk_vec_hnsw'").fetchone()[0]:
+        try:
+            con.execute("LOAD vss")
+            info["hnsw"] = True
+        except duckdb.Error:
+            pass  # index unusable without the extension; exact scans still work
+    return info
+
+
+def _cursor() -> duckdb.DuckDBPyConnection:
+    """This thread's cursor on the shared handle."""
+    con = _conn()
+    cur = getattr(_DUCK_LOCAL, "cur", None)
+    if cur is None or getattr(_DUCK_LOCAL, "con", None) is not con:
+        cur = con.cursor()
+        _DUCK_LOCAL.cur, _DUCK_LOCAL.con = cur, con
+        with _DUCK_LOCK:
+            _DUCK_CURSORS.append(cur)
+    return cur
+
+
+def close_duckdb() -> None:
+    """Close every cursor and the shared handle; the next query reopens it."""
+    global _DUCK_CON
+    with _DUCK_LOCK:
+        for cur in _DUCK_CURSORS:
+            try:
+                cur.close()
+            except Exception:
+                pass
+        _DUCK_CURSORS.clear()
+        _DUCK_COLUMNS.clear()
+        _PROFILE_SQL.clear()
+        _DOC_VEC.clear()
+        _DOC_BM25.clear()
+        if _DUCK_CON is not None:
+            _DUCK_CON.close()
+            _DUCK_CON = None
+
+
+atexit.register(close_duckdb)
+
+
+def _taxon_name_rows():
+    cur = _cursor()
+    if "taxon" not in _DUCK_COLUMNS:
+        return
+    synonyms = "synonyms" if "synonyms" in _DUCK_COLUMNS["taxon"] else "NULL"
+    cur.execute(f"SELECT taxon_id, scientific_name, common_names, {synonyms} FROM taxon ORDER BY taxon_id")
+    while rows := cur.fetchmany(100_000):
+        yield from rows
+
+
+def _taxon_signature() -> Any:
+    cur = _cursor()
+    if "taxon" not in _DUCK_COLUMNS:
+        return None
+    if "_ingest_meta" in _DUCK_COLUMNS:
+        row = cur.execute("SELECT fingerprint FROM _ingest_meta WHERE table_name='taxon'").fetchone()
+        if row:
+            return row[0]
+    return cur.execute("SELECT count(*), max(taxon_id) FROM taxon").fetchone()
+
+
+# Name -> taxon_id without touching the taxon table per request
+_NAME_INDEX = NameIndex(_taxon_name_rows, _taxon_signature)
+
+
+def taxon_name_index() -> NameIndex:
+    """The backend's name index, for callers outside the DBManager (e.g. the Interpreter fast path)."""
+    return _NAME_INDEX
+
+
+def _profile_sql(want_occ: bool) -> str:
+    """One statement for the profiles of all taxa in $taxon_ids; sections for absent tables become NULL."""
+    if want_occ in _PROFILE_SQL:
+        return _PROFILE_SQL[want_occ]
+    cols = _DUCK_COLUMNS
+    ids = "taxon_id IN (SELECT unnest($taxon_ids))"
+    ctes = [
+        "t AS (SELECT taxon_id, scientific_name, common_names, kingdom, phylum, class, \"order\", family, genus"
+        f" FROM taxon WHERE {ids})",
+    ]
+    joins, nulls = [], []
+    if "assessment" in cols:
+        ctes.append(
+            "a AS (SELECT taxon_id, struct_pack(status, criteria, assessed_on, assessor, source, url, notes) AS assessment"
+            f" FROM assessment WHERE {ids} QUALIFY row_number() OVER (PARTITION BY taxon_id ORDER BY assessed_on DESC NULLS LAST) = 1)"
+        )
+        joins.append("a")
+    else:
+        nulls.append("NULL AS assessment")
+    if "habitat" in cols:
+        ctes.append(
+            "h AS (SELECT taxon_id, list(struct_pack(habitat_type, importance, source)) AS habitats"
+            f" FROM (SELECT * FROM habitat WHERE {ids} QUALIFY row_number() OVER (PARTITION BY taxon_id) <= 15) GROUP BY taxon_id)"
+        )
+        joins.append("h")
+    else:
+        nulls.append("NULL AS habitats")
+    if "image_asset" in cols:
+        ctes.append(
+            "i AS (SELECT taxon_id, list(struct_pack(title, url, thumbnail_url, width, height, format, license, attribution, source, captured_on) ORDER BY id DESC) AS images"
+            f" FROM (SELECT * FROM image_asset WHERE {ids} QUALIFY row_number() OVER (PARTITION BY taxon_id ORDER BY id DESC) <= 12) GROUP BY taxon_id)"
+        )
+        joins.append("i")
+    else:
+        nulls.append("NULL AS images")
+    # occurrence rollup maintained at ingest; else a live scan if lon/lat columns exist
+    if want_occ and "occurrence_summary" in cols:
+        ctes.append(
+            "o AS (SELECT taxon_id, n AS occurrence_count, minlon, minlat, maxlon, maxlat, years, tiles"
+            f" FROM occurrence_summary WHERE {ids})"
+        )
+        joins.append("o")
+    elif want_occ and {"longitude", "latitude"} <= cols.get("occurrence", set()):
+        ctes.append(
+            "o AS (SELECT taxon_id, count(*) AS occurrence_count, min(longitude) AS minlon, min(latitude) AS minlat,"
+            f" max(longitude) AS maxlon, max(latitude) AS maxlat, NULL AS years, NULL AS tiles FROM occurrence WHERE {ids} GROUP BY taxon_id)"
+        )
+        joins.append("o")
+    else:
+        nulls.append("NULL AS occurrence_count, NULL AS minlon, NULL AS minlat, NULL AS maxlon, NULL AS maxlat, NULL AS years, NULL AS tiles")
+    select = ", ".join(["*"] + nulls)
+    sql = (
+        "WITH " + ",\n".join(ctes)
+        + f"\nSELECT {select} FROM t" + "".join(f" LEFT JOIN {j} USING (taxon_id)" for j in joins)
+    )
+    _PROFILE_SQL[want_occ] = sql
+    return sql
+
+
+def _fetch_profiles(taxon_ids: List[int], want_occ: bool) -> List[DBResults]:
+    """Profiles for all `taxon_ids` in one round trip, in the given order."""
+    con = _cursor()
+    rows = con.execute(_profile_sql(want_occ), {"taxon_ids": taxon_ids}).fetchall()
+    names = [c[0] for c in con.description]
+    by_id: Dict[int, DBResults] = {}
+    for row in rows:
+        p = dict(zip(names, row))
+        res = DBResults(
+            taxon_id=p["taxon_id"],
+            scientific_name=p["scientific_name"],
+            common_names=p["common_names"] or [],
+            taxonomy={k: p[k] for k in ("kingdom", "phylum", "class", "order", "family", "genus")},
+            assessment=p["assessment"],
+            habitats=p["habitats"] or [],
+            images=p["images"] or [],
+        )
+        if p["occurrence_count"] and p["minlon"] is not None:
+            res.occurrence_count = int(p["occurrence_count"])
+            res.bbox = [float(p["minlon"]), float(p["minlat"]), float(p["maxlon"]), float(p["maxlat"])]
+        if p["years"] is not None:
+            res.occurrence_years = {y["year"]: y["n"] for y in p["years"]}
+        if p["tiles"] is not None:
+            res.occurrence_tiles = {t["tile"]: t["n"] for t in p["tiles"]}
+        by_id[res.taxon_id] = res
+    return [by_id[t] for t in taxon_ids if t in by_id]
+
+
+# Popular species are served without touching DuckDB; ingest invalidates it
+_PROFILE_CACHE = get_profile_cache("duckdb")
+
+
+def _cached_profiles(taxon_ids: List[int], want_occ: bool) -> List[DBResults]:
+    """_fetch_profiles through the profile cache; only uncached taxa are queried."""
+    variant = "occ" if want_occ else "base"
+    generation = _PROFILE_CACHE.generation()
+    hit = _PROFILE_CACHE.get_many(taxon_ids, variant)
+    missing = [t for t in taxon_ids if t not in hit]
+    fresh = {p.taxon_id: p for p in _fetch_profiles(missing, want_occ)} if missing else {}
+    _PROFILE_CACHE.put_many({t: p.dict() for t, p in fresh.items()}, variant, generation)
+    return [fresh[t] if t in fresh else DBResults(**hit[t]) for t in taxon_ids if t in fresh or t in hit]
+
+
+def _vector_retrieve(taxon_id: int, query_vec: List[float], k: int) -> List[Dict[str, Any]]:
+    """Top-k doc_chunk_vec rows of one taxon by cosine similarity (same shape as database._vector_retrieve)."""
+    dim = _DOC_VEC.get("dim")
+    if not dim or len(query_vec) != dim:
+        return []
+    cur = _cursor()
+    # a literal, not a parameter: the HNSW optimizer only rewrites constant query vectors
+    qvec = "[" + ",".join(repr(float(x)) for x in query_vec) + f"]::FLOAT[{dim}]"
+    dist = f"array_cosine_distance(embedding, {qvec})"
+    cols = "id, text, source_url, source_id, license"
+    exact = (
+        f"SELECT {cols}, 1 - {dist} AS score FROM doc_chunk_vec"
+        " WHERE taxon_id = $taxon_id ORDER BY score DESC LIMIT $k"
+    )
+    params = {"taxon_id": taxon_id, "k": k}
+    if _DOC_VEC["hnsw"]:
+        n = cur.execute("SELECT count(*) FROM doc_chunk_vec WHERE taxon_id = $taxon_id", {"taxon_id": taxon_id}).fetchone()[0]
+        if n > VEC_EXACT_MAX:
+            # Over-fetch from the global index in proportion to how rare the taxon is, then filter
+            want = min(VEC_MAX_CANDIDATES, max(4 * k, math.ceil(2 * k * _DOC_VEC["rows"] / n)))
+            rows = cur.execute(
+                f"SELECT * FROM (SELECT taxon_id, {cols}, 1 - {dist} AS score FROM doc_chunk_vec ORDER BY {dist} LIMIT {want})"
+                " WHERE taxon_id = $taxon_id ORDER BY score DESC LIMIT $k",
+                params,
+            ).fetchall()
+            if len(rows) >= k:
+                names = [c[0] for c in cur.description]
+                return [{c: v for c, v in zip(names, r) if c != "taxon_id"} for r in rows]
+    rows = cur.execute(exact, params).fetchall()
+    names = [c[0] for c in cur.description]
+    return [dict(zip(names, r)) for r in rows]
+
+
+def _keyword_retrieve(taxon_id: int, query: str, k: int) -> List[Dict[str, Any]]:
+    """Top-k chunks of one taxon by BM25 over the doc_terms index built at ingest."""
+    terms = tokenize(query)[:MAX_QUERY_TERMS]
+    if not terms or not _DOC_BM25:
+        return []
+    cur = _cursor()
+    # one equality lookup per term, so each prunes to its (term, taxon_id) run of the sorted postings
+    postings = " UNION ALL ".join(
+        f"SELECT term, id, tf, dl FROM doc_terms WHERE term = $t{i} AND taxon_id = $taxon_id" for i in range(len(terms))
+    )
+    doc_cols = _DUCK_COLUMNS.get("doc_chunk", set())
+    cols = ", ".join(f"c.{c}" if c in doc_cols else f"NULL AS {c}" for c in ("text", "source_url", "source_id", "license"))
+    sql = f"""
+        WITH p AS ({postings}),
+        s AS (
+            SELECT p.id, sum(
+                ln(1 + ($n - f.df + 0.5) / (f.df + 0.5))
+                * p.tf * {BM25_K1 + 1} / (p.tf + {BM25_K1} * (1 - {BM25_B} + {BM25_B} * p.dl / $avgdl))
+            ) AS score
+            FROM p JOIN doc_term_df f USING (term) GROUP BY p.id ORDER BY score DESC LIMIT $k
+        )
+        SELECT s.id, {cols}, s.score FROM s JOIN doc_chunk c ON c.id = s.id AND c.taxon_id = $taxon_id
+        ORDER BY s.score DESC
+    """
+    params: Dict[str, Any] = {f"t{i}": t for i, t in enumerate(terms)}
+    params.update(taxon_id=taxon_id, k=k, n=_DOC_BM25["n"], avgdl=_DOC_BM25["avgdl"])
+    rows = cur.execute(sql, params).fetchall()
+    names = [c[0] for c in cur.description]
+    return [dict(zip(names, r)) for r in rows]
+
+
+def _write_image_assets(payload: Dict[str, Any]) -> tuple[Dict[str, Any] | None, List[str]]:
+    """Validate and upsert (on url) image rows from one payload, a list or a file, appended as Arrow."""
+    if DUCK_READ_ONLY:
+        return None, ["DuckDB is opened read-only; set DUCKDB_READ_ONLY=0 to write image_asset rows"]
+    t0 = time.perf_counter()
+    try:
+        table = load_payload(payload)
+    except Exception as e:
+        return summarize(0, [], time.perf_counter() - t0), [f"Could not read image payload: {e}"]
+    rows, results = validate(table)
+    warnings: List[str] = []
+    cur = _cursor()
+    target = _DUCK_COLUMNS.get("image_asset", set())
+    if rows.num_rows and not target:
+        warnings.append("image_asset table not found in DuckDB")
+    elif rows.num_rows:
+        cols = [c for c in IMAGE_COLUMNS if c in target and c != "taxon_id"]
+        cur.register("_image_batch", rows)
+        cur.execute("BEGIN TRANSACTION")
+        try:
+            cur.execute(
+                "CREATE OR REPLACE TEMP TABLE _image_stage AS SELECT _row, TRY_CAST(taxon_id AS BIGINT) AS taxon_id,"
+                " title, url, thumbnail_url, TRY_CAST(width AS INTEGER) AS width, TRY_CAST(height AS INTEGER) AS height,"
+                " format, license, attribution, source, TRY_CAST(captured_on AS DATE) AS captured_on FROM _image_batch"
+            )
+            unknown = [r for (r,) in cur.execute(
+                "SELECT _row FROM _image_stage s WHERE NOT EXISTS (SELECT 1 FROM taxon t WHERE t.taxon_id = s.taxon_id)"
+            ).fetchall()]
+            cur.execute("DELETE FROM _image_stage s WHERE NOT EXISTS (SELECT 1 FROM taxon t WHERE t.taxon_id = s.taxon_id)")
+            updated = cur.execute("SELECT s._row, i.id FROM _image_stage s JOIN image_asset i USING (url)").fetchall()
+            sets = ", ".join(f"{c} = s.{c}" for c in ["taxon_id"] + cols if c != "url")
+            cur.execute(f"UPDATE image_asset SET {sets} FROM _image_stage s WHERE image_asset.url = s.url")
+            new_ids = "(SELECT coalesce(max(id), 0) FROM image_asset) + row_number() OVER (ORDER BY s._row)" if "id" in target else "NULL"
+            cur.execute(f"""
+                CREATE OR REPLACE TEMP TABLE _image_new AS
+                SELECT {new_ids} AS id, s.* FROM _image_stage s WHERE NOT EXISTS (SELECT 1 FROM image_asset i WHERE i.url = s.url)
+            """)
+            inserted = cur.execute("SELECT _row, id FROM _image_new").fetchall()
+            insert_cols = (["id"] if "id" in target else []) + ["taxon_id"] + cols
+            cur.execute(f"INSERT INTO image_asset ({', '.join(insert_cols)}) SELECT {', '.join(insert_cols)} FROM _image_new")
+            cur.execute("COMMIT")
+        except Exception as e:
+            cur.execute("ROLLBACK")
+            warnings.append(f"Insert failed: {e}")
+            unknown, updated, inserted = [], [], []
+            results.extend({"row": r, "status": "error", "error": str(e)} for r in rows.column("_row").to_pylist())
+        finally:
+            cur.unregister("_image_batch")
+        results.extend({"row": r, "status": "invalid", "error": "unknown taxon_id"} for r in unknown)
+        results.extend({"row": r, "status": "updated", "id": i} for r, i in updated)
+        results.extend({"row": r, "status": "inserted", "id": i} for r, i in inserted)
+        if updated or inserted:
+            _PROFILE_CACHE.invalidate({int(t) for t in rows.column("taxon_id").to_pylist()})
+    report = summarize(table.num_rows, results, time.perf_counter() - t0)
+    if report.get("invalid") or report.get("duplicate"):
+        warnings.append(f"{report.get('invalid', 0)} invalid and {report.get('duplicate', 0)} duplicate image rows skipped")
+    return report, warnings
+
+
+def db_manager_duckdb(state: Dict[str, Any], *, embedder: Optional[Any] = None, retr_k: int = 12) -> DBManagerOutput:
     entities: List[str] = list(state.get("entities", []) or [])
     task = state.get("task")
     q = state.get("user_input", "")
 
+    if (state.get("db_ops") or "read").lower() == "write":
+        payload = state.get("write_payload") or {}
+        if (payload.get("kind") or "").lower() != "image_asset":
+            return DBManagerOutput(warnings=["Unsupported write kind; no action taken."])
+        report, write_warnings = _write_image_assets(payload)
+        return DBManagerOutput(warnings=write_warnings, write_report=report)
+
     if not entities:
         return DBManagerOutput(warnings=["No entities provided to DB (duckdb)"])
 
-    name = entities[0]
-    con = _conn()
-    try:
-        taxon = con.execute(
-            "SELECT taxon_id, scientific_name, common_names, kingdom, phylum, class, \"order\", family, genus FROM taxon WHERE lower(scientific_name)=lower(?) OR list_contains(common_names, ?) LIMIT 1",
-            [name, name],
-        ).fetchone()
-        if not taxon:
-            return DBManagerOutput(warnings=["Species not found in DuckDB"])
-        (taxon_id, sci, commons, kingdom, phylum, clazz, order, family, genus) = taxon
-        res = DBResults(
-            taxon_id=taxon_id,
-            scientific_name=sci,
-            common_names=commons or [],
-            taxonomy={"kingdom":kingdom,"phylum":phylum,"class":clazz,"order":order,"family":family,"genus":genus},
-        )
-        assess = con.execute("SELECT status, criteria, assessed_on, assessor, source, url, notes FROM assessment WHERE taxon_id=? ORDER BY assessed_on DESC NULLS LAST LIMIT 1", [taxon_id]).fetchone()
-        if assess:
-            (status, criteria, assessed_on, assessor, source, url, notes) = assess
-            res.assessment = {"status":status, "criteria":criteria, "assessed_on":assessed_on, "assessor":assessor, "source":source, "url":url, "notes":notes}
-        res.habitats = [dict(zip([c[0] for c in con.description], row)) for row in con.execute("SELECT habitat_type, importance, source FROM habitat WHERE taxon_id=? LIMIT 15", [taxon_id]).fetchall()] if con.execute("SELECT 1 FROM information_schema.tables WHERE table_name='habitat'").fetchone() else []
-        res.images = [
-            {"title":row[1],"url":row[2],"thumbnail_url":row[3],"width":row[4],"height":row[5],"format":row[6],"license":row[7],"attribution":row[8],"source":row[9],"captured_on":row[10]}
-            for row in con.execute("SELECT id, title, url, thumbnail_url, width, height, format, license, attribution, source, captured_on FROM image_asset WHERE taxon_id=? ORDER BY 1 DESC LIMIT 12", [taxon_id]).fetchall()
-        ]
-        # occurrence summary if lon/lat columns exist
-        try:
-            occ = con.execute("SELECT count(*), min(longitude), min(latitude), max(longitude), max(latitude) FROM occurrence WHERE taxon_id=?", [taxon_id]).fetchone()
-            if occ and occ[0] is not None:
-                res.occurrence_count = int(occ[0])
-                res.bbox = [float(occ[1]), float(occ[2]), float(occ[3]), float(occ[4])]
-        except Exception:
-            pass
-        # No vector search on DuckDB example; return empty RAG ctx
-        return DBManagerOutput(db_results=res, retrieval_context=[], warnings=[])
-    finally:
-        con.close()
+    warnings: List[str] = []
+    # compare needs every species; other tasks are about the first one that resolves
+    resolved = _NAME_INDEX.resolve(entities, fuzzy_misses=task == "compare")
+    if task != "compare":
+        resolved = resolved[:1]
+    for name, _, fuzzy in resolved:
+        if fuzzy:
+            warnings.append(f"No exact match for '{name}'; using closest name '{fuzzy[0]}' (similarity {fuzzy[1]:.2f})")
+    want_occ = task in {"map", "trend", "report"}
+    profiles = _cached_profiles([taxon_id for _, taxon_id, _ in resolved], want_occ) if resolved else []
+    if not profiles:
+        return DBManagerOutput(warnings=["Species not found in DuckDB"])
+
+    # retrieval grounds the primary (first) species
+    profile = profiles[0]
+    query_text = q or profile.scientific_name or ""
+    vector_search = None
+    if _DOC_VEC.get("dim"):
+        embedder = embedder or get_embedder()
+        if embedder is not None:
+            vector_search = lambda: _vector_retrieve(profile.taxon_id, embedder(query_text), retr_k)
+        elif embedder_error():  # EMBED_MODEL unset is reported once at startup, not per request
+            warnings.append(f"Vector retrieval unavailable ({embedder_error()})")
+    ctx, retr_warnings = hybrid_retrieve(vector_search, lambda: _keyword_retrieve(profile.taxon_id, query_text, retr_k), retr_k)
+    warnings.extend(retr_warnings)
+    return DBManagerOutput(db_results=profile, profiles=profiles, retrieval_context=ctx, warnings=warnings)
 
 
 def db_manager_duckdb_node(state: Dict[str, Any]) -> Dict[str, Any]:
     out = db_manager_duckdb(state)
-    patch = {"db_results": out.db_results.dict(), "retrieval_context": out.retrieval_context}
+    patch = {
+        "db_results": out.db_results.dict(),
+        "db_profiles": [p.dict() for p in out.profiles],
+        "retrieval_context": out.retrieval_context,
+    }
+    if out.write_report is not None:
+        patch["db_write_report"] = out.write_report
     if out.warnings:
         patch["warnings"] = (state.get("warnings") or []) + out.warnings
     return patch
\ No newline at end of file
@@ -1,11 +1,18 @@
+import hashlib
+import json
 from typing import List, Literal, Annotated, Optional, Any, Dict
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser, PydanticOutputParser
 from pydantic import BaseModel, Field, ValidationError
-from src.llm.llm_config import get_llm
+from src.llm.llm_config import get_constrained_llm, get_llm, llm_identity
+from src.llm.embeddings import EMBED_MODEL, get_embedder
+from src.agents.interpreter_rules import fast_interpret, mentioned_taxa, record_path
+from src.tools.interpretation_cache import InterpretationCache, get_interpretation_cache
 
-TASK_HINT = "One of: lookup, compare, map, trend, image_gallery, report, write, other"
-TOOLS_HINT = "Choose from: DBManager, WebResearcher, Reporter"
+TASKS = ["lookup", "compare", "map", "trend", "image_gallery", "report", "write", "other"]
+TOOLS = ["DBManager", "WebResearcher", "Reporter"]
+TASK_HINT = "One of: " + ", ".join(TASKS)
+TOOLS_HINT = "Choose from: " + ", ".join(TOOLS)
 
 class InterpreterOutputMessages(BaseModel):
     """Normalized output for the Interpreter node.
@@ -35,6 +42,23 @@ INTERPRETER_PROMPT = ChatPromptTemplate.from_messages(
 
 parser = PydanticOutputParser(pydantic_object=InterpreterOutputMessages)
 
+# Decoding spec for providers that support constrained JSON (see src.llm.constrained): user_input is
+# filled in by us, task/tools are enums and every free-text field has a token budget
+OUTPUT_SPEC = {
+    "intent": {"type": "string", "max_tokens": 16},
+    "entities": {"type": "array", "items": {"type": "string", "max_tokens": 12}, "max_items": 4},
+    "task": {"enum": TASKS},
+    "required_tools": {"type": "array", "items": {"enum": TOOLS}, "max_items": 3},
+    "query_plan": {"type": "array", "items": {"type": "string", "max_tokens": 20}, "max_items": 5},
+}
+
+def _interp_cache() -> InterpretationCache:
+    """Cache of LLM parses; its fingerprint changes with the prompt, the schema, the LLM or the embedder."""
+    fingerprint = hashlib.sha1(
+        "\n".join([SYSTEM_PROMPT, parser.get_format_instructions(), json.dumps(OUTPUT_SPEC), llm_identity(), EMBED_MODEL]).encode("utf-8")
+    ).hexdigest()
+    return get_interpretation_cache(fingerprint, get_embedder())
+
 def _extract_user_input(state: Any) -> str:
     if isinstance(state,dict):
         for k in ("user_input", "input", "query", "question", "text"):
@@ -57,14 +81,33 @@ def interpret(state: Any) -> InterpreterOutputMessages:
     user_input=_extract_user_input(state)
     if not user_input:
         raise ValueError("interpret() requires 'user_input' in the state.")
-    
-    llm=get_llm()
-    chain= (INTERPRETER_PROMPT.partial(format_instructions=parser.get_format_instructions())|llm|parser)
+
+    # Plain single-species questions are resolved by rules; only ambiguous input reaches the LLM
+    fast=fast_interpret(user_input)
+    if fast is not None:
+        return InterpreterOutputMessages(user_input=user_input, **fast)
+
+    # Reworded repeats of earlier questions reuse their parse
+    cache=_interp_cache()
+    taxa=mentioned_taxa(user_input)
+    cached, query_vec=cache.get(user_input, taxa)
+    if cached is not None:
+        record_path("cache")
+        return InterpreterOutputMessages(user_input=user_input, **cached)
+    record_path("llm")
+
+    prompt=INTERPRETER_PROMPT.partial(format_instructions=parser.get_format_instructions())
+    constrained=get_constrained_llm(OUTPUT_SPEC)
     
     try:
-        result: InterpreterOutputMessages= chain.invoke({"user_input": user_input})
+        if constrained is not None:
+            fields=json.loads((prompt|constrained|StrOutputParser()).invoke({"user_input": user_input}))
+            result=InterpreterOutputMessages(user_input=user_input, **fields)
+        else:
+            result: InterpreterOutputMessages= (prompt|get_llm()|parser).invoke({"user_input": user_input})
+        cache.put(user_input, taxa, result.dict(exclude={"user_input"}), query_vec)
 
-    except ValidationError as e:
+    except (ValidationError, ValueError) as e:
         result=InterpreterOutputMessages(
             user_input=user_input,
             intent="lookup",
@@ -76,8 +119,6 @@ def interpret(state: Any) -> InterpreterOutputMessages:
                         "return a concise summary with citations"
                         ]
         )
-    except ValidationError as e:
-        raise RuntimeError(f"Interpretation failed: {type(e).__name__ : }: {e}")
     return result
 
 # def interpret_node(state: Dict[str, Any])-> Dict[str, Any]:
@@ -0,0 +1,140 @@
+"""Deterministic Interpreter fast path: taxon names from the name index plus keyword lexicons.
+
+Handles the common single-intent questions ("status of Panthera leo", "photos of snow leopard",
+"compare lion vs tiger"); anything it can't explain with confidence is left to the LLM.
+"""
+from __future__ import annotations
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from src.agents.query_router import _DEF_IMAGE_WORDS, _DEF_LATEST_WORDS
+from src.data.name_index import normalize_name
+
+INTERPRETER_FAST_PATH = os.getenv("INTERPRETER_FAST_PATH", "1") == "1"
+
+_TASK_WORDS = {
+    "compare": {"compare", "comparison", "versus", "vs", "difference", "differences", "between"},
+    "map": {"map", "where", "distribution", "range", "occurrence", "occurrences", "habitat", "located", "found"},
+    "trend": {"trend", "trends", "population", "decline", "declining", "increasing", "decreasing", "history"},
+    "report": {"report", "summary", "summarize", "overview", "profile"},
+}
+_LOOKUP_WORDS = {
+    "status", "threat", "threats", "threatened", "endangered", "conservation", "iucn", "redlist", "info",
+    "information", "facts", "details",
+}
+_WRITE_WORDS = {"upload", "add", "insert", "write", "delete", "remove"}
+_FILLER_WORDS = {
+    "a", "an", "the", "of", "for", "on", "in", "to", "and", "with", "me", "show", "give", "get", "find", "see",
+    "list", "please", "can", "could", "you", "i", "want", "would", "like", "tell", "about", "what", "is", "are",
+    "its", "their", "some", "any", "how", "current", "species", "animal", "plant", "s",
+}
+
+_PLANS = {
+    "lookup": ["resolve the species in the database", "fetch its profile and conservation status", "summarize with citations"],
+    "image_gallery": ["resolve the species in the database", "collect licensed images from the database and the web", "present a gallery with attribution"],
+    "compare": ["resolve each species in the database", "fetch their profiles", "compare status, range and threats side by side"],
+    "map": ["resolve the species in the database", "fetch its occurrence summary", "show the distribution"],
+    "trend": ["resolve the species in the database", "fetch occurrences per year", "describe the trend"],
+    "report": ["resolve the species in the database", "fetch profile, occurrences and documents", "write a short report with citations"],
+}
+
+# Interpreter requests by how they were answered: rules, interpretation cache or LLM call
+_STATS = {"fast": 0, "cache": 0, "llm": 0}
+_STATS_LOCK = threading.Lock()
+
+
+def record_path(path: str) -> None:
+    """Count one Interpreter request answered by `path` ("fast", "cache" or "llm")."""
+    with _STATS_LOCK:
+        _STATS[path] += 1
+
+
+def fast_path_stats() -> Dict[str, Any]:
+    """How much Interpreter traffic was answered without calling the LLM."""
+    with _STATS_LOCK:
+        total = sum(_STATS.values())
+        return {
+            **_STATS,
+            "fast_fraction": _STATS["fast"] / total if total else 0.0,
+            "cache_fraction": _STATS["cache"] / total if total else 0.0,
+        }
+
+
+def _name_index():
+    from src.agents import db_duckdb_agent  # the graph's backend
+    if not os.path.exists(db_duckdb_agent.DUCK_PATH):
+        return None  # nothing ingested yet; opening the backend would create an empty database file
+    return db_duckdb_agent.taxon_name_index()
+
+
+def mentioned_taxa(user_input: str) -> Optional[List[int]]:
+    """Sorted taxon ids named in the input, or None when the name index is unavailable."""
+    try:
+        index = _name_index()
+        return sorted({tid for _, _, tid in index.find_in_text(user_input)}) if index is not None else None
+    except Exception:
+        return None
+
+
+def _interpret_rules(user_input: str) -> Optional[Dict[str, Any]]:
+    words = normalize_name(user_input).split()
+    if not words or _WRITE_WORDS & set(words):
+        return None
+    try:
+        index = _name_index()
+        if index is None:
+            return None
+        spans = index.find_in_text(user_input)
+    except Exception:  # no database yet: the LLM still works
+        return None
+    lexicon = _LOOKUP_WORDS | _FILLER_WORDS | _DEF_IMAGE_WORDS | _DEF_LATEST_WORDS
+    # a single lexicon word that happens to be a common name ("range", "status") is not a species
+    task_words = set().union(*_TASK_WORDS.values())
+    spans = [(a, b, tid) for a, b, tid in spans if b - a > 1 or words[a] not in lexicon | task_words]
+    if not spans:
+        return None
+
+    in_names = {i for a, b, _ in spans for i in range(a, b)}
+    tasks = set()
+    for i, w in enumerate(words):
+        if i in in_names:
+            continue
+        hit = [t for t, vocab in _TASK_WORDS.items() if w in vocab]
+        if not hit and w not in lexicon:
+            return None  # every word must be explained: "status of lion in Kenya" would lose the place
+        tasks.update(hit)
+
+    taxa = list(dict.fromkeys(tid for _, _, tid in spans))
+    if len(tasks) > 1:
+        return None
+    task = tasks.pop() if tasks else None
+    wants_images = bool(_DEF_IMAGE_WORDS & set(words))
+    if task == "compare":
+        if len(taxa) < 2:
+            return None
+    elif len(taxa) > 1:
+        return None  # several species without "compare": let the LLM decide what is meant
+    if task is None:
+        task = "image_gallery" if wants_images else "lookup"
+
+    entities = [index.scientific_name(tid) or " ".join(words[a:b]) for a, b, tid in spans if tid in taxa]
+    entities = list(dict.fromkeys(entities))
+    tools = ["DBManager"]
+    if wants_images or _DEF_LATEST_WORDS & set(words):
+        tools.append("WebResearcher")
+    return {
+        "intent": f"{task.replace('_', ' ')} for {', '.join(entities)}",
+        "entities": entities,
+        "task": task,
+        "required_tools": tools,
+        "query_plan": _PLANS[task],
+    }
+
+
+def fast_interpret(user_input: str) -> Optional[Dict[str, Any]]:
+    """InterpreterOutputMessages fields for `user_input`, or None when the LLM should interpret it."""
+    out = _interpret_rules(user_input) if INTERPRETER_FAST_PATH else None
+    if out is not None:
+        record_path("fast")
+    return out
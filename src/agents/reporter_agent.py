@@ -10,7 +10,23 @@ def _status_chip(assessment: Dict[str, Any] | None) -> str:
     return f"{s} ({date})" if date else s
 
 
-def _markdown_report(db: Dict[str, Any], findings: List[Dict[str, Any]], images: List[Dict[str, Any]]) -> str:
+def _comparison_table(profiles: List[Dict[str, Any]]) -> List[str]:
+    lines = [
+        "\n## Comparison",
+        "| Species | Status | Family | Habitats | Occurrences |",
+        "|---|---|---|---|---|",
+    ]
+    for p in profiles:
+        habitats = ", ".join(h.get("habitat_type") or "" for h in (p.get("habitats") or [])[:3])
+        occ = p.get("occurrence_count")
+        lines.append(
+            f"| {p.get('scientific_name') or '?'} | {_status_chip(p.get('assessment'))} | "
+            f"{(p.get('taxonomy') or {}).get('family') or '—'} | {habitats or '—'} | {occ if occ is not None else '—'} |"
+        )
+    return lines
+
+
+def _markdown_report(db: Dict[str, Any], findings: List[Dict[str, Any]], images: List[Dict[str, Any]], profiles: List[Dict[str, Any]] | None = None) -> str:
     sci = db.get("scientific_name") or "Unknown species"
     common = ", ".join(db.get("common_names") or [])
     tax = db.get("taxonomy") or {}
@@ -30,8 +46,10 @@ def _markdown_report(db: Dict[str, Any], findings: List[Dict[str, Any]], images:
             f"Family: {tax.get('family', '—')}",
             f"Genus: {tax.get('genus', '—')}",
         ]),
-        "\n## Images",
     ]
+    if profiles and len(profiles) > 1:
+        lines.extend(_comparison_table(profiles))
+    lines.append("\n## Images")
     for i, im in enumerate(images[:12], 1):
         lines.append(f"{i}. [{im.get('title','Image')}]({im.get('url')}) — {im.get('license','?')} · {im.get('attribution','')}")
 
@@ -47,6 +65,7 @@ def reporter_node(state: Dict[str, Any]) -> Dict[str, Any]:
     dbres = (state.get("db_results") or {})
     findings = state.get("web_findings") or []
     images = state.get("image_candidates") or []
+    profiles = state.get("db_profiles") or []
 
     ui = {
         "species": dbres.get("scientific_name"),
@@ -55,5 +74,7 @@ def reporter_node(state: Dict[str, Any]) -> Dict[str, Any]:
         "image_count": len(images),
         "source_count": len(findings),
     }
-    md = _markdown_report(dbres, findings, images)
+    if len(profiles) > 1:
+        ui["compared"] = [p.get("scientific_name") for p in profiles]
+    md = _markdown_report(dbres, findings, images, profiles)
     return {"ui_model": ui, "markdown_report": md}
\ No newline at end of file
@@ -1,58 +1,105 @@
 from __future__ import annotations
 import asyncio
-from typing import Any, Dict, List
-import httpx
+import os
+from typing import Any, AsyncIterator, Dict, Iterator, List
+from src.data.name_index import normalize_name
+from src.tools import aio, http_client
+from src.tools.image_dedup import collapse_near_duplicates
 
 WIKI_SUMMARY = "https://en.wikipedia.org/api/rest_v1/page/summary/{title}"
 GBIF_MEDIA = "https://api.gbif.org/v1/occurrence/search"
 
 SAFE_LICENSES = {"CC0", "CC-BY", "CC-BY-SA"}
+# Occurrence search paging: stop once GBIF_IMAGE_TARGET usable images are found
+GBIF_IMAGE_TARGET = int(os.getenv("GBIF_IMAGE_TARGET", "12"))
+GBIF_PAGE_SIZE = int(os.getenv("GBIF_PAGE_SIZE", "50"))  # API max is 300
+GBIF_MAX_PAGES = int(os.getenv("GBIF_MAX_PAGES", "10"))
+# Server-side record license filter (GBIF enum values); empty disables it
+GBIF_RECORD_LICENSES = [v for v in os.getenv("GBIF_RECORD_LICENSES", "CC0_1_0,CC_BY_4_0").split(",") if v]
 
-async def _fetch_json(client: httpx.AsyncClient, url: str, params: Dict[str, Any] | None = None):
-    r = await client.get(url, params=params, timeout=20)
-    r.raise_for_status()
-    return r.json()
+async def _fetch_json(url: str, params: Dict[str, Any] | None = None):
+    return await http_client.get_json(url, params=params, timeout=20)
 
-async def _wiki_summary(client: httpx.AsyncClient, title: str) -> Dict[str, Any] | None:
+async def _wiki_summary(title: str) -> Dict[str, Any] | None:
     try:
-        return await _fetch_json(client, WIKI_SUMMARY.format(title=title.replace(" ", "%20")))
+        return await _fetch_json(WIKI_SUMMARY.format(title=title.replace(" ", "%20")))
     except Exception:
         return None
 
-async def _gbif_images(client: httpx.AsyncClient, scientific_name: str, limit: int = 12) -> List[Dict[str, Any]]:
-    params = {
+def _license_tag(raw: str | None) -> str:
+    lic = (raw or "").upper()
+    if "-NC" in lic or "-ND" in lic:
+        return lic  # non-commercial / no-derivatives variants are never safe
+    # GBIF media usually carry the license URL (creativecommons.org/licenses/by/4.0/)
+    if "CC0" in lic or "PUBLICDOMAIN/ZERO" in lic:
+        return "CC0"
+    if "CC-BY-SA" in lic or "LICENSES/BY-SA/" in lic:
+        return "CC-BY-SA"
+    if "CC-BY" in lic or "LICENSES/BY/" in lic:
+        return "CC-BY"
+    return lic
+
+def _safe_media(rec: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    for m in rec.get("media", []) or []:
+        lic_tag = _license_tag(m.get("license"))
+        if lic_tag in SAFE_LICENSES and m.get("identifier"):
+            yield {
+                "url": m.get("identifier"),
+                "title": m.get("title") or rec.get("species"),
+                "license": lic_tag,
+                "attribution": rec.get("recordedBy") or rec.get("datasetName") or "GBIF contributor",
+                "source": "GBIF",
+                "width": m.get("width"),
+                "height": m.get("height"),
+            }
+
+async def gbif_image_stream(scientific_name: str, want: int = GBIF_IMAGE_TARGET) -> AsyncIterator[Dict[str, Any]]:
+    """Safe-license GBIF images, following `offset` pages only until `want` distinct ones are found.
+
+    Records are pre-filtered server-side by record license (GBIF_RECORD_LICENSES); media licenses
+    can differ from the record's, so each image is still checked. A failed page ends the stream.
+    """
+    params: Dict[str, Any] = {
         "scientificName": scientific_name,
         "mediaType": "StillImage",
-        "limit": limit,
+        "limit": GBIF_PAGE_SIZE,
     }
-    try:
-        data = await _fetch_json(client, GBIF_MEDIA, params)
-    except Exception:
-        return []
-    out: List[Dict[str, Any]] = []
-    for rec in data.get("results", []):
-        for m in rec.get("media", []) or []:
-            lic = (m.get("license") or "").upper()
-            # normalize
-            if "CC0" in lic:
-                lic_tag = "CC0"
-            elif "CC-BY-SA" in lic:
-                lic_tag = "CC-BY-SA"
-            elif "CC-BY" in lic:
-                lic_tag = "CC-BY"
-            else:
-                lic_tag = lic
-            if lic_tag in SAFE_LICENSES:
-                out.append({
-                    "url": m.get("identifier"),
-                    "title": m.get("title") or rec.get("species"),
-                    "license": lic_tag,
-                    "attribution": rec.get("recordedBy") or rec.get("datasetName") or "GBIF contributor",
-                    "source": "GBIF",
-                    "width": m.get("width"),
-                    "height": m.get("height"),
-                })
-    return out
+    if GBIF_RECORD_LICENSES:
+        params["license"] = GBIF_RECORD_LICENSES
+    seen: set = set()
+    for page in range(GBIF_MAX_PAGES):
+        try:
+            data = await _fetch_json(GBIF_MEDIA, {**params, "offset": page * GBIF_PAGE_SIZE})
+        except Exception:
+            return
+        records = data.get("results") or []
+        for rec in records:
+            for img in _safe_media(rec):
+                if img["url"] in seen:
+                    continue
+                seen.add(img["url"])
+                yield img
+                if len(seen) >= want:
+                    return
+        if data.get("endOfRecords", True) or not records:
+            return
+
+async def _gbif_images(scientific_name: str, into: List[Dict[str, Any]], want: int = GBIF_IMAGE_TARGET) -> None:
+    """Drain gbif_image_stream into `into` as images arrive (so a partial harvest survives a failure)."""
+    async for img in gbif_image_stream(scientific_name, want):
+        into.append(img)
+
+def _taxon_key(state: Dict[str, Any], name: str) -> str:
+    """Key for the image hash store: the resolved taxon_id, so "lion" and "Panthera leo" share clusters."""
+    tid = (state.get("db_results") or {}).get("taxon_id")
+    if tid is None:
+        try:
+            from src.agents import db_duckdb_agent  # the graph's backend
+            if os.path.exists(db_duckdb_agent.DUCK_PATH):
+                tid = db_duckdb_agent.taxon_name_index().lookup(name)
+        except Exception:
+            pass  # no name index: fall back to the name itself
+    return str(tid) if tid is not None else normalize_name(name)
 
 async def web_research_async(state: Dict[str, Any]) -> Dict[str, Any]:
     entities = state.get("entities") or []
@@ -62,34 +109,32 @@ async def web_research_async(state: Dict[str, Any]) -> Dict[str, Any]:
     findings: List[Dict[str, Any]] = []
     images: List[Dict[str, Any]] = []
 
-    async with httpx.AsyncClient(headers={"User-Agent": "under-threat-bot/0.1"}) as client:
-        wiki = await _wiki_summary(client, sci or user_query)
-        if wiki:
-            summary = wiki.get("extract")
-            url = wiki.get("content_urls", {}).get("desktop", {}).get("page")
-            if summary and url:
-                findings.append({"text": summary, "url": url, "source": "Wikipedia", "license": "CC-BY-SA"})
-            img = wiki.get("originalimage") or wiki.get("thumbnail")
-            if img:
-                images.append({
-                    "url": img.get("source"),
-                    "title": wiki.get("title"),
-                    "license": "CC-BY-SA",
-                    "attribution": "Wikipedia/Wikimedia Commons",
-                    "source": "Wikipedia",
-                    "width": img.get("width"),
-                    "height": img.get("height"),
-                })
-        if sci:
-            gbif_imgs = await _gbif_images(client, sci)
-            images.extend(gbif_imgs)
-
-    # De-dup by URL
-    seen = set(); unique_imgs = []
-    for im in images:
-        u = im.get("url")
-        if u and u not in seen:
-            seen.add(u); unique_imgs.append(im)
+    # Wikipedia and GBIF are independent: fetch them together on the shared client;
+    # GBIF images land in the candidates as each page yields them
+    wiki, _ = await asyncio.gather(
+        _wiki_summary(sci or user_query),
+        _gbif_images(sci, images) if sci else asyncio.sleep(0),
+    )
+    if wiki:
+        summary = wiki.get("extract")
+        url = wiki.get("content_urls", {}).get("desktop", {}).get("page")
+        if summary and url:
+            findings.append({"text": summary, "url": url, "source": "Wikipedia", "license": "CC-BY-SA"})
+        img = wiki.get("originalimage") or wiki.get("thumbnail")
+        if img:
+            images.insert(0, {
+                "url": img.get("source"),
+                "thumbnail_url": (wiki.get("thumbnail") or {}).get("source"),
+                "title": wiki.get("title"),
+                "license": "CC-BY-SA",
+                "attribution": "Wikipedia/Wikimedia Commons",
+                "source": "Wikipedia",
+                "width": img.get("width"),
+                "height": img.get("height"),
+            })
+
+    # De-dup by URL, then collapse the same photo served at other URLs/resolutions
+    unique_imgs = await collapse_near_duplicates(_taxon_key(state, sci or user_query), images)
 
     return {
         "web_findings": findings,
@@ -100,7 +145,7 @@ async def web_research_async(state: Dict[str, Any]) -> Dict[str, Any]:
 
 def web_researcher_node(state: Dict[str, Any]) -> Dict[str, Any]:
     try:
-        return asyncio.run(web_research_async(state))
+        return aio.run(web_research_async(state))
     except Exception as e:
         errs = list(state.get("errors", []) or [])
         errs.append(f"WebResearcher error: {type(e).__name__}: {e}")
@@ -2,6 +2,7 @@ from __future__ import annotations
 import os
 import gradio as gr
 from src.graph.build_graph import build_graph, bootstrap
+from src.llm.embeddings import EMBED_MODEL
 
 # Optional: build DuckDB from HF Datasets if requested
 if os.getenv("BUILD_DUCK_FROM_HF", "0") == "1":
@@ -12,6 +13,28 @@ if os.getenv("BUILD_DUCK_FROM_HF", "0") == "1":
     except Exception as e:
         print("DuckDB build skipped:", e)
 
+# Build the taxon name index now, not inside the first request that resolves a species
+try:
+    from src.agents.db_duckdb_agent import DUCK_PATH, taxon_name_index
+    if os.path.exists(DUCK_PATH):
+        index = taxon_name_index()
+        index.refresh(force=True)
+        print("Name index ready:", len(index), "names")
+except Exception as e:
+    print("Name index build skipped:", e)
+
+# Vector retrieval needs EMBED_MODEL; say so once here instead of in every response
+if not EMBED_MODEL:
+    print("Vector retrieval disabled (EMBED_MODEL not set); using keyword retrieval only")
+
+# Load the LLM before the first chat turn instead of during it
+if os.getenv("LLM_WARMUP", "1") == "1":
+    try:
+        from src.llm.llm_config import warmup_llm
+        print("LLM ready:", warmup_llm())
+    except Exception as e:
+        print("LLM warmup skipped:", e)
+
 app_graph = build_graph()
 state0 = bootstrap()
 
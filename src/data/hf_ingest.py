@@ -1,41 +1,494 @@
 """Utilities for using heavy datasets hosted on Hugging Face Datasets."""
 from __future__ import annotations
+import hashlib
 import os
-from typing import Dict, Any
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 from datasets import load_dataset
 import duckdb
+import pyarrow as pa
+from src.data.keyword_index import terms_sql
+from src.tools.profile_cache import get_profile_cache
 
 # Expected dataset contains parquet splits or tables named: taxon, assessment, habitat, image_asset, doc_chunk, occurrence
 
 HF_DATASET = os.getenv("HF_DATASET_REPO")  # e.g., "username/under-threat-species"
 DUCK_PATH = os.getenv("DUCKDB_PATH", "data/db.duckdb")
 
+# auto: Parquet shards when the Hub has them, else streamed Arrow batches
+INGEST_MODE = os.getenv("HF_INGEST_MODE", "auto").lower()  # auto | parquet | stream
+BATCH_ROWS = int(os.getenv("HF_INGEST_BATCH_ROWS", "50000"))
+WORKERS = int(os.getenv("HF_INGEST_WORKERS", "4"))
+# Zoom level of the web-mercator (z/x/y) tiles in occurrence_summary's histogram
+OCC_TILE_ZOOM = int(os.getenv("OCC_TILE_ZOOM", "4"))
+
 SCHEMA_TABLES = ["taxon", "assessment", "habitat", "image_asset", "doc_chunk", "occurrence"]
 
+# One row per table. Tables are loaded into `<table>__staging` and renamed over the
+# live table only once complete; `shard`/`row_offset` say where a crashed load resumes.
+_CHECKPOINT_DDL = """
+CREATE TABLE IF NOT EXISTS _ingest_checkpoint (
+    table_name VARCHAR PRIMARY KEY,
+    revision VARCHAR,
+    shard INTEGER,
+    row_offset BIGINT,
+    row_count BIGINT,
+    done BOOLEAN,
+    updated_at TIMESTAMP
+)
+"""
+
+# What the live tables were built from: dataset revision, a fingerprint of the split and
+# the per-shard fingerprints (Hub blob ids) already applied. The '*' row holds the revision
+# of the last run in which every table was brought up to date.
+_META_DDL = """
+CREATE TABLE IF NOT EXISTS _ingest_meta (
+    table_name VARCHAR PRIMARY KEY,
+    revision VARCHAR,
+    fingerprint VARCHAR,
+    shards VARCHAR[],
+    row_count BIGINT,
+    updated_at TIMESTAMP
+)
+"""
+
+
+# Per-taxon occurrence rollup so map/trend answers are a primary-key lookup instead of a scan
+_OCC_SUMMARY_DDL = """
+CREATE OR REPLACE TABLE occurrence_summary (
+    taxon_id BIGINT PRIMARY KEY,
+    n BIGINT,
+    minlon DOUBLE, minlat DOUBLE, maxlon DOUBLE, maxlat DOUBLE,
+    years STRUCT("year" INTEGER, n BIGINT)[],
+    tiles STRUCT(tile VARCHAR, n BIGINT)[]
+)
+"""
+
+# occurrence columns that can supply the year, in order of preference
+_YEAR_COLUMNS = ["year", "event_date", "eventDate", "observed_on"]
+
+# BM25 inverted index over doc_chunk.text: postings sorted by (term, taxon_id), document
+# frequencies and corpus size / total length for the length normalization
+_DOC_TERM_DF_DDL = "CREATE OR REPLACE TABLE doc_term_df (term VARCHAR PRIMARY KEY, df BIGINT)"
+_DOC_TERM_STATS_DDL = "CREATE OR REPLACE TABLE doc_term_stats (n_docs BIGINT, total_len BIGINT)"
+
+# doc_chunk columns copied into doc_chunk_vec, so a vector hit needs no join back to doc_chunk
+_DOC_COLUMNS = ["text", "source_url", "source_id", "license"]
+
+# Set once per build: whether the vss extension (HNSW indexes) could be loaded
+_VSS_LOADED = False
+
+
+def _sql_str(s: str) -> str:
+    return "'" + s.replace("'", "''") + "'"
+
+
+def _dataset_revision() -> str:
+    """Commit SHA of the dataset repo ('' if the Hub can't be asked)."""
+    try:
+        from huggingface_hub import HfApi
+        return HfApi().dataset_info(HF_DATASET).sha or ""
+    except Exception:
+        return ""
+
+
+def _parquet_shards() -> Dict[str, List[Tuple[str, str]]]:
+    """Map table -> [(hf:// URL, fingerprint)] of its train-split Parquet shards (from the Hub's parquet branch)."""
+    from huggingface_hub import HfApi
+    files = HfApi().list_repo_tree(HF_DATASET, repo_type="dataset", revision="refs/convert/parquet", recursive=True)
+    shards: Dict[str, List[Tuple[str, str]]] = {}
+    for f in sorted(files, key=lambda f: f.path):
+        table, _, rest = f.path.partition("/")
+        if table in SCHEMA_TABLES and f.path.endswith(".parquet") and "train" in rest:
+            # blob id changes whenever the shard's content does
+            fp = f"{f.path}@{getattr(f, 'blob_id', '')}"
+            shards.setdefault(table, []).append((f"hf://datasets/{HF_DATASET}@~parquet/{f.path}", fp))
+    return shards
+
+
+def _fingerprint(parts: List[str]) -> str:
+    return hashlib.sha1("\n".join(parts).encode()).hexdigest()
+
+
+def _read_checkpoint(cur: duckdb.DuckDBPyConnection, table: str) -> Optional[Dict[str, Any]]:
+    row = cur.execute(
+        "SELECT revision, shard, row_offset, row_count, done FROM _ingest_checkpoint WHERE table_name=?", [table]
+    ).fetchone()
+    if not row:
+        return None
+    return dict(zip(["revision", "shard", "row_offset", "row_count", "done"], row))
+
+
+def _write_checkpoint(cur: duckdb.DuckDBPyConnection, table: str, revision: str, shard: int, row_offset: int, row_count: int, done: bool = False) -> None:
+    cur.execute(
+        "INSERT OR REPLACE INTO _ingest_checkpoint VALUES (?, ?, ?, ?, ?, ?, now())",
+        [table, revision, shard, row_offset, row_count, done],
+    )
+
+
+def _read_meta(cur: duckdb.DuckDBPyConnection, table: str) -> Optional[Dict[str, Any]]:
+    row = cur.execute(
+        "SELECT revision, fingerprint, shards, row_count FROM _ingest_meta WHERE table_name=?", [table]
+    ).fetchone()
+    if not row:
+        return None
+    return dict(zip(["revision", "fingerprint", "shards", "row_count"], row))
+
+
+def _write_meta(cur: duckdb.DuckDBPyConnection, table: str, revision: str, fingerprint: str, shards: List[str], row_count: int) -> None:
+    cur.execute(
+        "INSERT OR REPLACE INTO _ingest_meta VALUES (?, ?, ?, ?, ?, now())",
+        [table, revision, fingerprint, shards, row_count],
+    )
+
+
+def _table_exists(cur: duckdb.DuckDBPyConnection, table: str) -> bool:
+    return cur.execute("SELECT 1 FROM information_schema.tables WHERE table_name=?", [table]).fetchone() is not None
+
+
+def _occurrence_summary_select(cur: duckdb.DuckDBPyConnection, src: str) -> Optional[str]:
+    """SELECT producing occurrence_summary rows from the occurrence rows in `src` (None without lon/lat)."""
+    cols = {r[0] for r in cur.execute("SELECT column_name FROM information_schema.columns WHERE table_name='occurrence'").fetchall()}
+    if not {"taxon_id", "longitude", "latitude"} <= cols:
+        return None
+    year_col = next((c for c in _YEAR_COLUMNS if c in cols), None)
+    year = "NULL::INTEGER"
+    if year_col:
+        year = f'TRY_CAST("{year_col}" AS INTEGER)' if year_col == "year" else f'year(TRY_CAST("{year_col}" AS DATE))'
+    scale = 2 ** OCC_TILE_ZOOM
+    lat = "greatest(least(latitude, 85.0511), -85.0511)"
+    tile = (
+        f"'{OCC_TILE_ZOOM}/' || least(floor((longitude + 180) / 360 * {scale}), {scale - 1})::INTEGER"
+        f" || '/' || least(floor((1 - ln(tan(radians({lat})) + 1 / cos(radians({lat}))) / pi()) / 2 * {scale}), {scale - 1})::INTEGER"
+    )
+    return f"""
+    WITH src AS (SELECT taxon_id, longitude, latitude, {year} AS yr FROM {src}),
+    s AS (
+        SELECT taxon_id, count(*) AS n, min(longitude) AS minlon, min(latitude) AS minlat,
+            max(longitude) AS maxlon, max(latitude) AS maxlat
+        FROM src GROUP BY taxon_id
+    ),
+    y AS (
+        SELECT taxon_id, list(struct_pack("year" := yr, n := c) ORDER BY yr) AS years
+        FROM (SELECT taxon_id, yr, count(*) AS c FROM src WHERE yr IS NOT NULL GROUP BY ALL) GROUP BY taxon_id
+    ),
+    t AS (
+        SELECT taxon_id, list(struct_pack(tile := tile, n := c) ORDER BY c DESC) AS tiles
+        FROM (
+            SELECT taxon_id, {tile} AS tile, count(*) AS c FROM src
+            WHERE longitude IS NOT NULL AND latitude IS NOT NULL GROUP BY ALL
+        ) GROUP BY taxon_id
+    )
+    SELECT * FROM s LEFT JOIN y USING (taxon_id) LEFT JOIN t USING (taxon_id)
+    """
+
+
+def _refresh_occurrence_summary(cur: duckdb.DuckDBPyConnection, src: Optional[str] = None) -> None:
+    """Rebuild occurrence_summary from the live table, or fold the new rows in `src` into it.
+
+    Runs inside the caller's transaction so the summary never drifts from `occurrence`.
+    """
+    has_summary = _table_exists(cur, "occurrence_summary")
+    select = _occurrence_summary_select(cur, src if src and has_summary else "occurrence")
+    if select is None:
+        return
+    if not (src and has_summary):
+        cur.execute(_OCC_SUMMARY_DDL)
+        cur.execute(f"INSERT INTO occurrence_summary BY NAME {select}")
+        return
+    # Incremental: merge the delta's counts/bbox/histograms into the affected taxa only
+    cur.execute(f"CREATE OR REPLACE TEMP TABLE _occ_delta AS {select}")
+    cur.execute("""
+        INSERT OR REPLACE INTO occurrence_summary BY NAME
+        WITH b AS (
+            SELECT * FROM occurrence_summary WHERE taxon_id IN (SELECT taxon_id FROM _occ_delta)
+            UNION ALL BY NAME SELECT * FROM _occ_delta
+        ),
+        s AS (
+            SELECT taxon_id, sum(n)::BIGINT AS n, min(minlon) AS minlon, min(minlat) AS minlat,
+                max(maxlon) AS maxlon, max(maxlat) AS maxlat
+            FROM b GROUP BY taxon_id
+        ),
+        y AS (
+            SELECT taxon_id, list(struct_pack("year" := "year", n := c) ORDER BY "year") AS years
+            FROM (
+                SELECT taxon_id, u."year" AS "year", sum(u.n)::BIGINT AS c
+                FROM (SELECT taxon_id, unnest(years) AS u FROM b) GROUP BY ALL
+            ) GROUP BY taxon_id
+        ),
+        t AS (
+            SELECT taxon_id, list(struct_pack(tile := tile, n := c) ORDER BY c DESC) AS tiles
+            FROM (
+                SELECT taxon_id, u.tile AS tile, sum(u.n)::BIGINT AS c
+                FROM (SELECT taxon_id, unnest(tiles) AS u FROM b) GROUP BY ALL
+            ) GROUP BY taxon_id
+        )
+        SELECT * FROM s LEFT JOIN y USING (taxon_id) LEFT JOIN t USING (taxon_id)
+    """)
+    cur.execute("DROP TABLE _occ_delta")
+
+
+def _load_vss(con: duckdb.DuckDBPyConnection) -> bool:
+    """Load the vss extension for HNSW indexes; without it vector search scans per taxon."""
+    try:
+        con.execute("INSTALL vss")
+        con.execute("LOAD vss")
+        con.execute("SET hnsw_enable_experimental_persistence = true")
+        return True
+    except duckdb.Error as e:
+        print(f"[hf_ingest] vss extension unavailable, skipping HNSW index ({e})")
+        return False
+
+
+def _refresh_doc_vectors(cur: duckdb.DuckDBPyConnection, src: Optional[str] = None) -> None:
+    """Rebuild doc_chunk_vec from the live table, or append the new rows in `src` to it.
+
+    doc_chunk_vec holds fixed-size FLOAT[dim] embeddings sorted by taxon_id (so per-taxon scans
+    only touch that taxon's row groups) plus an HNSW cosine index when vss is available.
+    """
+    cols = {d[0] for d in cur.execute(f"SELECT * FROM {src or 'doc_chunk'} LIMIT 0").description}
+    if not {"id", "taxon_id", "embedding"} <= cols:
+        if src is None:
+            cur.execute("DROP TABLE IF EXISTS doc_chunk_vec")
+        return
+    extra = ", ".join(c if c in cols else f"NULL::VARCHAR AS {c}" for c in _DOC_COLUMNS)
+    rows = f"SELECT id, taxon_id, {extra}, TRY_CAST(embedding AS FLOAT[]) AS e FROM {src or 'doc_chunk'}"
+    append = src is not None and _table_exists(cur, "doc_chunk_vec")
+    if append:
+        dim = cur.execute("SELECT array_length(embedding) FROM doc_chunk_vec LIMIT 1").fetchone()
+    else:
+        dim = cur.execute(f"SELECT len(e) FROM ({rows}) WHERE e IS NOT NULL LIMIT 1").fetchone()
+    if not dim:
+        return
+    select = (
+        f"SELECT id, taxon_id, {', '.join(_DOC_COLUMNS)}, e::FLOAT[{dim[0]}] AS embedding"
+        f" FROM ({rows}) WHERE len(e) = {dim[0]} ORDER BY taxon_id, id"
+    )
+    if append:
+        cur.execute(f"INSERT INTO doc_chunk_vec {select}")  # the HNSW index is maintained on insert
+        return
+    cur.execute(f"CREATE OR REPLACE TABLE doc_chunk_vec AS {select}")
+    if _VSS_LOADED:
+        cur.execute("CREATE INDEX doc_chunk_vec_hnsw ON doc_chunk_vec USING HNSW (embedding) WITH (metric = 'cosine')")
+
+
+def _refresh_doc_terms(cur: duckdb.DuckDBPyConnection, src: Optional[str] = None) -> None:
+    """Rebuild the BM25 tables from the live doc_chunk, or add the postings of the new rows in `src`."""
+    cols = {d[0] for d in cur.execute(f"SELECT * FROM {src or 'doc_chunk'} LIMIT 0").description}
+    if not {"id", "taxon_id", "text"} <= cols:
+        if src is None:
+            for t in ("doc_terms", "doc_term_df", "doc_term_stats"):
+                cur.execute(f"DROP TABLE IF EXISTS {t}")
+        return
+    if not (src and _table_exists(cur, "doc_terms")):
+        cur.execute(f"CREATE OR REPLACE TABLE doc_terms AS SELECT * FROM ({terms_sql('doc_chunk')}) ORDER BY term, taxon_id")
+        cur.execute(_DOC_TERM_DF_DDL)
+        cur.execute("INSERT INTO doc_term_df SELECT term, count(*) FROM doc_terms GROUP BY term")
+        cur.execute(_DOC_TERM_STATS_DDL)
+        cur.execute("""
+            INSERT INTO doc_term_stats SELECT (SELECT count(*) FROM doc_chunk),
+                (SELECT coalesce(sum(dl), 0) FROM (SELECT DISTINCT id, dl FROM doc_terms))
+        """)
+        return
+    cur.execute(f"CREATE OR REPLACE TEMP TABLE _terms_delta AS {terms_sql(src)}")
+    cur.execute("INSERT INTO doc_terms SELECT * FROM _terms_delta ORDER BY term, taxon_id")
+    cur.execute("""
+        INSERT OR REPLACE INTO doc_term_df
+        SELECT d.term, coalesce(f.df, 0) + d.c
+        FROM (SELECT term, count(*) AS c FROM _terms_delta GROUP BY term) d LEFT JOIN doc_term_df f USING (term)
+    """)
+    cur.execute(f"""
+        UPDATE doc_term_stats SET n_docs = n_docs + (SELECT count(*) FROM {src}),
+            total_len = total_len + (SELECT coalesce(sum(dl), 0) FROM (SELECT DISTINCT id, dl FROM _terms_delta))
+    """)
+    cur.execute("DROP TABLE _terms_delta")
+
+
+def _after_load(cur: duckdb.DuckDBPyConnection, table: str, src: Optional[str] = None) -> None:
+    """Maintain tables derived from `table`; `src` holds just the newly appended rows, if any."""
+    if table == "occurrence":
+        _refresh_occurrence_summary(cur, src)
+    elif table == "doc_chunk":
+        cols = {d[0] for d in cur.execute("SELECT * FROM doc_chunk LIMIT 0").description}
+        if src is None and {"id", "taxon_id"} <= cols:
+            # cluster by taxon so per-taxon lookups (retrieval joins) read only that taxon's row groups
+            cur.execute("CREATE OR REPLACE TABLE doc_chunk AS SELECT * FROM doc_chunk ORDER BY taxon_id, id")
+        _refresh_doc_vectors(cur, src)
+        _refresh_doc_terms(cur, src)
+
+
+def _append_shards(cur: duckdb.DuckDBPyConnection, table: str, shards: List[Tuple[str, str]], meta: Dict[str, Any], revision: str) -> int:
+    """Append shards not yet applied straight into the live table; each commits with its meta update."""
+    applied = list(meta["shards"])
+    n = meta["row_count"] or 0
+    for url, fp in shards[len(applied):]:
+        cur.execute("BEGIN TRANSACTION")
+        try:
+            src = f"read_parquet({_sql_str(url)})"
+            n += cur.execute(f"INSERT INTO {table} BY NAME SELECT * FROM {src}").fetchone()[0]
+            _after_load(cur, table, src)
+            applied.append(fp)
+            _write_meta(cur, table, revision, _fingerprint(applied), applied, n)
+            cur.execute("COMMIT")
+        except Exception:
+            cur.execute("ROLLBACK")
+            raise
+    return n
+
+
+def _load_parquet(cur: duckdb.DuckDBPyConnection, table: str, staging: str, urls: List[str], ck: Dict[str, Any], revision: str) -> int:
+    """Append shards from the checkpointed one on; each shard commits together with its checkpoint."""
+    n = ck["row_count"]
+    for i in range(ck["shard"], len(urls)):
+        src = f"read_parquet({_sql_str(urls[i])})"
+        cur.execute("BEGIN TRANSACTION")
+        try:
+            cur.execute(f"CREATE TABLE IF NOT EXISTS {staging} AS SELECT * FROM {src} LIMIT 0")
+            n += cur.execute(f"INSERT INTO {staging} BY NAME SELECT * FROM {src}").fetchone()[0]
+            _write_checkpoint(cur, table, revision, i + 1, 0, n)
+            cur.execute("COMMIT")
+        except Exception:
+            cur.execute("ROLLBACK")
+            raise
+    return n
+
+
+def _load_stream(cur: duckdb.DuckDBPyConnection, table: str, staging: str, ds: Any, ck: Dict[str, Any], revision: str) -> int:
+    """Append the streaming dataset in Arrow record batches of BATCH_ROWS rows, skipping rows already staged."""
+    # Use the declared features so all-null columns in the first batch keep their real type
+    schema = ds.features.arrow_schema if ds.features is not None else None
+    offset = ck["row_offset"]
+    if offset:
+        ds = ds.skip(offset)
+    view = f"_hf_batch_{table}"
+    for batch in ds.iter(batch_size=BATCH_ROWS):
+        arrow_batch = pa.Table.from_pydict(batch, schema=schema)
+        cur.register(view, arrow_batch)
+        cur.execute("BEGIN TRANSACTION")
+        try:
+            cur.execute(f"CREATE TABLE IF NOT EXISTS {staging} AS SELECT * FROM {view} LIMIT 0")
+            cur.execute(f"INSERT INTO {staging} BY NAME SELECT * FROM {view}")
+            offset += arrow_batch.num_rows
+            _write_checkpoint(cur, table, revision, 0, offset, offset)
+            cur.execute("COMMIT")
+        except Exception:
+            cur.execute("ROLLBACK")
+            raise
+        finally:
+            cur.unregister(view)
+    return offset
+
+
+def _ingest_table(cur: duckdb.DuckDBPyConnection, table: str, shards: Optional[List[Tuple[str, str]]], revision: str) -> bool:
+    """Bring one table up to date; returns False if it could not be loaded."""
+    staging = f"{table}__staging"
+    urls = [url for url, _ in shards or []]
+    # Streamed tables have no shard listing, so the dataset revision is their fingerprint
+    shard_fps = [fp for _, fp in shards or []]
+    fingerprint = _fingerprint(shard_fps) if shards else revision
+    t0 = time.perf_counter()
+    try:
+        meta = _read_meta(cur, table) if _table_exists(cur, table) else None
+        if meta and fingerprint and meta["fingerprint"] == fingerprint:
+            _write_meta(cur, table, revision, fingerprint, meta["shards"], meta["row_count"])
+            print(f"[hf_ingest] {table}: unchanged")
+            return True
+        if meta and not fingerprint:
+            # streamed, and the Hub didn't give a revision: nothing says the table changed
+            print(f"[hf_ingest] {table}: dataset revision unknown, keeping the loaded table")
+            return True
+        if meta and meta["shards"] and shard_fps[:len(meta["shards"])] == list(meta["shards"]):
+            resumed_rows = meta["row_count"] or 0
+            n = _append_shards(cur, table, shards, meta, revision)
+            dt = max(time.perf_counter() - t0, 1e-9)
+            print(f"[hf_ingest] {table}: appended {len(shards) - len(meta['shards'])} shard(s), {n} rows in {dt:.1f}s ({(n - resumed_rows) / dt:,.0f} rows/s)")
+            return True
+
+        # New or changed split: full reload through the staging table
+        ds = None
+        if not urls:
+            try:
+                ds = load_dataset(HF_DATASET, table, split="train", streaming=True)
+            except Exception:
+                # allow missing tables
+                print(f"[hf_ingest] {table}: not in dataset")
+                return True
+        ck = _read_checkpoint(cur, table)
+        resumable = bool(ck and revision and ck["revision"] == revision)
+        # a checkpoint written by the other load path can't be resumed
+        resumable = resumable and not ck["done"] and not (ck["row_offset"] if urls else ck["shard"])
+        if resumable and (ck["shard"] or ck["row_offset"]):
+            print(f"[hf_ingest] {table}: resuming at shard {ck['shard']}, offset {ck['row_offset']}")
+        else:
+            cur.execute(f"DROP TABLE IF EXISTS {staging}")
+            ck = {"shard": 0, "row_offset": 0, "row_count": 0}
+            _write_checkpoint(cur, table, revision, 0, 0, 0)
+        resumed_rows = ck["row_count"]
+        if urls:
+            n = _load_parquet(cur, table, staging, urls, ck, revision)
+        else:
+            n = _load_stream(cur, table, staging, ds, ck, revision)
+
+        # Swap the finished staging table in atomically
+        cur.execute("BEGIN TRANSACTION")
+        try:
+            cur.execute(f"DROP TABLE IF EXISTS {table}")
+            cur.execute(f"ALTER TABLE {staging} RENAME TO {table}")
+            _after_load(cur, table)
+            _write_checkpoint(cur, table, revision, len(urls), 0 if urls else n, n, done=True)
+            _write_meta(cur, table, revision, fingerprint, shard_fps, n)
+            cur.execute("COMMIT")
+        except Exception:
+            cur.execute("ROLLBACK")
+            raise
+    except Exception as e:
+        # a failed load keeps its staging table + checkpoint for the next run
+        print(f"[hf_ingest] {table}: failed ({e})")
+        return False
+    finally:
+        cur.close()
+    dt = max(time.perf_counter() - t0, 1e-9)
+    print(f"[hf_ingest] {table}: {n} rows in {dt:.1f}s ({(n - resumed_rows) / dt:,.0f} rows/s)")
+    return True
+
 
 def build_duckdb_from_hf() -> str:
+    global _VSS_LOADED
     if not HF_DATASET:
         raise RuntimeError("HF_DATASET_REPO not set")
+    os.makedirs(os.path.dirname(DUCK_PATH) or ".", exist_ok=True)
     con = duckdb.connect(DUCK_PATH)
-    for table in SCHEMA_TABLES:
+    if os.getenv("HF_TOKEN"):
+        # private datasets: lets read_parquet('hf://...') authenticate
+        con.execute(f"CREATE OR REPLACE SECRET hf_token (TYPE HUGGINGFACE, TOKEN {_sql_str(os.environ['HF_TOKEN'])})")
+    con.execute(_CHECKPOINT_DDL)
+    con.execute(_META_DDL)
+    revision = _dataset_revision()
+    done = con.execute("SELECT revision FROM _ingest_meta WHERE table_name='*'").fetchone()
+    if revision and done and done[0] == revision:
+        print(f"[hf_ingest] dataset unchanged at {revision[:12]}")
+        con.close()
+        return DUCK_PATH
+
+    _VSS_LOADED = _load_vss(con)
+
+    shards: Dict[str, List[Tuple[str, str]]] = {}
+    if INGEST_MODE in ("auto", "parquet"):
         try:
-            ds = load_dataset(HF_DATASET, table, split="train", streaming=True)
-        except Exception:
-            # allow missing tables
-            continue
-        # stream into DuckDB using copy from iterator
-        # Create table if not exists by sampling first 100 rows into a temp view
-        sample = []
-        for i, row in enumerate(ds):
-            sample.append(row)
-            if i >= 100: break
-        if not sample:
-            continue
-        con.execute(f"CREATE TABLE IF NOT EXISTS {table} AS SELECT * FROM read_json_auto(?) LIMIT 0", [sample])
-        # Insert all rows
-        con.execute(f"INSERT INTO {table} SELECT * FROM read_json_auto(?)", [sample])
-        # Continue streaming the rest
-        for row in ds.skip(len(sample)):
-            con.execute(f"INSERT INTO {table} SELECT * FROM read_json_auto(?)", [[row]])
+            shards = _parquet_shards()
+        except Exception as e:
+            if INGEST_MODE == "parquet":
+                raise
+            print("Parquet shard listing failed, streaming instead:", e)
+
+    # DuckDB connections aren't thread-safe; each worker gets its own cursor
+    with ThreadPoolExecutor(max_workers=max(1, WORKERS)) as pool:
+        futures = [pool.submit(_ingest_table, con.cursor(), table, shards.get(table), revision) for table in SCHEMA_TABLES]
+        ok = all(f.result() for f in futures)
+    if ok and revision:
+        _write_meta(con, "*", revision, "", [], 0)
     con.close()
-    return DUCK_PATH
\ No newline at end of file
+    # any table may have changed: cached DuckDB profiles are stale for every worker
+    get_profile_cache("duckdb").invalidate()
+    return DUCK_PATH
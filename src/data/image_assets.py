@@ -0,0 +1,114 @@
+"""Bulk image_asset payloads: load rows or a file into Arrow, validate column-wise, report per row."""
+from __future__ import annotations
+import os
+from typing import Any, Dict, List, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+IMAGE_COLUMNS = [
+    "taxon_id", "title", "url", "thumbnail_url", "width", "height", "format", "license", "attribution", "source", "captured_on",
+]
+REQUIRED = ["taxon_id", "url", "license", "attribution"]
+# Largest values the backends' bigint / integer columns take
+_INT_MAX = {"taxon_id": 2**63 - 1, "width": 2**31 - 1, "height": 2**31 - 1}
+
+
+def load_payload(payload: Dict[str, Any]) -> pa.Table:
+    """Image rows from `payload["rows"]`, a file at `payload["path"]` (.parquet/.csv/.jsonl) or the payload itself.
+
+    Every IMAGE_COLUMNS column comes back as a string column (missing ones all-null); backends cast on insert.
+    """
+    if payload.get("path"):
+        path = payload["path"]
+        ext = os.path.splitext(path)[1].lower()
+        if ext == ".parquet":
+            import pyarrow.parquet as pq
+            table = pq.read_table(path)
+        elif ext == ".csv":
+            import pyarrow.csv as pcsv
+            table = pcsv.read_csv(path)
+        elif ext in (".jsonl", ".json", ".ndjson"):
+            import pyarrow.json as pjson
+            table = pjson.read_json(path)
+        else:
+            raise ValueError(f"Unsupported image file type: {ext}")
+    else:
+        rows = payload.get("rows")
+        if rows is None:
+            rows = [payload]
+        # JSON-ish rows mix types within a column (12 vs "12"), so they are stringified up front
+        table = pa.table({
+            c: pa.array([None if r.get(c) is None else str(r.get(c)) for r in rows], pa.string()) for c in IMAGE_COLUMNS
+        })
+    cols = {}
+    for c in IMAGE_COLUMNS:
+        if c in table.column_names:
+            col = table.column(c)
+            cols[c] = col if pa.types.is_string(col.type) else pc.cast(col, pa.string())
+        else:
+            cols[c] = pa.nulls(table.num_rows, pa.string())
+    return pa.table(cols)
+
+
+def validate(table: pa.Table) -> Tuple[pa.Table, List[Dict[str, Any]]]:
+    """Split `table` into the rows to write (with a `_row` index column) and per-row results for the rest.
+
+    Rows fail on a missing required field, a non-integer or out-of-range taxon_id/width/height, a
+    non-http(s) url or a captured_on that isn't a real YYYY-MM-DD date, so every value left casts
+    cleanly on both backends; captured_on is cut to its date. Of several rows sharing a url, the
+    last one is written and the earlier ones are reported as duplicates.
+    """
+    n = table.num_rows
+    problems: Dict[str, pa.ChunkedArray] = {}
+    for c in REQUIRED:
+        col = table.column(c)
+        problems[f"missing {c}"] = pc.fill_null(pc.equal(pc.utf8_length(pc.utf8_trim_whitespace(col)), 0), True)
+    problems["url must be http(s)"] = pc.fill_null(pc.invert(pc.match_substring_regex(table.column("url"), r"^https?://")), False)
+    for c, limit in _INT_MAX.items():
+        col = table.column(c)
+        is_int = pc.match_substring_regex(col, r"^\s*\d+\s*$")
+        problems[f"{c} not an integer"] = pc.fill_null(pc.invert(is_int), False)
+        # float64 is exact enough to tell 2**31 - 1 from 2**31 and keeps 20-digit inputs from overflowing
+        value = pc.cast(pc.if_else(is_int, pc.utf8_trim_whitespace(col), None), pa.float64())
+        problems[f"{c} out of range"] = pc.fill_null(pc.greater(value, float(limit)), False)
+    day = pc.utf8_slice_codeunits(pc.utf8_trim_whitespace(table.column("captured_on")), 0, 10)
+    parsed = pc.strptime(day, "%Y-%m-%d", "s", error_is_null=True)
+    # strptime rolls impossible days over (2020-02-30 -> 2020-03-01); a real date formats back unchanged
+    real_date = pc.equal(pc.strftime(parsed, "%Y-%m-%d"), day)
+    problems["captured_on not a YYYY-MM-DD date"] = pc.and_(pc.is_valid(day), pc.invert(pc.fill_null(real_date, False)))
+    table = table.set_column(table.column_names.index("captured_on"), "captured_on", day)
+
+    bad = pa.array([False] * n)
+    for mask in problems.values():
+        bad = pc.or_(bad, mask)
+    results: List[Dict[str, Any]] = []
+    masks = {name: mask.to_pylist() for name, mask in problems.items()}
+    for i in pc.indices_nonzero(bad).to_pylist():
+        results.append({"row": i, "status": "invalid", "error": "; ".join(name for name, m in masks.items() if m[i])})
+
+    keep = pc.invert(bad).to_pylist()
+    last: Dict[str, int] = {}
+    for i, url in enumerate(table.column("url").to_pylist()):
+        if keep[i]:
+            if url in last:
+                keep[last[url]] = False
+                results.append({"row": last[url], "status": "duplicate", "error": f"superseded by row {i}"})
+            last[url] = i
+    rows = table.append_column("_row", pa.array(range(n), pa.int64())).filter(pa.array(keep))
+    return rows, results
+
+
+def summarize(n_rows: int, results: List[Dict[str, Any]], seconds: float) -> Dict[str, Any]:
+    """Write report: per-row results in row order plus counts and throughput."""
+    results.sort(key=lambda r: r["row"])
+    counts: Dict[str, int] = {}
+    for r in results:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+    return {
+        "rows": n_rows,
+        **counts,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(n_rows / seconds, 1) if seconds > 0 else None,
+        "results": results,
+    }
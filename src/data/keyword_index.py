@@ -0,0 +1,50 @@
+"""BM25 keyword index over doc_chunk: one tokenizer shared by ingest (SQL) and queries (Python)."""
+from __future__ import annotations
+import os
+import re
+import unicodedata
+from typing import List
+
+# BM25 parameters
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+# Query terms beyond this many are ignored, bounding the postings a query touches
+MAX_QUERY_TERMS = int(os.getenv("BM25_MAX_QUERY_TERMS", "16"))
+
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between both
+but by can could did do does doing down during each few for from further had has have having he her here hers
+him his how i if in into is it its itself just me more most my no nor not now of off on once only or other our
+ours out over own same she should so some such than that the their theirs them then there these they this those
+through to too under until up very was we were what when where which while who whom why will with would you your
+tell show give find please know about many much
+""".split())
+
+_SPLIT = re.compile(r"[^a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Distinct index terms of `text` in order: accents stripped, lowercased, alphanumeric runs, no stopwords."""
+    s = text or ""
+    if not s.isascii():
+        s = unicodedata.normalize("NFKD", s)
+        s = "".join(c for c in s if not unicodedata.combining(c))
+    seen: List[str] = []
+    for t in _SPLIT.split(s.lower()):
+        if len(t) > 1 and t not in STOPWORDS and t not in seen:
+            seen.append(t)
+    return seen
+
+
+def terms_sql(src: str) -> str:
+    """SELECT (term, taxon_id, id, tf, dl) postings for the doc_chunk rows in `src`, tokenized like `tokenize`."""
+    stop = ", ".join(f"'{w}'" for w in sorted(STOPWORDS))
+    return f"""
+    WITH toks AS (
+        SELECT id, taxon_id, unnest(regexp_split_to_array(lower(strip_accents(coalesce(text, ''))), '[^a-z0-9]+')) AS term
+        FROM {src}
+    ),
+    kept AS (SELECT * FROM toks WHERE length(term) > 1 AND term NOT IN ({stop}))
+    SELECT term, taxon_id, id, count(*)::INTEGER AS tf, sum(count(*)) OVER (PARTITION BY id)::INTEGER AS dl
+    FROM kept GROUP BY term, taxon_id, id
+    """
@@ -0,0 +1,239 @@
+"""In-memory taxon name index: normalized scientific names, synonyms and common names -> taxon_id."""
+from __future__ import annotations
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# How often (seconds) the taxon table's signature is re-checked for changes
+CHECK_EVERY = float(os.getenv("NAME_INDEX_CHECK_SECS", "60"))
+# Fuzzy matches scoring below this (trigram Dice coefficient, 0-1) are dropped
+FUZZY_MIN_SCORE = float(os.getenv("NAME_FUZZY_MIN_SCORE", "0.6"))
+# Upper bound on posting-list entries scanned per fuzzy query; keeps latency flat on large catalogs
+FUZZY_MAX_SCAN = int(os.getenv("NAME_FUZZY_MAX_SCAN", "50000"))
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+# (taxon_id, scientific_name, common_names, synonyms)
+NameRow = Tuple[int, Optional[str], Optional[Sequence[str]], Optional[Sequence[str]]]
+
+
+def normalize_name(name: str) -> str:
+    """Casefold, strip accents and collapse punctuation/whitespace: 'Éclipta  Alba' -> 'eclipta alba'."""
+    s = name
+    if not s.isascii():
+        s = unicodedata.normalize("NFKD", s)
+        s = "".join(c for c in s if not unicodedata.combining(c))
+    s = s.casefold()
+    return " ".join(_NON_WORD.sub(" ", s).split())
+
+
+def _as_list(v: Any) -> List[str]:
+    if not v:
+        return []
+    if isinstance(v, str):
+        return [v]
+    return [x for x in v if isinstance(x, str)]
+
+
+def _trigrams(key: str) -> set:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _TrigramIndex:
+    """Trigram inverted index over normalized names for typo-tolerant lookup."""
+
+    def __init__(self, names: Dict[str, int]):
+        self.keys = list(names)
+        self.ids = list(names.values())
+        postings: Dict[str, List[int]] = {}
+        for i, key in enumerate(self.keys):
+            for g in _trigrams(key):
+                postings.setdefault(g, []).append(i)
+        self.postings: Dict[str, np.ndarray] = {g: np.array(p, dtype=np.int32) for g, p in postings.items()}
+
+    def search(self, key: str, limit: int, min_score: float) -> List[Tuple[int, str, float]]:
+        grams = _trigrams(key)
+        # Any name scoring >= min_score shares at least `need` trigrams with the query, so it must
+        # contain one of the len(grams) - need + 1 rarest ones (prefix filtering): only those are scanned.
+        need = max(1, math.ceil(min_score * len(grams) / (2 - min_score)))
+        probe = sorted((g for g in grams if g in self.postings), key=lambda g: len(self.postings[g]))
+        scanned: List[np.ndarray] = []
+        budget = FUZZY_MAX_SCAN
+        for g in probe[:len(grams) - need + 1]:
+            posting = self.postings[g]
+            if scanned and len(posting) > budget:
+                break
+            scanned.append(posting)
+            budget -= len(posting)
+        if not scanned:
+            return []
+        cand, counts = np.unique(np.concatenate(scanned), return_counts=True)
+        top = cand[np.argsort(-counts, kind="stable")[:limit * 20]]
+        best: Dict[int, Tuple[int, str, float]] = {}
+        for i in top.tolist():
+            other = _trigrams(self.keys[i])
+            score = 2 * len(grams & other) / (len(grams) + len(other))
+            tid = self.ids[i]
+            if score >= min_score and (tid not in best or score > best[tid][2]):
+                best[tid] = (tid, self.keys[i], score)
+        return sorted(best.values(), key=lambda c: -c[2])[:limit]
+
+
+class NameIndex:
+    """Dict lookup of taxon names, (re)built from `load_rows()` whenever `signature()` changes.
+
+    Scientific names win over synonyms, and synonyms over common names, when two taxa share
+    a normalized name; within a rank the first row (lowest taxon_id) wins.
+    """
+
+    def __init__(self, load_rows: Callable[[], Iterable[NameRow]], signature: Callable[[], Any]):
+        self._load_rows = load_rows
+        self._signature = signature
+        self._names: Dict[str, int] = {}
+        self._scientific: Dict[int, str] = {}
+        self._max_words = 1
+        self._fuzzy: Optional[_TrigramIndex] = None
+        self._fuzzy_thread: Optional[threading.Thread] = None
+        self._sig: Any = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def _build(self, rows: Iterable[NameRow]) -> Tuple[Dict[str, int], Dict[int, str]]:
+        ranked: List[Dict[str, int]] = [{}, {}, {}]  # scientific, synonyms, common
+        scientific: Dict[int, str] = {}
+        for taxon_id, sci, commons, synonyms in rows:
+            if sci:
+                scientific.setdefault(taxon_id, sci)
+            for rank, names in enumerate((_as_list(sci), _as_list(synonyms), _as_list(commons))):
+                for n in names:
+                    key = normalize_name(n)
+                    if key:
+                        ranked[rank].setdefault(key, taxon_id)
+        names = ranked[2]
+        names.update(ranked[1])
+        names.update(ranked[0])
+        return names, scientific
+
+    def refresh(self, force: bool = False) -> None:
+        """Rebuild if the taxon table changed (checked at most every CHECK_EVERY seconds)."""
+        now = time.monotonic()
+        if not force and self._checked and now - self._checked < CHECK_EVERY:
+            return
+        with self._lock:
+            if not force and self._checked and now - self._checked < CHECK_EVERY:
+                return
+            sig = self._signature()
+            if force or not self._checked or sig != self._sig:
+                # build aside and swap, so concurrent lookups never see a half-built dict
+                names, scientific = self._build(self._load_rows())
+                self._names, self._scientific = names, scientific
+                self._max_words = max((k.count(" ") + 1 for k in names), default=1)
+                self._fuzzy = None
+                # the trigram index takes seconds per million names: build it off the request path
+                self._fuzzy_thread = threading.Thread(target=self._build_fuzzy, args=(names,), name="name-index-fuzzy", daemon=True)
+                self._fuzzy_thread.start()
+                self._sig = sig
+            self._checked = time.monotonic()
+
+    def lookup(self, name: str) -> Optional[int]:
+        self.refresh()
+        return self._names.get(normalize_name(name or ""))
+
+    def lookup_many(self, names: Iterable[str]) -> Dict[str, int]:
+        """Map each resolvable input name to its taxon_id; misses are left out."""
+        self.refresh()
+        out: Dict[str, int] = {}
+        for n in names:
+            tid = self._names.get(normalize_name(n or ""))
+            if tid is not None:
+                out[n] = tid
+        return out
+
+    def scientific_name(self, taxon_id: int) -> Optional[str]:
+        return self._scientific.get(taxon_id)
+
+    def find_in_text(self, text: str, max_words: int = 4) -> List[Tuple[int, int, int]]:
+        """Names mentioned in free text -> [(start, stop, taxon_id)] word spans of normalize_name(text).split().
+
+        Scans left to right taking the longest exact match at each position; spans don't overlap.
+        """
+        self.refresh()
+        words = normalize_name(text or "").split()
+        max_words = min(max_words, self._max_words)
+        out: List[Tuple[int, int, int]] = []
+        i = 0
+        while i < len(words):
+            for n in range(min(max_words, len(words) - i), 0, -1):
+                tid = self._names.get(" ".join(words[i:i + n]))
+                if tid is not None:
+                    out.append((i, i + n, tid))
+                    i += n
+                    break
+            else:
+                i += 1
+        return out
+
+    def _build_fuzzy(self, names: Dict[str, int]) -> None:
+        fuzzy = _TrigramIndex(names)
+        with self._lock:
+            if self._names is names:  # a newer refresh has its own build under way
+                self._fuzzy = fuzzy
+
+    def wait_fuzzy(self, timeout: Optional[float] = None) -> bool:
+        """Block until the trigram index for the current names is built; True if it is ready."""
+        thread = self._fuzzy_thread
+        if thread is not None:
+            thread.join(timeout)
+        return self._fuzzy is not None
+
+    def fuzzy(self, name: str, limit: int = 5, min_score: float = FUZZY_MIN_SCORE) -> List[Tuple[int, str, float]]:
+        """Ranked (taxon_id, matched name, score) candidates for a possibly misspelled name.
+
+        Empty until the background trigram build for the current names has finished.
+        """
+        key = normalize_name(name or "")
+        if not key:
+            return []
+        self.refresh()
+        fuzzy = self._fuzzy
+        return fuzzy.search(key, limit, min_score) if fuzzy is not None else []
+
+    def resolve(self, names: Sequence[str], fuzzy_misses: bool = False) -> List[Tuple[str, int, Optional[Tuple[str, float]]]]:
+        """Resolve many names at once -> [(name, taxon_id, (matched, score) if fuzzy else None)].
+
+        Results keep input order, one per taxon (an exact hit wins over a fuzzy one for the same taxon).
+        Misses are fuzzy-matched individually when `fuzzy_misses`; otherwise only if nothing matched
+        exactly, taking the single best candidate.
+        """
+        hits = self.lookup_many(names)
+        misses = [n for n in names if n not in hits]
+        if not fuzzy_misses and not hits:
+            best = max(((n, c) for n in misses for c in self.fuzzy(n, limit=1)), key=lambda nc: nc[1][2], default=None)
+            if best is None:
+                return []
+            n, (taxon_id, matched, score) = best
+            return [(n, taxon_id, (matched, score))]
+        near = {}
+        if fuzzy_misses:
+            for n in misses:
+                for taxon_id, matched, score in self.fuzzy(n, limit=1):
+                    if taxon_id not in hits.values():
+                        near[n] = (taxon_id, (matched, score))
+        out: List[Tuple[str, int, Optional[Tuple[str, float]]]] = []
+        seen = set()
+        for n in names:
+            taxon_id, how = (hits[n], None) if n in hits else near.get(n, (None, None))
+            if taxon_id is not None and taxon_id not in seen:
+                seen.add(taxon_id)
+                out.append((n, taxon_id, how))
+        return out
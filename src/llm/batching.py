@@ -0,0 +1,86 @@
+from __future__ import annotations
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Generic, List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_STOP = object()
+
+
+class MicroBatcher(Generic[T, R]):
+    """Coalesce concurrent single-item calls into batched calls of `fn`.
+
+    A caller blocks in `submit()` until its result is ready. A single worker thread takes the
+    first queued item, waits up to `max_wait_ms` for more (up to `max_batch`), then runs
+    `fn(items)` once and hands each caller its own result. An idle caller pays at most
+    `max_wait_ms` of extra latency; under load, one forward pass serves many requests.
+    """
+
+    def __init__(self, fn: Callable[[List[T]], Sequence[R]], max_batch: int = 32, max_wait_ms: float = 5.0, name: str = "batcher"):
+        self._fn = fn
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    def submit_async(self, item: T) -> "Future[R]":
+        fut: Future = Future()
+        with self._close_lock:
+            if self._closed:
+                raise RuntimeError("batcher is closed")
+            self._queue.put((item, fut))
+        return fut
+
+    def submit(self, item: T) -> R:
+        return self.submit_async(item).result()
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Finish the queued work, stop the worker and drop `fn` (and whatever it references)."""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        if threading.current_thread() is not self._worker:
+            self._worker.join(timeout)
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch = [first]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._dispatch(batch)
+        self._fn = None
+
+    def _dispatch(self, batch: List[Any]) -> None:
+        items = [item for item, _ in batch]
+        try:
+            results = self._fn(items)
+            if len(results) != len(items):
+                raise RuntimeError(f"batch function returned {len(results)} results for {len(items)} inputs")
+        except BaseException as e:
+            for _, fut in batch:
+                fut.set_exception(e)
+            return
+        for (_, fut), res in zip(batch, results):
+            fut.set_result(res)
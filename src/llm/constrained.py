@@ -0,0 +1,204 @@
+"""Schema-constrained JSON generation for small flat objects (the Interpreter output).
+
+A spec is a JSON-schema-like dict of fields, each a string, an enum, or an array of either:
+
+    {"task": {"enum": ["lookup", "map"]},
+     "entities": {"type": "array", "items": {"type": "string", "max_tokens": 12}, "max_items": 4}}
+
+`max_tokens` / `max_items` are the per-field budgets. From a spec we derive an Ollama `format`
+schema, a max_new_tokens cap, and a transformers `prefix_allowed_tokens_fn` that only lets the
+model emit tokens continuing valid JSON for the spec. Keys and punctuation are forced, so only
+values cost model choices, and generation ends with EOS right after the closing brace.
+"""
+from __future__ import annotations
+import json
+import threading
+from typing import Any, Callable, Dict, Generator, List, Optional, Sequence, Tuple
+
+Spec = Dict[str, Dict[str, Any]]
+# (kind, arg): ("lit", remaining alternatives) or ("body", token budget of the open string)
+Expectation = Tuple[str, Any]
+
+_CHARS_PER_TOKEN = 4  # for Ollama's character limits
+
+
+def json_schema(spec: Spec) -> Dict[str, Any]:
+    """JSON schema for Ollama's `format` option; token budgets become maxLength/maxItems."""
+
+    def node(n: Dict[str, Any]) -> Dict[str, Any]:
+        if "enum" in n:
+            return {"type": "string", "enum": list(n["enum"])}
+        if n.get("type") == "array":
+            return {"type": "array", "items": node(n["items"]), "maxItems": n["max_items"]}
+        return {"type": "string", "maxLength": n["max_tokens"] * _CHARS_PER_TOKEN}
+
+    return {
+        "type": "object",
+        "properties": {name: node(n) for name, n in spec.items()},
+        "required": list(spec),
+        "additionalProperties": False,
+    }
+
+
+def token_budget(spec: Spec) -> int:
+    """Upper bound on generated tokens: every forced character as its own token plus all value budgets."""
+
+    def node(n: Dict[str, Any]) -> int:
+        if "enum" in n:
+            return max(len(json.dumps(v)) for v in n["enum"])
+        if n.get("type") == "array":
+            return 2 + n["max_items"] * (node(n["items"]) + 2)
+        return n["max_tokens"] + 2
+
+    return sum(len(json.dumps(name)) + 4 + node(n) for name, n in spec.items()) + 2
+
+
+# ---- Grammar: a generator that yields expectations and is sent one character at a time ----
+
+def _lit(alts: Sequence[str]) -> Generator[Expectation, str, str]:
+    matched = ""
+    while True:
+        live = [a for a in alts if a.startswith(matched)]
+        if not live:
+            raise ValueError(f"unexpected text {matched!r}, expected one of {list(alts)}")
+        if matched in live:
+            return matched
+        c = yield ("lit", [a[len(matched):] for a in live])
+        matched += c
+
+
+def _body(max_tokens: int) -> Generator[Expectation, str, None]:
+    while (yield ("body", max_tokens)) != '"':
+        pass
+
+
+def _starts(n: Dict[str, Any]) -> List[str]:
+    return [json.dumps(v) for v in n["enum"]] if "enum" in n else ['"']
+
+
+def _value(n: Dict[str, Any]) -> Generator[Expectation, str, None]:
+    if n.get("type") == "array":
+        item = n["items"]
+        yield from _lit(["["])
+        alts = ["]"] + _starts(item)
+        for i in range(n["max_items"]):
+            got = yield from _lit(alts)
+            if got == "]":
+                return
+            if got == '"' and "enum" not in item:
+                yield from _body(item["max_tokens"])
+            got = yield from _lit(["]", ", "] if i + 1 < n["max_items"] else ["]"])
+            if got == "]":
+                return
+            alts = _starts(item)
+    elif "enum" in n:
+        yield from _lit(_starts(n))
+    else:
+        yield from _lit(['"'])
+        yield from _body(n["max_tokens"])
+
+
+def _object(spec: Spec) -> Generator[Expectation, str, None]:
+    yield from _lit(["{"])
+    for i, (name, n) in enumerate(spec.items()):
+        yield from _lit([("" if i == 0 else ", ") + json.dumps(name) + ": "])
+        yield from _value(n)
+    yield from _lit(["}"])
+
+
+class TokenVocab:
+    """Per-tokenizer token texts: exact-text lookup for forced literals, and the ids allowed inside strings."""
+
+    def __init__(self, tokenizer: Any):
+        self.eos_id = tokenizer.eos_token_id
+        special = set(getattr(tokenizer, "all_special_ids", []) or [])
+        self.text: List[str] = []
+        self.by_text: Dict[str, List[int]] = {}
+        self.body_ids: List[int] = []
+        self.quote_ids: List[int] = []
+        for tid in range(len(tokenizer)):
+            tok = tokenizer.convert_ids_to_tokens(tid)
+            text = "" if tid in special or tok is None else tokenizer.convert_tokens_to_string([tok])
+            if tok and tok.startswith("▁") and not text.startswith(" "):
+                text = " " + text  # sentencepiece word-start marker is dropped when decoded alone
+            self.text.append(text)
+            if not text or "�" in text:
+                continue
+            self.by_text.setdefault(text, []).append(tid)
+            if text == '"':
+                self.quote_ids.append(tid)
+            elif '"' not in text and "\\" not in text and all(c >= " " for c in text):
+                self.body_ids.append(tid)
+        self.body_or_quote_ids = self.body_ids + self.quote_ids
+
+
+_VOCABS: Dict[int, TokenVocab] = {}
+_VOCABS_LOCK = threading.Lock()
+
+
+def token_vocab(tokenizer: Any) -> TokenVocab:
+    with _VOCABS_LOCK:
+        if id(tokenizer) not in _VOCABS:
+            _VOCABS[id(tokenizer)] = TokenVocab(tokenizer)
+        return _VOCABS[id(tokenizer)]
+
+
+class JsonConstraint:
+    """Tracks one generation through the spec's grammar and lists the token ids allowed next."""
+
+    def __init__(self, spec: Spec, vocab: TokenVocab):
+        self.vocab = vocab
+        self._gen = _object(spec)
+        self._exp: Optional[Expectation] = next(self._gen)
+        self._body_tokens = 0
+
+    @property
+    def done(self) -> bool:
+        return self._exp is None
+
+    def feed(self, text: str) -> None:
+        if self._exp is None:
+            return
+        in_body = self._exp[0] == "body"
+        for c in text:
+            try:
+                self._exp = self._gen.send(c)
+            except StopIteration:
+                self._exp = None
+                return
+        if in_body and self._exp[0] == "body":
+            self._body_tokens += 1
+        elif self._exp[0] != "body":
+            self._body_tokens = 0
+
+    def allowed(self) -> List[int]:
+        if self._exp is None:
+            return [self.vocab.eos_id]
+        kind, arg = self._exp
+        if kind == "body":
+            if self._body_tokens >= arg:
+                return self.vocab.quote_ids
+            return self.vocab.body_or_quote_ids
+        ids: List[int] = []
+        for rest in arg:
+            for k in range(1, len(rest) + 1):
+                ids.extend(self.vocab.by_text.get(rest[:k], ()))
+        return ids
+
+
+def prefix_allowed_tokens_fn(spec: Spec, tokenizer: Any) -> Callable[[int, Any], List[int]]:
+    """A fresh `prefix_allowed_tokens_fn` for one generate() call (state is kept per batch row)."""
+    vocab = token_vocab(tokenizer)
+    rows: Dict[int, List[Any]] = {}  # batch_id -> [ids fed so far, constraint]
+
+    def allowed(batch_id: int, input_ids: Any) -> List[int]:
+        ids = input_ids.tolist() if hasattr(input_ids, "tolist") else list(input_ids)
+        row = rows.get(batch_id)
+        if row is None:  # first step: everything so far is prompt
+            row = rows[batch_id] = [len(ids), JsonConstraint(spec, vocab)]
+        for tid in ids[row[0]:]:
+            row[1].feed(vocab.text[tid])
+        row[0] = len(ids)
+        return row[1].allowed()
+
+    return allowed
@@ -0,0 +1,87 @@
+from __future__ import annotations
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from src.llm.batching import MicroBatcher
+from src.tools.embedding_cache import CachedEmbedder, EmbeddingCache
+
+# Must be the model that produced doc_chunk.embedding; empty disables vector retrieval
+EMBED_MODEL = os.getenv("EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBED_MAX_TOKENS = int(os.getenv("EMBED_MAX_TOKENS", "256"))
+# Concurrent single-text calls are coalesced into one forward pass of up to this many texts
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "5"))
+# Repeated texts (species names, common questions) are served from EmbeddingCache
+EMBED_CACHE = os.getenv("EMBED_CACHE", "1") == "1"
+
+# ---- Local sentence embeddings (transformers) -------------------------------
+# pip install transformers torch --extra-index-url https://download.pytorch.org/whl/cpu
+
+
+class Embedder:
+    """Mean-pooled, L2-normalized sentence embeddings from a transformers encoder.
+
+    `embed(texts)` runs one forward pass; calling the embedder with a single text queues it
+    so that requests arriving together share a batch.
+    """
+
+    def __init__(self, model_name: str):
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+        self._torch = torch
+        self.model_name = model_name
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModel.from_pretrained(model_name)
+        if os.getenv("USE_GPU", "0") == "1" and torch.cuda.is_available():
+            self.model.to("cuda")
+        self.model.eval()
+        self.dim = int(self.model.config.hidden_size)
+        self._batcher = MicroBatcher(self.embed, EMBED_BATCH_SIZE, EMBED_BATCH_WAIT_MS, name="embedder")
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """One forward pass for all `texts`."""
+        if not texts:
+            return []
+        torch = self._torch
+        batch = self.tokenizer(
+            list(texts), padding=True, truncation=True, max_length=EMBED_MAX_TOKENS, return_tensors="pt"
+        ).to(self.model.device)
+        with torch.inference_mode():
+            hidden = self.model(**batch).last_hidden_state
+        mask = batch["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+        pooled = (hidden * mask).sum(1) / mask.sum(1).clamp(min=1e-9)
+        return torch.nn.functional.normalize(pooled, dim=-1).float().cpu().tolist()
+
+    def __call__(self, text: str) -> List[float]:
+        return self._batcher.submit(text)
+
+
+_EMBEDDER: Optional[Union[Embedder, CachedEmbedder]] = None
+_EMBEDDER_ERROR: Optional[str] = None
+_EMBEDDER_LOCK = threading.Lock()
+
+
+def get_embedder() -> Optional[Union[Embedder, CachedEmbedder]]:
+    """Process-wide embedder, loaded on first use; None if disabled or the model can't be loaded."""
+    global _EMBEDDER, _EMBEDDER_ERROR
+    if _EMBEDDER is not None or _EMBEDDER_ERROR is not None or not EMBED_MODEL:
+        return _EMBEDDER
+    with _EMBEDDER_LOCK:
+        if _EMBEDDER is None and _EMBEDDER_ERROR is None:
+            try:
+                model = Embedder(EMBED_MODEL)
+                _EMBEDDER = CachedEmbedder(model, EmbeddingCache(EMBED_MODEL, model.dim)) if EMBED_CACHE else model
+            except Exception as e:  # missing torch/transformers, no network for the weights, ...
+                _EMBEDDER_ERROR = f"{type(e).__name__}: {e}"
+    return _EMBEDDER
+
+
+def embedder_error() -> Optional[str]:
+    """Why get_embedder() returned None, if it failed to load."""
+    return _EMBEDDER_ERROR
+
+
+def embedding_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters of the process embedder's cache ({} when uncached or not loaded)."""
+    return _EMBEDDER.cache.stats() if isinstance(_EMBEDDER, CachedEmbedder) else {}
@@ -0,0 +1,143 @@
+"""Micro-batching scheduler for the local transformers model (HF_LOCAL).
+
+Concurrent prompts are queued and run as one left-padded `generate()` call, so a CPU box spends
+one forward pass per decoding step on up to HF_BATCH_SIZE requests instead of one each. Rows keep
+their own token budget and constraint (prefix_allowed_tokens_fn); results go back to each caller.
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.language_models.llms import LLM
+
+from src.llm.batching import MicroBatcher
+
+HF_BATCH_SIZE = int(os.getenv("HF_BATCH_SIZE", "8"))
+# How long the first prompt of a batch waits for company; bounds the added latency when idle
+HF_BATCH_WAIT_MS = float(os.getenv("HF_BATCH_WAIT_MS", "20"))
+HF_MAX_NEW_TOKENS = int(os.getenv("HF_MAX_NEW_TOKENS", "512"))
+
+
+@dataclass
+class GenerationRequest:
+    prompt: str
+    max_new_tokens: int = HF_MAX_NEW_TOKENS
+    # per-request constraint, called as fn(0, input_ids) for this request's row
+    prefix_allowed_tokens_fn: Optional[Callable[[int, Any], List[int]]] = None
+
+
+class GenerationScheduler:
+    """Batches GenerationRequests from any number of threads into shared generate() calls.
+
+    Greedy decoding; the KV cache is kept across the decoding steps of a batch. Latency is
+    measured from submit to result, so it includes queueing.
+    """
+
+    def __init__(self, model: Any, tokenizer: Any, max_batch: int = HF_BATCH_SIZE, max_wait_ms: float = HF_BATCH_WAIT_MS):
+        self.model = model
+        self.tokenizer = tokenizer
+        tokenizer.padding_side = "left"  # generated tokens must follow every prompt directly
+        if tokenizer.pad_token_id is None:
+            tokenizer.pad_token = tokenizer.eos_token
+        self._all_ids: Optional[List[int]] = None
+        self._latencies: "deque[float]" = deque(maxlen=2048)
+        self._lock = threading.Lock()
+        self.requests = self.batches = 0
+        self._batched_rows = 0
+        self._started = time.monotonic()
+        self._batcher: MicroBatcher[GenerationRequest, str] = MicroBatcher(self._generate, max_batch, max_wait_ms, name="hf-generate")
+
+    def submit(self, request: GenerationRequest) -> str:
+        t0 = time.perf_counter()
+        out = self._batcher.submit(request)
+        with self._lock:
+            self._latencies.append(time.perf_counter() - t0)
+            self.requests += 1
+        return out
+
+    def _generate(self, reqs: List[GenerationRequest]) -> List[str]:
+        import torch
+
+        enc = self.tokenizer([r.prompt for r in reqs], return_tensors="pt", padding=True).to(self.model.device)
+        kwargs: Dict[str, Any] = {}
+        fns = [r.prefix_allowed_tokens_fn for r in reqs]
+        if any(fns):
+            if self._all_ids is None:
+                self._all_ids = list(range(len(self.tokenizer)))
+            everything = self._all_ids
+            kwargs["prefix_allowed_tokens_fn"] = lambda b, ids: fns[b](0, ids) if fns[b] else everything
+        with torch.inference_mode():
+            out = self.model.generate(
+                **enc,
+                max_new_tokens=max(r.max_new_tokens for r in reqs),
+                do_sample=False,
+                use_cache=True,
+                pad_token_id=self.tokenizer.pad_token_id,
+                **kwargs,
+            )
+        new = out[:, enc["input_ids"].shape[1]:]
+        with self._lock:
+            self.batches += 1
+            self._batched_rows += len(reqs)
+        return [self.tokenizer.decode(row[:r.max_new_tokens], skip_special_tokens=True) for row, r in zip(new, reqs)]
+
+    def close(self) -> None:
+        """Stop the batching worker so the model and tokenizer can be freed."""
+        self._batcher.close()
+        self.model = self.tokenizer = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lat = sorted(self._latencies)
+            elapsed = time.monotonic() - self._started
+
+            def pct(p: float) -> Optional[float]:
+                return round(lat[min(len(lat) - 1, int(p * len(lat)))] * 1000, 1) if lat else None
+
+            return {
+                "requests": self.requests,
+                "batches": self.batches,
+                "mean_batch_size": round(self._batched_rows / self.batches, 2) if self.batches else 0.0,
+                "p50_ms": pct(0.50),
+                "p95_ms": pct(0.95),
+                "requests_per_sec": round(self.requests / elapsed, 3) if elapsed > 0 else 0.0,
+            }
+
+
+class BatchedHFPipeline(LLM):
+    """LangChain LLM over a GenerationScheduler; a drop-in for HuggingFacePipeline in our chains.
+
+    Accepts the same `pipeline_kwargs` (max_new_tokens, prefix_allowed_tokens_fn) at call time.
+    """
+
+    pipeline: Any
+    scheduler: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return "hf_batched"
+
+    def close(self) -> None:
+        self.scheduler.close()
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> str:
+        opts = kwargs.get("pipeline_kwargs") or {}
+        text = self.scheduler.submit(GenerationRequest(
+            prompt=prompt,
+            max_new_tokens=opts.get("max_new_tokens", HF_MAX_NEW_TOKENS),
+            prefix_allowed_tokens_fn=opts.get("prefix_allowed_tokens_fn"),
+        ))
+        if stop:
+            cut = min((i for i in (text.find(s) for s in stop) if i >= 0), default=-1)
+            if cut >= 0:
+                text = text[:cut]
+        return text
+
+
+def batched_pipeline(gen: Any) -> BatchedHFPipeline:
+    """Wrap a text-generation pipeline so concurrent calls share generate() batches."""
+    return BatchedHFPipeline(pipeline=gen, scheduler=GenerationScheduler(gen.model, gen.tokenizer))
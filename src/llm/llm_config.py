@@ -1,6 +1,8 @@
 from __future__ import annotations
 import os
-from typing import Any
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
 
 # Providers: OLLAMA (local), GEMINI (Google), HF_LOCAL (transformers on CPU/GPU)
 PROVIDER = os.getenv("MODEL_PROVIDER", "OLLAMA").upper()
@@ -8,43 +10,159 @@ PROVIDER = os.getenv("MODEL_PROVIDER", "OLLAMA").upper()
 # ---- OLLAMA (local) ---------------------------------------------------------
 # pip install langchain-community
 
-def _ollama() -> Any:
+def _ollama(model: str) -> Any:
     from langchain_community.chat_models import ChatOllama
     base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
-    model = os.getenv("OLLAMA_MODEL", "mistral:7b-instruct")
     return ChatOllama(base_url=base_url, model=model, temperature=0.2)
 
 # ---- GEMINI (Google Generative AI) -----------------------------------------
 # pip install langchain-google-genai google-generativeai
 
-def _gemini() -> Any:
+def _gemini(model: str) -> Any:
     from langchain_google_genai import ChatGoogleGenerativeAI
     api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
     if not api_key:
         raise RuntimeError("GEMINI_API_KEY/GOOGLE_API_KEY not set")
-    model = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
     return ChatGoogleGenerativeAI(model=model, api_key=api_key, temperature=0.2)
 
 # ---- HF_LOCAL (transformers) -----------------------------------------------
 # pip install transformers accelerate torch --extra-index-url https://download.pytorch.org/whl/cpu
 
-def _hf_local() -> Any:
+def _hf_local(hf_model: str) -> Any:
     from transformers import AutoModelForCausalLM, AutoTokenizer, pipeline
     from langchain_community.llms import HuggingFacePipeline
-    hf_model = os.getenv("HF_MODEL", "Qwen2.5-3B-Instruct")
     device = 0 if os.getenv("USE_GPU", "0") == "1" else -1
     tokenizer = AutoTokenizer.from_pretrained(hf_model)
     model = AutoModelForCausalLM.from_pretrained(hf_model, device_map="auto" if device == 0 else None)
-    gen = pipeline("text-generation", model=model, tokenizer=tokenizer, device=device, max_new_tokens=512)
+    # return_full_text=False: callers parse the completion, not the prompt echoed in front of it
+    gen = pipeline("text-generation", model=model, tokenizer=tokenizer, device=device, max_new_tokens=512, return_full_text=False)
+    if os.getenv("HF_BATCHING", "1") == "1":
+        from src.llm.hf_server import batched_pipeline
+        return batched_pipeline(gen)  # concurrent calls share padded generate() batches
     return HuggingFacePipeline(pipeline=gen)
 
-# Public factory used by your agents
+_LOADERS = {"OLLAMA": _ollama, "GEMINI": _gemini, "HF_LOCAL": _hf_local}
 
-def get_llm() -> Any:
-    if PROVIDER == "OLLAMA":
-        return _ollama()
-    if PROVIDER == "GEMINI":
-        return _gemini()
-    if PROVIDER == "HF_LOCAL":
-        return _hf_local()
-    raise ValueError(f"Unknown MODEL_PROVIDER: {PROVIDER}")
\ No newline at end of file
+
+def _default_model(provider: str) -> str:
+    if provider == "OLLAMA":
+        return os.getenv("OLLAMA_MODEL", "mistral:7b-instruct")
+    if provider == "GEMINI":
+        return os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+    return os.getenv("HF_MODEL", "Qwen2.5-3B-Instruct")
+
+
+def _weight_bytes(llm: Any) -> int:
+    """Parameter + buffer bytes of a local transformers model; 0 for remote/served models."""
+    model = getattr(getattr(llm, "pipeline", None), "model", None)
+    if model is None or not hasattr(model, "parameters"):
+        return 0
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+# ---- Registry ---------------------------------------------------------------
+# One instance per (provider, model) per process: HF_LOCAL weights are loaded once, and
+# clients for served models keep their connection pools between turns.
+
+_LLMS: Dict[Tuple[str, str], Any] = {}
+_LLM_INFO: Dict[Tuple[str, str], Dict[str, Any]] = {}
+_LOAD_LOCKS: Dict[Tuple[str, str], threading.Lock] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def _key(provider: Optional[str], model: Optional[str]) -> Tuple[str, str]:
+    provider = (provider or PROVIDER).upper()
+    if provider not in _LOADERS:
+        raise ValueError(f"Unknown MODEL_PROVIDER: {provider}")
+    return provider, model or _default_model(provider)
+
+
+def llm_identity(provider: Optional[str] = None, model: Optional[str] = None) -> str:
+    """"PROVIDER:model" that get_llm would return, without loading it."""
+    return ":".join(_key(provider, model))
+
+
+def get_llm(provider: Optional[str] = None, model: Optional[str] = None) -> Any:
+    """The shared LLM for `provider`/`model` (MODEL_PROVIDER and its *_MODEL env var by default).
+
+    Loaded on first use; concurrent first calls wait for a single load.
+    """
+    key = _key(provider, model)
+    llm = _LLMS.get(key)
+    if llm is not None:
+        return llm
+    with _REGISTRY_LOCK:
+        lock = _LOAD_LOCKS.setdefault(key, threading.Lock())
+    with lock:  # per key, so a slow HF load doesn't block other providers
+        if key not in _LLMS:
+            t0 = time.perf_counter()
+            llm = _LOADERS[key[0]](key[1])
+            _LLM_INFO[key] = {"load_seconds": round(time.perf_counter() - t0, 2), "weight_bytes": _weight_bytes(llm)}
+            _LLMS[key] = llm
+    return _LLMS[key]
+
+
+def get_constrained_llm(spec: Dict[str, Dict[str, Any]], provider: Optional[str] = None, model: Optional[str] = None) -> Optional[Any]:
+    """The shared LLM bound to emit only JSON matching `spec` (see src.llm.constrained), or None if unsupported.
+
+    OLLAMA gets the spec as its `format` JSON schema; HF_LOCAL a per-call prefix_allowed_tokens_fn.
+    Both are capped at the spec's token budget. Bind per call: the HF constraint is stateful.
+    """
+    from src.llm.constrained import json_schema, prefix_allowed_tokens_fn, token_budget
+    key = _key(provider, model)
+    llm = get_llm(*key)
+    if key[0] == "OLLAMA":
+        return llm.bind(format=json_schema(spec), num_predict=token_budget(spec))
+    if key[0] == "HF_LOCAL":
+        return llm.bind(pipeline_kwargs={
+            "prefix_allowed_tokens_fn": prefix_allowed_tokens_fn(spec, llm.pipeline.tokenizer),
+            "max_new_tokens": token_budget(spec),
+            "do_sample": False,
+            "return_full_text": False,  # per-call pipeline_kwargs replace the wrapper's defaults
+        })
+    return None
+
+
+def warmup_llm(provider: Optional[str] = None, model: Optional[str] = None, generate: bool = True) -> Dict[str, Any]:
+    """Load the LLM at startup (and, for HF_LOCAL, run one short generation); returns its registry stats."""
+    key = _key(provider, model)
+    llm = get_llm(*key)
+    if generate and key[0] == "HF_LOCAL":
+        t0 = time.perf_counter()
+        llm.pipeline("Hello", max_new_tokens=1)
+        _LLM_INFO[key]["warmup_seconds"] = round(time.perf_counter() - t0, 2)
+    return llm_registry_stats()[f"{key[0]}:{key[1]}"]
+
+
+def release_llm(provider: Optional[str] = None, model: Optional[str] = None) -> bool:
+    """Drop a loaded LLM from the registry so its memory can be reclaimed; False if it wasn't loaded."""
+    key = _key(provider, model)
+    with _REGISTRY_LOCK:
+        llm = _LLMS.pop(key, None)
+        _LLM_INFO.pop(key, None)
+    if llm is None:
+        return False
+    if hasattr(llm, "close"):
+        llm.close()  # batched HF: stops the worker thread that holds the model
+    del llm
+    import gc
+    gc.collect()
+    try:
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    except ImportError:
+        pass
+    return True
+
+
+def llm_registry_stats() -> Dict[str, Dict[str, Any]]:
+    """Per loaded model ("PROVIDER:model"): load time, weight memory and, when batched, scheduler latency."""
+    out = {}
+    for (p, m), info in list(_LLM_INFO.items()):
+        out[f"{p}:{m}"] = dict(info)
+        scheduler = getattr(_LLMS.get((p, m)), "scheduler", None)
+        if scheduler is not None:
+            out[f"{p}:{m}"]["batching"] = scheduler.stats()
+    return out
@@ -0,0 +1,37 @@
+"""One long-lived event loop on a daemon thread, so sync graph nodes can run coroutines without
+paying for a fresh loop (and losing pooled connections) on every call."""
+from __future__ import annotations
+import asyncio
+import threading
+from typing import Any, Awaitable, Optional, TypeVar
+
+T = TypeVar("T")
+
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_LOCK = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """The shared loop, started on first use. Async clients/engines must only be used on it."""
+    global _LOOP
+    with _LOCK:
+        if _LOOP is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="aio-loop", daemon=True).start()
+            _LOOP = loop
+        return _LOOP
+
+
+def run(coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+    """Run `coro` on the shared loop and block until it finishes."""
+    loop = get_loop()
+    if _in_loop(loop):
+        raise RuntimeError("aio.run() called from the shared loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)  # type: ignore[arg-type]
+
+
+def _in_loop(loop: Any) -> bool:
+    try:
+        return asyncio.get_running_loop() is loop
+    except RuntimeError:
+        return False
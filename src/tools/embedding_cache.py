@@ -0,0 +1,155 @@
+"""Embedding cache: content-hash keyed, in-memory LRU bounded by bytes over a memory-mapped float32 store."""
+from __future__ import annotations
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+EMBED_CACHE_DIR = os.getenv("EMBED_CACHE_DIR", "data/embed_cache")  # empty: memory only
+EMBED_CACHE_MAX_BYTES = int(os.getenv("EMBED_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+_DIGEST = 20  # sha1
+
+
+class EmbeddingCache:
+    """Vectors keyed by sha1(model, text).
+
+    Hot vectors live in an LRU capped at `max_bytes`. With `directory`, every vector is also
+    appended to `<model>-<dim>.f32` (rows of float32) and its key to `.keys`; the rows are read
+    back through a memory map, so the store survives restarts without being loaded into RAM.
+    """
+
+    def __init__(self, model: str, dim: int, directory: Optional[str] = EMBED_CACHE_DIR, max_bytes: int = EMBED_CACHE_MAX_BYTES):
+        self.model = model
+        self.dim = dim
+        self.max_bytes = max_bytes
+        self._lru: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._rows: Dict[bytes, int] = {}
+        self._map: Optional[np.ndarray] = None
+        self._vec_file = self._key_file = None
+        self.hits = self.disk_hits = self.misses = self.evictions = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            base = os.path.join(directory, f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', model)}-{dim}")
+            self._open_store(base + ".f32", base + ".keys")
+
+    def _open_store(self, vec_path: str, key_path: str) -> None:
+        row_bytes = 4 * self.dim
+        for path in (vec_path, key_path):
+            if not os.path.exists(path):
+                open(path, "wb").close()
+        # an interrupted append can leave the two files out of step: keep the rows both have
+        n = min(os.path.getsize(vec_path) // row_bytes, os.path.getsize(key_path) // _DIGEST)
+        for path, size in ((vec_path, n * row_bytes), (key_path, n * _DIGEST)):
+            if os.path.getsize(path) != size:
+                os.truncate(path, size)
+        with open(key_path, "rb") as f:
+            keys = f.read()
+        self._rows = {keys[i * _DIGEST:(i + 1) * _DIGEST]: i for i in range(n)}
+        self._vec_path = vec_path
+        self._vec_file = open(vec_path, "ab")
+        self._key_file = open(key_path, "ab")
+        self._remap()
+
+    def _remap(self) -> None:
+        n = len(self._rows)
+        self._map = np.memmap(self._vec_path, dtype=np.float32, mode="r", shape=(n, self.dim)) if n else None
+
+    def key(self, text: str) -> bytes:
+        return hashlib.sha1(f"{self.model}\0{text}".encode("utf-8")).digest()
+
+    def _remember(self, key: bytes, vec: np.ndarray) -> None:
+        if key in self._lru:
+            self._lru.move_to_end(key)
+            return
+        self._lru[key] = vec
+        self._bytes += vec.nbytes
+        while self._bytes > self.max_bytes and self._lru:
+            _, old = self._lru.popitem(last=False)
+            self._bytes -= old.nbytes
+            self.evictions += 1
+
+    def get(self, text: str) -> Optional[List[float]]:
+        key = self.key(text)
+        with self._lock:
+            vec = self._lru.get(key)
+            if vec is not None:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return vec.tolist()
+            row = self._rows.get(key)
+            if row is None:
+                self.misses += 1
+                return None
+            if self._map is None or row >= len(self._map):
+                self._remap()
+            vec = np.array(self._map[row])
+            self.disk_hits += 1
+            self._remember(key, vec)
+            return vec.tolist()
+
+    def put(self, text: str, vector: Sequence[float]) -> None:
+        vec = np.asarray(vector, dtype=np.float32)
+        if vec.shape != (self.dim,):
+            return
+        key = self.key(text)
+        with self._lock:
+            self._remember(key, vec)
+            if self._vec_file is not None and key not in self._rows:
+                self._vec_file.write(vec.tobytes())
+                self._vec_file.flush()
+                self._key_file.write(key)
+                self._key_file.flush()
+                self._rows[key] = len(self._rows)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "memory_bytes": self._bytes,
+            "memory_entries": len(self._lru),
+            "disk_entries": len(self._rows),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            for f in (self._vec_file, self._key_file):
+                if f is not None:
+                    f.close()
+            self._vec_file = self._key_file = None
+            self._map = None
+
+
+class CachedEmbedder:
+    """Wrap an embedder (callable + `embed(texts)`) so repeated texts skip the model."""
+
+    def __init__(self, embedder: Any, cache: EmbeddingCache):
+        self.embedder = embedder
+        self.cache = cache
+        self.dim = cache.dim
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        out: List[Optional[List[float]]] = [self.cache.get(t) for t in texts]
+        todo = [i for i, v in enumerate(out) if v is None]
+        if todo:
+            for i, vec in zip(todo, self.embedder.embed([texts[i] for i in todo])):
+                self.cache.put(texts[i], vec)
+                out[i] = vec
+        return out  # type: ignore[return-value]
+
+    def __call__(self, text: str) -> List[float]:
+        vec = self.cache.get(text)
+        if vec is None:
+            vec = self.embedder(text)
+            self.cache.put(text, vec)
+        return vec
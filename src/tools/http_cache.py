@@ -0,0 +1,152 @@
+"""Persistent HTTP response cache (SQLite) for web research lookups.
+
+Entries are keyed by URL plus sorted query params, expire after a per-host TTL and are then
+revalidated with If-None-Match / If-Modified-Since. The file is kept under a byte budget by
+evicting the least recently used entries. In offline mode only cached bodies are served.
+"""
+from __future__ import annotations
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+HTTP_CACHE_PATH = os.getenv("HTTP_CACHE_PATH", "data/http_cache.sqlite")  # empty disables
+HTTP_CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+HTTP_CACHE_OFFLINE = os.getenv("HTTP_CACHE_OFFLINE", "0") == "1"
+HTTP_CACHE_DEFAULT_TTL = float(os.getenv("HTTP_CACHE_TTL", "3600"))
+# Per-source freshness: encyclopedia summaries change slowly, occurrence media more often
+HTTP_CACHE_TTLS: Dict[str, float] = {
+    "wikipedia.org": float(os.getenv("HTTP_CACHE_TTL_WIKIPEDIA", str(7 * 24 * 3600))),
+    "gbif.org": float(os.getenv("HTTP_CACHE_TTL_GBIF", str(24 * 3600))),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS http_cache (
+    key TEXT PRIMARY KEY,
+    url TEXT,
+    body BLOB,
+    etag TEXT,
+    last_modified TEXT,
+    expires REAL,
+    accessed REAL,
+    size INTEGER
+)
+"""
+
+
+class OfflineCacheMiss(LookupError):
+    """Offline mode and the response is not cached."""
+
+
+def ttl_for(url: str) -> float:
+    host = urlsplit(url).netloc.lower()
+    for suffix, ttl in HTTP_CACHE_TTLS.items():
+        if host == suffix or host.endswith("." + suffix):
+            return ttl
+    return HTTP_CACHE_DEFAULT_TTL
+
+
+def cache_key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Stable key: scheme/host lowercased, query params (from the URL and `params`) sorted."""
+    parts = urlsplit(url)
+    query = [tuple(kv.split("=", 1)) if "=" in kv else (kv, "") for kv in parts.query.split("&") if kv]
+    for k, v in (params or {}).items():
+        for item in v if isinstance(v, (list, tuple)) else [v]:
+            if item is not None:
+                query.append((k, str(item)))
+    norm = f"{parts.scheme.lower()}://{parts.netloc.lower()}{parts.path}?{urlencode(sorted(query))}"
+    return hashlib.sha1(norm.encode("utf-8")).hexdigest()
+
+
+class HttpCache:
+    def __init__(self, path: str = HTTP_CACHE_PATH, max_bytes: int = HTTP_CACHE_MAX_BYTES):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.max_bytes = max_bytes
+        self._db = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(_SCHEMA)
+        self._db.execute("CREATE INDEX IF NOT EXISTS http_cache_accessed ON http_cache (accessed)")
+        self._lock = threading.Lock()
+        self._bytes = self._db.execute("SELECT coalesce(sum(size), 0) FROM http_cache").fetchone()[0]
+        self.hits = self.revalidated = self.misses = self.evictions = 0
+
+    def lookup(self, key: str) -> Optional[Tuple[bytes, bool, Dict[str, str]]]:
+        """(body, fresh, conditional-request headers) for a cached response, else None."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT body, etag, last_modified, expires FROM http_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE http_cache SET accessed = ? WHERE key = ?", (now, key))
+        body, etag, last_modified, expires = row
+        validators = {}
+        if etag:
+            validators["If-None-Match"] = etag
+        if last_modified:
+            validators["If-Modified-Since"] = last_modified
+        fresh = expires > now
+        if fresh:
+            self.hits += 1
+        return body, fresh, validators
+
+    def refresh(self, key: str, ttl: float) -> None:
+        """A 304 confirmed the cached body: extend its freshness."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("UPDATE http_cache SET expires = ?, accessed = ? WHERE key = ?", (now + ttl, now, key))
+            self.revalidated += 1
+
+    def store(self, key: str, url: str, body: bytes, etag: Optional[str], last_modified: Optional[str], ttl: float) -> None:
+        now = time.time()
+        with self._lock:
+            old = self._db.execute("SELECT size FROM http_cache WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO http_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, body, etag, last_modified, now + ttl, now, len(body)),
+            )
+            self._bytes += len(body) - (old[0] if old else 0)
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until 90% of the budget is free (caller holds the lock)."""
+        target = int(self.max_bytes * 0.9)
+        freed = 0
+        doomed = []
+        for key, size in self._db.execute("SELECT key, size FROM http_cache ORDER BY accessed"):
+            if self._bytes - freed <= target:
+                break
+            doomed.append((key,))
+            freed += size
+        self._db.executemany("DELETE FROM http_cache WHERE key = ?", doomed)
+        self._bytes -= freed
+        self.evictions += len(doomed)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "bytes": self._bytes,
+        }
+
+
+_CACHE: Optional[HttpCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_http_cache() -> Optional[HttpCache]:
+    """Process-wide cache, or None when HTTP_CACHE_PATH is empty."""
+    global _CACHE
+    if not HTTP_CACHE_PATH:
+        return None
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = HttpCache()
+        return _CACHE
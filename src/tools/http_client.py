@@ -0,0 +1,125 @@
+"""Shared async HTTP client for web research: pooled (HTTP/2 when h2 is installed), per-host
+concurrency limits and jittered exponential backoff. Lives on the src.tools.aio loop."""
+from __future__ import annotations
+import asyncio
+import atexit
+import json
+import os
+import random
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from src.tools import aio
+from src.tools.http_cache import HTTP_CACHE_OFFLINE, OfflineCacheMiss, cache_key, get_http_cache, ttl_for
+
+USER_AGENT = os.getenv("HTTP_USER_AGENT", "under-threat-bot/0.1")
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "64"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "32"))
+HTTP_PER_HOST = int(os.getenv("HTTP_PER_HOST", "8"))  # concurrent requests per host
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.25"))  # seconds
+HTTP_BACKOFF_CAP = float(os.getenv("HTTP_BACKOFF_CAP", "4"))
+
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+
+_CLIENT: Optional[httpx.AsyncClient] = None
+_HOST_LIMITS: Dict[str, asyncio.Semaphore] = {}
+
+
+def _http2() -> bool:
+    try:
+        import h2  # noqa: F401  (httpx needs it for HTTP/2)
+        return True
+    except ImportError:
+        return False
+
+
+def get_client() -> httpx.AsyncClient:
+    """The process-wide client; call from coroutines running on the aio loop."""
+    global _CLIENT
+    if _CLIENT is None:
+        _CLIENT = httpx.AsyncClient(
+            http2=_http2(),
+            headers={"User-Agent": USER_AGENT},
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_KEEPALIVE, keepalive_expiry=60
+            ),
+            timeout=httpx.Timeout(20, connect=5),
+        )
+    return _CLIENT
+
+
+def _host_limit(url: str) -> asyncio.Semaphore:
+    host = urlsplit(url).netloc
+    if host not in _HOST_LIMITS:
+        _HOST_LIMITS[host] = asyncio.Semaphore(HTTP_PER_HOST)
+    return _HOST_LIMITS[host]
+
+
+def _backoff(attempt: int, retry_after: Optional[str]) -> float:
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), HTTP_BACKOFF_CAP)
+    # full jitter: spreads retries from concurrent callers instead of synchronizing them
+    return random.uniform(0, min(HTTP_BACKOFF_CAP, HTTP_BACKOFF_BASE * 2 ** attempt))
+
+
+async def get(url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None, timeout: float = 20) -> httpx.Response:
+    """GET with retries on transport errors, 429 and 5xx; other statuses are returned as is.
+
+    The per-host slot is held only while a request is in flight, not during backoff.
+    """
+    client = get_client()
+    limit = _host_limit(url)
+    for attempt in range(HTTP_RETRIES + 1):
+        try:
+            async with limit:
+                r = await client.get(url, params=params, headers=headers, timeout=timeout)
+        except httpx.TransportError:
+            if attempt == HTTP_RETRIES:
+                raise
+            await asyncio.sleep(_backoff(attempt, None))
+            continue
+        if r.status_code not in _RETRY_STATUS or attempt == HTTP_RETRIES:
+            return r
+        await asyncio.sleep(_backoff(attempt, r.headers.get("Retry-After")))
+    raise AssertionError("unreachable")
+
+
+async def get_json(url: str, params: Optional[Dict[str, Any]] = None, timeout: float = 20) -> Any:
+    """GET a JSON document through the persistent response cache (see src.tools.http_cache)."""
+    cache = get_http_cache()
+    if cache is None:
+        if HTTP_CACHE_OFFLINE:
+            raise OfflineCacheMiss(url)
+        r = await get(url, params=params, timeout=timeout)
+        r.raise_for_status()
+        return r.json()
+    key = cache_key(url, params)
+    cached = await asyncio.to_thread(cache.lookup, key)  # SQLite: keep it off the event loop
+    if cached and (cached[1] or HTTP_CACHE_OFFLINE):
+        return json.loads(cached[0])
+    if HTTP_CACHE_OFFLINE:
+        raise OfflineCacheMiss(url)
+    r = await get(url, params=params, headers=cached[2] if cached else None, timeout=timeout)
+    if r.status_code == 304 and cached:
+        await asyncio.to_thread(cache.refresh, key, ttl_for(url))
+        return json.loads(cached[0])
+    r.raise_for_status()
+    data = r.json()
+    await asyncio.to_thread(
+        cache.store, key, url, r.content, r.headers.get("ETag"), r.headers.get("Last-Modified"), ttl_for(url)
+    )
+    return data
+
+
+def _close() -> None:
+    if _CLIENT is not None:
+        try:
+            aio.run(_CLIENT.aclose(), timeout=5)
+        except Exception:
+            pass
+
+
+atexit.register(_close)
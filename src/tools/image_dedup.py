@@ -0,0 +1,224 @@
+"""Near-duplicate image collapse: dHash of each thumbnail, persisted per URL and clustered per taxon.
+
+Every hashed URL is stored with its taxon and the canonical URL of its cluster, so an image is
+fetched and hashed once and later runs keep collapsing onto the same representative. Lookups use
+band buckets: a hash is split into IMAGE_HASH_MAX_DISTANCE + 1 bit bands, and by pigeonhole any
+hash within that Hamming distance shares at least one band exactly, so only colliding buckets
+are compared.
+"""
+from __future__ import annotations
+import asyncio
+import io
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.tools import http_client
+
+IMAGE_HASH_DB = os.getenv("IMAGE_HASH_DB", "data/image_hashes.sqlite")
+IMAGE_HASH_MAX_DISTANCE = int(os.getenv("IMAGE_HASH_MAX_DISTANCE", "4"))  # Hamming bits out of 64
+IMAGE_HASH_WORKERS = int(os.getenv("IMAGE_HASH_WORKERS", "4"))
+IMAGE_HASH_INDEX_MAX = int(os.getenv("IMAGE_HASH_INDEX_MAX", "1024"))  # taxa whose HashIndex stays in memory
+# Resized copy to hash instead of the original; {url} is the percent-encoded image URL, empty fetches the original
+GBIF_THUMBNAIL = os.getenv("GBIF_THUMBNAIL", "https://api.gbif.org/v1/image/unsafe/fit-in/128x/{url}")
+
+_POOL = ThreadPoolExecutor(max_workers=IMAGE_HASH_WORKERS, thread_name_prefix="imghash")
+
+_SCHEMA = "CREATE TABLE IF NOT EXISTS image_hash (url TEXT PRIMARY KEY, taxon TEXT, hash INTEGER, canonical TEXT)"
+
+
+def pil_available() -> bool:
+    try:
+        import PIL  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def dhash(data: bytes) -> int:
+    """64-bit difference hash: 9x8 grayscale, one bit per horizontally adjacent pixel pair."""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as im:
+        im.draft("L", (64, 64))  # JPEG: decode at reduced scale
+        px = list(im.convert("L").resize((9, 8), Image.LANCZOS).getdata())
+    h = 0
+    for row in range(8):
+        for col in range(8):
+            h = (h << 1) | (px[row * 9 + col] > px[row * 9 + col + 1])
+    return h
+
+
+def _bands(max_distance: int) -> List[Tuple[int, int]]:
+    n = max_distance + 1
+    widths = [64 // n + (1 if i < 64 % n else 0) for i in range(n)]
+    out, shift = [], 0
+    for w in widths:
+        out.append((shift, (1 << w) - 1))
+        shift += w
+    return out
+
+
+class HashIndex:
+    """Canonical hashes of one taxon, bucketed by band for near-constant-time near-duplicate lookup."""
+
+    def __init__(self, max_distance: int = IMAGE_HASH_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self._bands = _bands(max_distance)
+        self._buckets: Dict[Tuple[int, int], List[Tuple[int, str]]] = {}
+
+    def add(self, h: int, url: str) -> None:
+        for i, (shift, mask) in enumerate(self._bands):
+            self._buckets.setdefault((i, (h >> shift) & mask), []).append((h, url))
+
+    def find(self, h: int) -> Optional[str]:
+        """URL of a canonical image within max_distance of `h`, if any."""
+        for i, (shift, mask) in enumerate(self._bands):
+            for other, url in self._buckets.get((i, (h >> shift) & mask), ()):
+                if bin(h ^ other).count("1") <= self.max_distance:
+                    return url
+        return None
+
+
+def _to_sql(h: int) -> int:
+    return h - (1 << 64) if h >= 1 << 63 else h  # SQLite integers are signed 64-bit
+
+
+def _from_sql(v: int) -> int:
+    return v + (1 << 64) if v < 0 else v
+
+
+class ImageHashStore:
+    """Hashes per URL in SQLite, plus an in-memory HashIndex of canonicals for recently used taxa.
+
+    `taxon` is the key clusters are shared under: the resolved taxon_id where there is one.
+    """
+
+    def __init__(self, path: str = IMAGE_HASH_DB, max_indexes: int = IMAGE_HASH_INDEX_MAX):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(_SCHEMA)
+        self._db.execute("CREATE INDEX IF NOT EXISTS image_hash_taxon ON image_hash (taxon)")
+        self._lock = threading.Lock()
+        self._indexes: "OrderedDict[str, HashIndex]" = OrderedDict()
+        self._max_indexes = max_indexes
+
+    def known(self, urls: List[str]) -> Dict[str, Tuple[int, str]]:
+        """(hash, canonical url) of whichever `urls` were hashed before."""
+        if not urls:
+            return {}
+        marks = ",".join("?" * len(urls))
+        with self._lock:
+            rows = self._db.execute(f"SELECT url, hash, canonical FROM image_hash WHERE url IN ({marks})", urls).fetchall()
+        return {url: (_from_sql(h), canonical) for url, h, canonical in rows}
+
+    def taxon_index(self, taxon: str) -> HashIndex:
+        """Canonical hashes of `taxon`; read from SQLite on first use, then kept current by put_many."""
+        with self._lock:
+            index = self._indexes.get(taxon)
+            if index is not None:
+                self._indexes.move_to_end(taxon)
+                return index
+            rows = self._db.execute("SELECT url, hash FROM image_hash WHERE taxon = ? AND url = canonical", (taxon,)).fetchall()
+            index = HashIndex()
+            for url, h in rows:
+                index.add(_from_sql(h), url)
+            self._indexes[taxon] = index
+            if len(self._indexes) > self._max_indexes:
+                self._indexes.popitem(last=False)
+            return index
+
+    def put_many(self, taxon: str, rows: List[Tuple[str, int, str]]) -> None:
+        """Record (url, hash, canonical url) rows for `taxon`; new canonicals join its in-memory index."""
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO image_hash VALUES (?, ?, ?, ?)", [(url, taxon, _to_sql(h), canon) for url, h, canon in rows]
+            )
+            index = self._indexes.get(taxon)
+            if index is not None:
+                for url, h, canon in rows:
+                    if url == canon:
+                        index.add(h, url)
+
+
+_STORE: Optional[ImageHashStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_hash_store() -> ImageHashStore:
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = ImageHashStore()
+        return _STORE
+
+
+def _thumbnail(img: Dict[str, Any]) -> str:
+    if img.get("thumbnail_url"):
+        return img["thumbnail_url"]
+    if img.get("source") == "GBIF" and GBIF_THUMBNAIL:
+        from urllib.parse import quote
+        return GBIF_THUMBNAIL.format(url=quote(img["url"], safe=""))
+    return img["url"]
+
+
+async def _hash_one(img: Dict[str, Any]) -> Optional[int]:
+    try:
+        r = await http_client.get(_thumbnail(img), timeout=10)
+        r.raise_for_status()
+        return await asyncio.get_running_loop().run_in_executor(_POOL, dhash, r.content)
+    except Exception:
+        return None  # unhashable images are kept and retried next time
+
+
+async def collapse_near_duplicates(taxon: str, images: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Drop images that repeat an earlier one by URL or perceptual hash, keeping the first of each cluster.
+
+    `taxon` keys the stored clusters (pass the resolved taxon_id). Without Pillow only exact-URL
+    duplicates are dropped.
+    """
+    unique: List[Dict[str, Any]] = []
+    seen = set()
+    for im in images:
+        u = im.get("url")
+        if u and u not in seen:
+            seen.add(u)
+            unique.append(im)
+    if not pil_available() or len(unique) < 2:
+        return unique
+
+    store = get_hash_store()
+    # the store is SQLite: its calls run in a worker thread, not on the event loop
+    known = await asyncio.to_thread(store.known, [im["url"] for im in unique])
+    todo = [im for im in unique if im["url"] not in known]
+    hashes = await asyncio.gather(*(_hash_one(im) for im in todo))
+    fresh = {im["url"]: h for im, h in zip(todo, hashes) if h is not None}
+
+    index = await asyncio.to_thread(store.taxon_index, taxon)
+    batch = HashIndex(index.max_distance)  # this call's new canonicals; put_many adds them to `index`
+    new_rows: List[Tuple[str, int, str]] = []
+    kept: List[Dict[str, Any]] = []
+    used = set()
+    for im in unique:
+        url = im["url"]
+        if url in known:
+            canon = known[url][1]
+        elif url in fresh:
+            h = fresh[url]
+            canon = index.find(h) or batch.find(h)
+            if canon is None:
+                batch.add(h, url)
+                canon = url
+            new_rows.append((url, h, canon))
+        else:
+            canon = url
+        if canon not in used:
+            used.add(canon)
+            kept.append(im)
+    if new_rows:
+        await asyncio.to_thread(store.put_many, taxon, new_rows)
+    return kept
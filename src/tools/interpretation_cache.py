@@ -0,0 +1,185 @@
+"""Interpreter output cache: exact hits on normalized text, near hits by query-embedding similarity.
+
+Entries persist in SQLite under a fingerprint of the prompt and models; opening the cache with a
+different fingerprint drops the old entries. The similarity index is an in-memory matrix of unit
+vectors for the INTERP_CACHE_MAX most recently used queries, scanned with one matrix-vector product.
+"""
+from __future__ import annotations
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.data.keyword_index import tokenize
+from src.data.name_index import normalize_name
+
+INTERP_CACHE_DB = os.getenv("INTERP_CACHE_DB", "data/interp_cache.sqlite")  # empty: memory only
+INTERP_CACHE_MAX = int(os.getenv("INTERP_CACHE_MAX", "4096"))
+# Cosine similarity above which a past query's parse is reused for a reworded one
+INTERP_CACHE_MIN_SIMILARITY = float(os.getenv("INTERP_CACHE_MIN_SIMILARITY", "0.92"))
+
+_SCHEMA = """CREATE TABLE IF NOT EXISTS interp_cache (
+    key TEXT PRIMARY KEY, fingerprint TEXT, taxa TEXT, output TEXT, embedding BLOB, accessed REAL)"""
+
+# Entry: (taxa mentioned in the query, output fields, slot in the vector matrix or None)
+Entry = Tuple[Optional[List[int]], Dict[str, Any], Optional[int]]
+
+
+class InterpretationCache:
+    """Parses keyed by normalize_name(query).
+
+    A near hit also requires the new query to mention the same taxa as the cached one, so
+    "status of lion" never reuses the parse of "status of tiger" however close the embeddings are.
+    When no taxon is recognized (the usual case on the LLM path) the non-stopword terms of both
+    queries must match instead, since the species then only shows up as plain words.
+    """
+
+    def __init__(
+        self,
+        fingerprint: str,
+        embed: Optional[Callable[[str], Sequence[float]]] = None,
+        path: str = INTERP_CACHE_DB,
+        max_entries: int = INTERP_CACHE_MAX,
+        min_similarity: float = INTERP_CACHE_MIN_SIMILARITY,
+    ):
+        self.fingerprint = fingerprint
+        self.embed = embed
+        self.max_entries = max_entries
+        self.min_similarity = min_similarity
+        self._lru: "OrderedDict[str, Entry]" = OrderedDict()
+        self._vecs: Optional[np.ndarray] = None  # (max_entries, dim), row per slot
+        self._slot_keys: List[Optional[str]] = []
+        self._free: List[int] = []
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits = self.near_hits = self.misses = 0
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(_SCHEMA)
+            # a new prompt, LLM or embedding model makes every stored parse suspect
+            self._db.execute("DELETE FROM interp_cache WHERE fingerprint != ?", (fingerprint,))
+            rows = self._db.execute(
+                "SELECT key, taxa, output, embedding FROM interp_cache ORDER BY accessed DESC LIMIT ?", (max_entries,)
+            ).fetchall()
+            for key, taxa, output, blob in reversed(rows):
+                vec = np.frombuffer(blob, dtype=np.float32) if blob else None
+                self._insert(key, json.loads(taxa), json.loads(output), vec)
+
+    def _slot(self, vec: np.ndarray) -> Optional[int]:
+        if self._vecs is None:
+            self._vecs = np.zeros((self.max_entries, vec.shape[0]), dtype=np.float32)
+            self._slot_keys = [None] * self.max_entries
+            self._free = list(range(self.max_entries - 1, -1, -1))
+        if vec.shape[0] != self._vecs.shape[1] or not self._free:
+            return None
+        slot = self._free.pop()
+        self._vecs[slot] = vec
+        return slot
+
+    def _insert(self, key: str, taxa: Optional[List[int]], output: Dict[str, Any], vec: Optional[np.ndarray]) -> None:
+        if key in self._lru:
+            self._drop(key)
+        while len(self._lru) >= self.max_entries:
+            self._drop(next(iter(self._lru)))
+        slot = self._slot(vec) if vec is not None else None
+        if slot is not None:
+            self._slot_keys[slot] = key
+        self._lru[key] = (taxa, output, slot)
+
+    def _drop(self, key: str) -> None:
+        _, _, slot = self._lru.pop(key)
+        if slot is not None:
+            self._slot_keys[slot] = None
+            self._vecs[slot] = 0.0
+            self._free.append(slot)
+
+    def _vector(self, text: str) -> Optional[np.ndarray]:
+        if self.embed is None:
+            return None
+        try:
+            vec = np.asarray(self.embed(text), dtype=np.float32)
+        except Exception:
+            return None
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm else None
+
+    def get(self, text: str, taxa: Optional[List[int]]) -> Tuple[Optional[Dict[str, Any]], Optional[np.ndarray]]:
+        """(cached output or None, query vector to pass back to put())."""
+        key = normalize_name(text)
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                self._touch(key)
+                return entry[1], None
+        vec = self._vector(text)
+        with self._lock:
+            if vec is not None and self._vecs is not None and vec.shape[0] == self._vecs.shape[1]:
+                sims = self._vecs @ vec  # free slots are zero rows
+                for slot in np.argsort(-sims)[:8].tolist():
+                    if sims[slot] < self.min_similarity:
+                        break
+                    other = self._slot_keys[slot]
+                    if other is not None and self._same_subject(other, key, taxa):
+                        self._lru.move_to_end(other)
+                        self.near_hits += 1
+                        self._touch(other)
+                        return self._lru[other][1], vec
+            self.misses += 1
+        return None, vec
+
+    def _same_subject(self, cached_key: str, key: str, taxa: Optional[List[int]]) -> bool:
+        if taxa:
+            return self._lru[cached_key][0] == taxa
+        return set(tokenize(cached_key)) == set(tokenize(key))
+
+    def _touch(self, key: str) -> None:
+        if self._db is not None:
+            self._db.execute("UPDATE interp_cache SET accessed = ? WHERE key = ?", (time.time(), key))
+
+    def put(self, text: str, taxa: Optional[List[int]], output: Dict[str, Any], vec: Optional[np.ndarray] = None) -> None:
+        key = normalize_name(text)
+        if vec is None:
+            vec = self._vector(text)
+        with self._lock:
+            self._insert(key, taxa, output, vec)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO interp_cache VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, self.fingerprint, json.dumps(taxa), json.dumps(output), vec.tobytes() if vec is not None else None, time.time()),
+                )
+                if len(self._lru) >= self.max_entries:
+                    self._db.execute(
+                        "DELETE FROM interp_cache WHERE key NOT IN (SELECT key FROM interp_cache ORDER BY accessed DESC LIMIT ?)",
+                        (self.max_entries,),
+                    )
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.near_hits + self.misses
+        return {
+            "hits": self.hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.near_hits) / lookups if lookups else 0.0,
+            "entries": len(self._lru),
+        }
+
+
+_CACHES: Dict[str, InterpretationCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_interpretation_cache(fingerprint: str, embed: Optional[Callable[[str], Sequence[float]]] = None) -> InterpretationCache:
+    """The process-wide cache for one prompt/model fingerprint."""
+    with _CACHES_LOCK:
+        if fingerprint not in _CACHES:
+            _CACHES[fingerprint] = InterpretationCache(fingerprint, embed)
+        return _CACHES[fingerprint]
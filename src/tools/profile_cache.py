@@ -0,0 +1,202 @@
+"""Profile cache for DBManager: an in-process TTL/LRU tier over an optional SQLite tier shared by workers."""
+from __future__ import annotations
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+PROFILE_CACHE_TTL = float(os.getenv("PROFILE_CACHE_TTL", "600"))
+PROFILE_CACHE_MAX = int(os.getenv("PROFILE_CACHE_MAX", "1024"))
+# Shared tier for multi-worker deployments, e.g. data/profile_cache.sqlite; empty keeps the cache per process
+PROFILE_CACHE_DB = os.getenv("PROFILE_CACHE_DB", "")
+# How often a worker picks up invalidations made by other workers (seconds)
+PROFILE_CACHE_SYNC_SECS = float(os.getenv("PROFILE_CACHE_SYNC_SECS", "1"))
+
+_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS profile_cache (
+        ns TEXT, taxon_id INTEGER, variant TEXT, payload TEXT, expires REAL,
+        PRIMARY KEY (ns, taxon_id, variant))""",
+    # taxon_id NULL = whole namespace
+    "CREATE TABLE IF NOT EXISTS profile_invalidation (seq INTEGER PRIMARY KEY AUTOINCREMENT, ns TEXT, taxon_id INTEGER, at REAL)",
+]
+
+
+class ProfileCache:
+    """Profile dicts keyed by (taxon_id, variant), where variant encodes what the task needs (e.g. occurrences).
+
+    Invalidation drops the taxon from this process and, with the shared tier, records it there so
+    other workers drop it too on their next sync. Records older than the TTL are pruned: every
+    entry stored before them has expired by then.
+
+    A profile computed while an invalidation lands may predate it, so callers take `generation()`
+    before reading the database and pass it to `put_many()`, which skips the write if any
+    invalidation was seen since.
+    """
+
+    def __init__(self, namespace: str, ttl: float = PROFILE_CACHE_TTL, max_entries: int = PROFILE_CACHE_MAX, db_path: str = PROFILE_CACHE_DB):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lru: "OrderedDict[Tuple[int, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._seen_seq = 0
+        self._generation = 0
+        self._synced = 0.0
+        self._puts = 0
+        self.hits = self.shared_hits = self.misses = 0
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(db_path, timeout=5, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            for ddl in _SCHEMA:
+                self._db.execute(ddl)
+            try:  # logs created before records carried a timestamp
+                self._db.execute("ALTER TABLE profile_invalidation ADD COLUMN at REAL")
+            except sqlite3.OperationalError:
+                pass
+            self._seen_seq = self._db.execute("SELECT coalesce(max(seq), 0) FROM profile_invalidation").fetchone()[0]
+
+    def _sync(self, now: float, force: bool = False) -> None:
+        """Apply invalidations other workers recorded since the last sync (caller holds the lock)."""
+        if self._db is None or (not force and now - self._synced < PROFILE_CACHE_SYNC_SECS):
+            return
+        self._synced = now
+        rows = self._db.execute(
+            "SELECT seq, taxon_id FROM profile_invalidation WHERE ns = ? AND seq > ? ORDER BY seq", (self.namespace, self._seen_seq)
+        ).fetchall()
+        for seq, taxon_id in rows:
+            self._drop_local(taxon_id)
+            self._seen_seq = seq
+
+    def _drop_local(self, taxon_id: Optional[int]) -> None:
+        self._generation += 1
+        if taxon_id is None:
+            self._lru.clear()
+        else:
+            for key in [k for k in self._lru if k[0] == taxon_id]:
+                del self._lru[key]
+
+    def generation(self) -> int:
+        """Invalidation counter; take it before computing profiles to put later."""
+        with self._lock:
+            return self._generation
+
+    def get_many(self, taxon_ids: Iterable[int], variant: str) -> Dict[int, Dict[str, Any]]:
+        """Cached profiles for whichever of `taxon_ids` have one."""
+        now = time.time()
+        out: Dict[int, Dict[str, Any]] = {}
+        with self._lock:
+            self._sync(now)
+            missing: List[int] = []
+            for tid in taxon_ids:
+                entry = self._lru.get((tid, variant))
+                if entry and entry[0] > now:
+                    self._lru.move_to_end((tid, variant))
+                    out[tid] = entry[1]
+                    self.hits += 1
+                else:
+                    missing.append(tid)
+            if missing and self._db is not None:
+                marks = ",".join("?" * len(missing))
+                for tid, payload, expires in self._db.execute(
+                    f"SELECT taxon_id, payload, expires FROM profile_cache WHERE ns = ? AND variant = ? AND expires > ? AND taxon_id IN ({marks})",
+                    (self.namespace, variant, now, *missing),
+                ).fetchall():
+                    out[tid] = json.loads(payload)
+                    self._store_local((tid, variant), expires, out[tid])
+                    self.shared_hits += 1
+            self.misses += sum(1 for tid in missing if tid not in out)
+        return out
+
+    def _store_local(self, key: Tuple[int, str], expires: float, value: Dict[str, Any]) -> None:
+        self._lru[key] = (expires, value)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def put_many(self, profiles: Dict[int, Dict[str, Any]], variant: str, generation: Optional[int] = None) -> None:
+        """Store computed profiles, unless an invalidation was seen after `generation()` returned `generation`."""
+        if not profiles:
+            return
+        now = time.time()
+        expires = now + self.ttl
+        with self._lock:
+            if self._db is None:
+                if generation is None or generation == self._generation:
+                    for tid, value in profiles.items():
+                        self._store_local((tid, variant), expires, value)
+                return
+            # the check and the write share one write transaction, so no invalidation slips in between
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._sync(now, force=generation is not None)
+                if generation is not None and generation != self._generation:
+                    self._db.execute("COMMIT")
+                    return
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO profile_cache VALUES (?, ?, ?, ?, ?)",
+                    [(self.namespace, tid, variant, json.dumps(v, default=str), expires) for tid, v in profiles.items()],
+                )
+                self._puts += 1
+                if self._puts % 256 == 0:
+                    self._db.execute("DELETE FROM profile_cache WHERE expires < ?", (now,))
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            for tid, value in profiles.items():
+                self._store_local((tid, variant), expires, value)
+
+    def invalidate(self, taxon_ids: Optional[Iterable[int]] = None) -> None:
+        """Forget the given taxa (all of them if None) here and in the shared tier."""
+        ids: List[Optional[int]] = [None] if taxon_ids is None else list(taxon_ids)
+        now = time.time()
+        with self._lock:
+            for tid in ids:
+                self._drop_local(tid)
+            if self._db is not None:
+                seen = self._seen_seq
+                self._db.execute("BEGIN IMMEDIATE")
+                try:
+                    self._sync(now, force=True)  # so _seen_seq can skip past our own records below
+                    for tid in ids:
+                        if tid is None:
+                            self._db.execute("DELETE FROM profile_cache WHERE ns = ?", (self.namespace,))
+                        else:
+                            self._db.execute("DELETE FROM profile_cache WHERE ns = ? AND taxon_id = ?", (self.namespace, tid))
+                        self._seen_seq = self._db.execute(
+                            "INSERT INTO profile_invalidation (ns, taxon_id, at) VALUES (?, ?, ?)", (self.namespace, tid, now)
+                        ).lastrowid
+                    self._db.execute("DELETE FROM profile_cache WHERE expires < ?", (now,))
+                    self._db.execute("DELETE FROM profile_invalidation WHERE at < ? OR at IS NULL", (now - self.ttl,))
+                    self._db.execute("COMMIT")
+                except Exception:
+                    self._db.execute("ROLLBACK")
+                    self._seen_seq = seen
+                    raise
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+            "entries": len(self._lru),
+        }
+
+
+_CACHES: Dict[str, ProfileCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_profile_cache(namespace: str) -> ProfileCache:
+    """The process-wide cache for one backend ("duckdb", "postgres")."""
+    with _CACHES_LOCK:
+        if namespace not in _CACHES:
+            _CACHES[namespace] = ProfileCache(namespace)
+        return _CACHES[namespace]
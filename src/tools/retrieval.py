@@ -0,0 +1,60 @@
+"""Hybrid retrieval: vector and keyword searches run concurrently and are fused by reciprocal rank."""
+from __future__ import annotations
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+# RRF damping constant: larger values flatten the advantage of top ranks
+RRF_K = int(os.getenv("RRF_K", "60"))
+RETRIEVAL_WORKERS = int(os.getenv("RETRIEVAL_WORKERS", "8"))
+
+_POOL = ThreadPoolExecutor(max_workers=RETRIEVAL_WORKERS, thread_name_prefix="retrieval")
+
+Search = Callable[[], List[Dict[str, Any]]]
+
+
+def reciprocal_rank_fusion(ranked: Sequence[Sequence[Dict[str, Any]]], k: int = RRF_K, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Merge ranked result lists by sum(1 / (k + rank)); chunks are matched by id and keep their fields."""
+    scores: Dict[Any, float] = {}
+    docs: Dict[Any, Dict[str, Any]] = {}
+    for results in ranked:
+        for rank, doc in enumerate(results, 1):
+            key = doc.get("id", doc.get("text"))
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            docs.setdefault(key, doc)
+    order = sorted(scores, key=scores.__getitem__, reverse=True)[:limit]
+    return [{**docs[key], "score": scores[key]} for key in order]
+
+
+def hybrid_retrieve(vector_search: Optional[Search], keyword_search: Search, k: int) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Run both searches concurrently and fuse the top `k`; a failing search is reported, the other still used."""
+    futures = {"Keyword": _POOL.submit(keyword_search)}
+    if vector_search is not None:
+        futures["Vector"] = _POOL.submit(vector_search)
+    ranked: List[List[Dict[str, Any]]] = []
+    warnings: List[str] = []
+    for name, fut in futures.items():
+        try:
+            ranked.append(fut.result())
+        except Exception as e:
+            warnings.append(f"{name} retrieval failed: {e}")
+    return reciprocal_rank_fusion(ranked, limit=k), warnings
+
+
+async def hybrid_retrieve_async(
+    vector_search: Optional[Awaitable[List[Dict[str, Any]]]], keyword_search: Awaitable[List[Dict[str, Any]]], k: int
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """hybrid_retrieve for coroutines: both searches are awaited together on the caller's loop."""
+    searches = {"Keyword": keyword_search}
+    if vector_search is not None:
+        searches["Vector"] = vector_search
+    results = await asyncio.gather(*searches.values(), return_exceptions=True)
+    ranked: List[List[Dict[str, Any]]] = []
+    warnings: List[str] = []
+    for name, res in zip(searches, results):
+        if isinstance(res, BaseException):
+            warnings.append(f"{name} retrieval failed: {res}")
+        else:
+            ranked.append(res)
+    return reciprocal_rank_fusion(ranked, limit=k), warnings
@@ -0,0 +1,35 @@
+import duckdb
+import pytest
+
+_SCHEMA = [
+    "CREATE TABLE taxon (taxon_id BIGINT PRIMARY KEY, scientific_name VARCHAR, common_names VARCHAR[],"
+    " kingdom VARCHAR, phylum VARCHAR, class VARCHAR, \"order\" VARCHAR, family VARCHAR, genus VARCHAR)",
+    "CREATE TABLE image_asset (id BIGINT, taxon_id BIGINT, title VARCHAR, url VARCHAR, thumbnail_url VARCHAR,"
+    " width INTEGER, height INTEGER, format VARCHAR, license VARCHAR, attribution VARCHAR, source VARCHAR,"
+    " captured_on DATE, added_at TIMESTAMP DEFAULT current_timestamp)",
+]
+
+TAXA = [
+    (1, "Panthera leo", ["lion", "African lion"]),
+    (2, "Panthera tigris", ["tiger"]),
+    (3, "Diceros bicornis", ["black rhinoceros"]),
+]
+
+
+@pytest.fixture
+def duck_db(tmp_path, monkeypatch):
+    """A writable DuckDB file with a few taxa behind the DuckDB backend; yields its path."""
+    from src.agents import db_duckdb_agent
+
+    path = str(tmp_path / "db.duckdb")
+    con = duckdb.connect(path)
+    for ddl in _SCHEMA:
+        con.execute(ddl)
+    con.executemany("INSERT INTO taxon (taxon_id, scientific_name, common_names) VALUES (?, ?, ?)", TAXA)
+    con.close()
+    db_duckdb_agent.close_duckdb()
+    monkeypatch.setattr(db_duckdb_agent, "DUCK_PATH", path)
+    monkeypatch.setattr(db_duckdb_agent, "DUCK_READ_ONLY", False)
+    db_duckdb_agent._PROFILE_CACHE.invalidate()
+    yield path
+    db_duckdb_agent.close_duckdb()
@@ -0,0 +1,44 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.llm.batching import MicroBatcher
+
+
+def test_concurrent_submits_share_batches():
+    sizes = []
+    batcher = MicroBatcher(lambda items: sizes.append(len(items)) or [x * 2 for x in items], max_batch=8, max_wait_ms=50)
+    with ThreadPoolExecutor(8) as pool:
+        assert list(pool.map(batcher.submit, range(8))) == [x * 2 for x in range(8)]
+    assert sum(sizes) == 8 and max(sizes) > 1
+    batcher.close()
+
+
+def test_batch_errors_reach_every_caller():
+    def boom(items):
+        raise ValueError("bad batch")
+
+    batcher = MicroBatcher(boom, max_wait_ms=0)
+    with pytest.raises(ValueError):
+        batcher.submit(1)
+    batcher.close()
+
+
+def test_close_finishes_queued_work_and_stops_worker():
+    release = threading.Event()
+
+    def slow(items):
+        release.wait(5)
+        return items
+
+    batcher = MicroBatcher(slow, max_batch=1, max_wait_ms=0)
+    futures = [batcher.submit_async(i) for i in range(3)]
+    release.set()
+    batcher.close(timeout=5)
+    assert [f.result(timeout=0) for f in futures] == [0, 1, 2]
+    assert not batcher._worker.is_alive()
+    assert batcher._fn is None
+    with pytest.raises(RuntimeError):
+        batcher.submit(4)
+    batcher.close()  # idempotent
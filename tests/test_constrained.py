@@ -0,0 +1,132 @@
+import json
+
+import pytest
+
+from src.llm.constrained import JsonConstraint, _object, json_schema, token_budget
+
+SPEC = {
+    "task": {"enum": ["lookup", "map"]},
+    "entities": {"type": "array", "items": {"type": "string", "max_tokens": 3}, "max_items": 2},
+    "intent": {"type": "string", "max_tokens": 4},
+}
+
+
+class _Vocab:
+    """Single characters plus a few multi-character tokens; ids are list positions."""
+
+    def __init__(self, texts):
+        self.text = list(texts) + [""]
+        self.eos_id = len(texts)
+        self.by_text = {}
+        for tid, t in enumerate(texts):
+            self.by_text.setdefault(t, []).append(tid)
+        self.quote_ids = self.by_text.get('"', [])
+        self.body_ids = [tid for tid, t in enumerate(texts) if '"' not in t and "\\" not in t]
+        self.body_or_quote_ids = self.body_ids + self.quote_ids
+
+
+VOCAB = _Vocab(sorted(set('{}[]", :abcdefghijklmnopqrstuvwxyz_') | {"lion", "map", '"task"', ", "}))
+
+
+def _feed(text):
+    gen = _object(SPEC)
+    exp = next(gen)
+    for c in text:
+        try:
+            exp = gen.send(c)
+        except StopIteration:
+            return None
+    return exp
+
+
+def test_grammar_accepts_valid_output():
+    out = {"task": "map", "entities": ["lion", "tiger"], "intent": "where lions live"}
+    assert _feed(json.dumps(out)) is None
+
+
+def test_grammar_accepts_empty_array():
+    assert _feed(json.dumps({"task": "lookup", "entities": [], "intent": ""})) is None
+
+
+@pytest.mark.parametrize("bad", [
+    '{"task": "other"',  # not in the enum
+    '{"intent": ',  # keys come in spec order
+    '{"task": "map", "entities": ["a", "b", ',  # more than max_items
+])
+def test_grammar_rejects_invalid_output(bad):
+    with pytest.raises(ValueError):
+        _feed(bad)
+
+
+def _greedy(constraint, pick):
+    out = ""
+    for _ in range(200):
+        allowed = constraint.allowed()
+        if allowed == [VOCAB.eos_id]:
+            return out
+        tid = pick(allowed)
+        out += VOCAB.text[tid]
+        constraint.feed(VOCAB.text[tid])
+    raise AssertionError("generation did not finish")
+
+
+def test_constraint_forces_valid_json():
+    # prefer string bodies over closing quotes, so the token budgets have to end each value
+    def pick(allowed):
+        body = [t for t in allowed if t in VOCAB.body_ids and VOCAB.text[t] not in "{}[]:, "]
+        return max(body or allowed, key=lambda t: len(VOCAB.text[t]))
+
+    text = _greedy(JsonConstraint(SPEC, VOCAB), pick)
+    out = json.loads(text)
+    assert list(out) == ["task", "entities", "intent"]
+    assert out["task"] in ("lookup", "map")
+    assert len(out["entities"]) <= 2
+    assert len(text) <= token_budget(SPEC) * max(len(t) for t in VOCAB.text)
+
+
+def test_eos_only_after_closing_brace():
+    constraint = JsonConstraint({"intent": {"type": "string", "max_tokens": 2}}, VOCAB)
+    for ch in '{"intent": "ab"':
+        assert VOCAB.eos_id not in constraint.allowed()
+        constraint.feed(ch)
+    assert [VOCAB.text[t] for t in constraint.allowed()] == ["}"]
+    constraint.feed("}")
+    assert constraint.done and constraint.allowed() == [VOCAB.eos_id]
+
+
+def test_json_schema_budgets():
+    schema = json_schema(SPEC)
+    assert schema["required"] == ["task", "entities", "intent"]
+    assert schema["properties"]["entities"]["maxItems"] == 2
+    assert schema["properties"]["intent"]["maxLength"] == 16
+    assert schema["properties"]["task"]["enum"] == ["lookup", "map"]
+
+
+class _EchoingPipeline:
+    """Mimics a transformers text-generation pipeline: echoes the prompt unless return_full_text=False."""
+
+    task = "text-generation"
+    tokenizer = None
+
+    def __init__(self, completion):
+        self.completion = completion
+        self.calls = []
+
+    def __call__(self, prompts, **kwargs):
+        self.calls.append(kwargs)
+        full = kwargs.get("return_full_text", True)
+        return [[{"generated_text": (p if full else "") + self.completion}] for p in prompts]
+
+
+def test_unbatched_hf_constrained_llm_returns_only_the_json(monkeypatch):
+    pytest.importorskip("langchain_community")
+    from langchain_community.llms import HuggingFacePipeline
+
+    from src.llm import constrained, llm_config
+
+    gen = _EchoingPipeline('{"task": "lookup"}')
+    monkeypatch.setattr(llm_config, "get_llm", lambda provider, model: HuggingFacePipeline(pipeline=gen))
+    monkeypatch.setattr(constrained, "prefix_allowed_tokens_fn", lambda spec, tokenizer: None)
+    llm = llm_config.get_constrained_llm(SPEC, provider="HF_LOCAL", model="m")
+    assert json.loads(llm.invoke("Interpret: status of lion")) == {"task": "lookup"}
+    assert gen.calls[0]["max_new_tokens"] == token_budget(SPEC)
@@ -0,0 +1,39 @@
+from src.agents import db_duckdb_agent
+
+
+def _write(rows):
+    report, _ = db_duckdb_agent._write_image_assets({"rows": rows})
+    return {r["row"]: r for r in report["results"]}, report
+
+
+def _row(n, **kw):
+    return {"taxon_id": 1, "url": f"https://img.example/{n}.jpg", "license": "CC-BY", "attribution": "x", **kw}
+
+
+def test_bulk_upsert_reports_per_row(duck_db):
+    results, report = _write([
+        _row(0, width=640, captured_on="2021-05-01"),
+        _row(1, captured_on="2021-02-30"),  # invalid, must not sink the batch
+        _row(2, taxon_id=42),  # unknown taxon
+        _row(3, width=2**31),
+    ])
+    assert results[0]["status"] == "inserted"
+    assert [results[i]["status"] for i in (1, 2, 3)] == ["invalid"] * 3
+    assert results[2]["error"] == "unknown taxon_id"
+    assert report["inserted"] == 1 and report["invalid"] == 3
+
+    results, _ = _write([_row(0, title="again"), _row(4)])
+    assert [results[0]["status"], results[1]["status"]] == ["updated", "inserted"]
+    rows = db_duckdb_agent._cursor().execute(
+        "SELECT url, title, width, captured_on::VARCHAR FROM image_asset ORDER BY id"
+    ).fetchall()
+    assert rows == [
+        ("https://img.example/0.jpg", "again", None, None),
+        ("https://img.example/4.jpg", None, None, None),
+    ]
+
+
+def test_read_only_handle_refuses_writes(duck_db, monkeypatch):
+    monkeypatch.setattr(db_duckdb_agent, "DUCK_READ_ONLY", True)
+    report, warnings = db_duckdb_agent._write_image_assets({"rows": [_row(0)]})
+    assert report is None and "read-only" in warnings[0]
@@ -0,0 +1,65 @@
+from src.agents import db_duckdb_agent as duck
+
+
+def _setup(*statements):
+    cur = duck._cursor()
+    for sql in statements:
+        cur.execute(sql)
+    duck.close_duckdb()  # reopen so the backend sees the new tables
+
+
+def test_profile_sections_in_one_statement(duck_db):
+    _setup(
+        "CREATE TABLE assessment (taxon_id BIGINT, status VARCHAR, criteria VARCHAR, assessed_on DATE,"
+        " assessor VARCHAR, source VARCHAR, url VARCHAR, notes VARCHAR)",
+        "INSERT INTO assessment (taxon_id, status, assessed_on) VALUES (1, 'EN', '2008-01-01'), (1, 'VU', '2016-06-01')",
+        "CREATE TABLE habitat (taxon_id BIGINT, habitat_type VARCHAR, importance VARCHAR, source VARCHAR)",
+        "INSERT INTO habitat SELECT 1, 'savanna ' || i, NULL, NULL FROM range(20) t(i)",
+        "INSERT INTO image_asset (id, taxon_id, url, license, attribution) SELECT i, 1, 'https://img/' || i, 'CC0', 'x' FROM range(1, 15) t(i)",
+    )
+    (lion,) = duck._fetch_profiles([1], want_occ=False)
+    assert lion.scientific_name == "Panthera leo"
+    assert lion.common_names == ["lion", "African lion"]
+    assert lion.assessment["status"] == "VU"  # the latest assessment
+    assert len(lion.habitats) == 15
+    assert [im["url"] for im in lion.images] == [f"https://img/{i}" for i in range(14, 2, -1)]
+    assert lion.occurrence_count is None
+
+
+def test_absent_tables_leave_sections_empty(duck_db):
+    _setup("DROP TABLE image_asset")
+    (tiger,) = duck._fetch_profiles([2], want_occ=True)
+    assert tiger.scientific_name == "Panthera tigris"
+    assert tiger.assessment is None and tiger.habitats == [] and tiger.images == []
+
+
+def test_batch_keeps_request_order_and_drops_unknown_ids(duck_db):
+    profiles = duck._fetch_profiles([3, 99, 1], want_occ=False)
+    assert [p.taxon_id for p in profiles] == [3, 1]
+
+
+def test_cached_profiles_query_only_misses(duck_db, monkeypatch):
+    assert [p.taxon_id for p in duck._cached_profiles([1, 2], False)] == [1, 2]
+    asked = []
+    real = duck._fetch_profiles
+    monkeypatch.setattr(duck, "_fetch_profiles", lambda ids, occ: asked.append(list(ids)) or real(ids, occ))
+    assert [p.taxon_id for p in duck._cached_profiles([2, 3, 1], False)] == [2, 3, 1]
+    assert asked == [[3]]
+
+
+def test_occurrences_from_summary_or_live_scan(duck_db):
+    _setup(
+        "CREATE TABLE occurrence (taxon_id BIGINT, longitude DOUBLE, latitude DOUBLE, year INTEGER)",
+        "INSERT INTO occurrence VALUES (1, 10, 5, 2020), (1, 12, -3, 2021)",
+    )
+    (scan,) = duck._fetch_profiles([1], want_occ=True)
+    assert scan.occurrence_count == 2 and scan.bbox == [10.0, -3.0, 12.0, 5.0]
+    assert scan.occurrence_years is None
+
+    from src.data.hf_ingest import _refresh_occurrence_summary
+    _refresh_occurrence_summary(duck._cursor())
+    duck.close_duckdb()
+    (rollup,) = duck._fetch_profiles([1], want_occ=True)
+    assert rollup.bbox == scan.bbox
+    assert rollup.occurrence_years == {2020: 1, 2021: 1}
+    assert sum(rollup.occurrence_tiles.values()) == 2
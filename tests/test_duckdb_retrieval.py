@@ -0,0 +1,71 @@
+import pytest
+
+from src.agents import db_duckdb_agent as duck
+from src.data import hf_ingest
+
+CHUNKS = [
+    (1, 1, "Lions live in prides on the savanna.", [1.0, 0.0, 0.0]),
+    (2, 1, "Poaching and habitat loss threaten lion populations.", [0.0, 1.0, 0.0]),
+    (3, 1, "The lion roar carries for kilometres.", [0.7, 0.7, 0.0]),
+    (4, 2, "Tigers hunt alone in dense forest; poaching is the main threat.", [0.0, 1.0, 0.0]),
+]
+
+
+@pytest.fixture
+def docs(duck_db, monkeypatch):
+    """doc_chunk with embeddings, plus the vector and BM25 tables ingest derives from it."""
+    monkeypatch.setattr(hf_ingest, "_VSS_LOADED", False)
+    cur = duck._cursor()
+    cur.execute("CREATE TABLE doc_chunk (id BIGINT, taxon_id BIGINT, text VARCHAR, source_url VARCHAR,"
+                " source_id VARCHAR, license VARCHAR, embedding DOUBLE[])")
+    cur.executemany("INSERT INTO doc_chunk (id, taxon_id, text, embedding) VALUES (?, ?, ?, ?)", CHUNKS)
+    hf_ingest._after_load(cur, "doc_chunk")
+    duck.close_duckdb()
+    duck._cursor()  # reopen: reads doc_chunk_vec / doc_term_stats like a fresh process
+
+
+def test_vector_search_stays_within_the_taxon(docs):
+    hits = duck._vector_retrieve(1, [0.0, 1.0, 0.0], k=2)
+    assert [h["id"] for h in hits] == [2, 3]
+    assert hits[0]["score"] == pytest.approx(1.0)
+    assert duck._vector_retrieve(1, [1.0, 0.0], k=2) == []  # wrong dimension
+
+
+def test_candidate_path_for_large_taxa(docs, monkeypatch):
+    monkeypatch.setitem(duck._DOC_VEC, "hnsw", True)  # the over-fetch query also runs without the index
+    monkeypatch.setattr(duck, "VEC_EXACT_MAX", 0)
+    assert [h["id"] for h in duck._vector_retrieve(1, [0.0, 1.0, 0.0], k=2)] == [2, 3]
+    # too few candidates of the taxon among the global nearest: falls back to the exact scan
+    assert [h["id"] for h in duck._vector_retrieve(2, [1.0, 0.0, 0.0], k=1)] == [4]
+
+
+def test_bm25_ranks_by_term_weight_within_the_taxon(docs):
+    hits = duck._keyword_retrieve(1, "Does poaching threaten lions?", k=5)
+    assert [h["id"] for h in hits] == [2, 1]  # tiger chunk 4 also mentions poaching
+    hits = duck._keyword_retrieve(1, "lion roar", k=5)
+    assert [h["id"] for h in hits] == [3, 2]
+    assert hits[0]["text"].startswith("The lion roar") and hits[0]["score"] > hits[1]["score"]
+    assert duck._keyword_retrieve(1, "the of and", k=5) == []  # stopwords only
+
+
+def test_incremental_postings_match_rebuild(docs):
+    cur = duck._cursor()
+    cur.execute("CREATE TEMP TABLE new_chunks AS SELECT * FROM doc_chunk LIMIT 0")
+    cur.execute("INSERT INTO new_chunks (id, taxon_id, text) VALUES (5, 1, 'Lion cubs stay with the pride for two years.')")
+    cur.execute("INSERT INTO doc_chunk SELECT * FROM new_chunks")
+    hf_ingest._refresh_doc_terms(cur, "new_chunks")
+    tables = ("SELECT * FROM doc_terms ORDER BY ALL", "SELECT * FROM doc_term_df ORDER BY ALL", "SELECT * FROM doc_term_stats")
+    appended = [cur.execute(q).fetchall() for q in tables]
+    hf_ingest._refresh_doc_terms(cur)
+    assert appended == [cur.execute(q).fetchall() for q in tables]
+
+
+def test_unset_embed_model_is_not_a_per_request_warning(docs, monkeypatch):
+    monkeypatch.setattr(duck, "get_embedder", lambda: None)
+    monkeypatch.setattr(duck, "embedder_error", lambda: None)  # EMBED_MODEL unset
+    out = duck.db_manager_duckdb({"entities": ["lion"], "user_input": "lion roar"})
+    assert out.retrieval_context and not [w for w in out.warnings if "Vector retrieval" in w]
+
+    monkeypatch.setattr(duck, "embedder_error", lambda: "OSError: no weights")
+    out = duck.db_manager_duckdb({"entities": ["lion"], "user_input": "lion roar"})
+    assert "Vector retrieval unavailable (OSError: no weights)" in out.warnings
@@ -0,0 +1,196 @@
+import os
+
+import duckdb
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from src.data import hf_ingest
+
+
+def _shard(tmp_path, name, rows):
+    path = str(tmp_path / f"{name}.parquet")
+    pq.write_table(pa.Table.from_pylist(rows), path)
+    return path
+
+
+def _taxa(ids):
+    return [{"taxon_id": i, "scientific_name": f"Species {i}", "common_names": [f"name {i}"]} for i in ids]
+
+
+def _not_in_dataset(repo, table, split, streaming):
+    raise FileNotFoundError(table)
+
+
+@pytest.fixture
+def hub(tmp_path, monkeypatch):
+    """build_duckdb_from_hf against local Parquet shards; set hub["shards"] / hub["revision"] per run."""
+    state = {"shards": {}, "revision": "rev1", "path": str(tmp_path / "db.duckdb")}
+    monkeypatch.setattr(hf_ingest, "HF_DATASET", "test/species")
+    monkeypatch.setattr(hf_ingest, "DUCK_PATH", state["path"])
+    monkeypatch.setattr(hf_ingest, "INGEST_MODE", "parquet")
+    monkeypatch.setattr(hf_ingest, "_dataset_revision", lambda: state["revision"])
+    monkeypatch.setattr(hf_ingest, "_parquet_shards", lambda: state["shards"])
+    monkeypatch.setattr(hf_ingest, "_load_vss", lambda con: False)
+    monkeypatch.setattr(hf_ingest, "load_dataset", _not_in_dataset)
+    return state
+
+
+def _query(path, sql):
+    con = duckdb.connect(path, read_only=True)
+    try:
+        return con.execute(sql).fetchall()
+    finally:
+        con.close()
+
+
+def test_build_loads_parquet_shards(tmp_path, hub):
+    a, b = _shard(tmp_path, "taxon-0", _taxa([1, 2])), _shard(tmp_path, "taxon-1", _taxa([3]))
+    occ = _shard(tmp_path, "occ-0", [{"taxon_id": 1, "longitude": 10.0, "latitude": 5.0, "year": 2020}])
+    hub["shards"] = {"taxon": [(a, "a@1"), (b, "b@1")], "occurrence": [(occ, "o@1")]}
+    hf_ingest.build_duckdb_from_hf()
+    path = hub["path"]
+    assert _query(path, "SELECT taxon_id FROM taxon ORDER BY 1") == [(1,), (2,), (3,)]
+    assert _query(path, "SELECT table_name, row_count FROM _ingest_meta WHERE table_name != '*' ORDER BY 1") == [
+        ("occurrence", 1), ("taxon", 3),
+    ]
+    assert _query(path, "SELECT revision FROM _ingest_meta WHERE table_name = '*'") == [("rev1",)]
+    assert _query(path, "SELECT taxon_id, n FROM occurrence_summary") == [(1, 1)]
+
+
+def test_stream_load_in_arrow_batches(tmp_path, hub, monkeypatch):
+    datasets = pytest.importorskip("datasets")
+    monkeypatch.setattr(hf_ingest, "INGEST_MODE", "stream")
+    monkeypatch.setattr(hf_ingest, "BATCH_ROWS", 2)
+
+    def load_dataset(repo, table, split, streaming):
+        if table != "taxon":
+            return _not_in_dataset(repo, table, split, streaming)
+        return datasets.Dataset.from_list(_taxa(range(1, 6))).to_iterable_dataset()
+
+    monkeypatch.setattr(hf_ingest, "load_dataset", load_dataset)
+    hf_ingest.build_duckdb_from_hf()
+    assert _query(hub["path"], "SELECT count(*) FROM taxon") == [(5,)]
+    assert _query(hub["path"], "SELECT row_offset, done FROM _ingest_checkpoint WHERE table_name = 'taxon'") == [(5, True)]
+
+
+def _ingest(path, table, shards, revision="rev1"):
+    con = duckdb.connect(path)
+    con.execute(hf_ingest._CHECKPOINT_DDL)
+    con.execute(hf_ingest._META_DDL)
+    try:
+        return hf_ingest._ingest_table(con.cursor(), table, shards, revision)
+    finally:
+        con.close()
+
+
+def test_failed_load_resumes_from_checkpoint_and_keeps_live_table(tmp_path, hub):
+    path = hub["path"]
+    old = _shard(tmp_path, "old", _taxa([9]))
+    assert _ingest(path, "taxon", [(old, "old@1")], "rev0")
+
+    first = _shard(tmp_path, "taxon-0", _taxa([1, 2]))
+    second = str(tmp_path / "taxon-1.parquet")  # not there yet: the load fails after shard 0
+    shards = [(first, "a@1"), (second, "b@1")]
+    assert not _ingest(path, "taxon", shards)
+    assert _query(path, "SELECT taxon_id FROM taxon") == [(9,)]  # live table untouched
+    assert _query(path, "SELECT count(*) FROM taxon__staging") == [(2,)]
+    assert _query(path, "SELECT shard, row_count, done FROM _ingest_checkpoint") == [(1, 2, False)]
+
+    _shard(tmp_path, "taxon-1", _taxa([3]))
+    os.remove(first)  # a resumed load must not read shard 0 again
+    assert _ingest(path, "taxon", shards)
+    assert _query(path, "SELECT taxon_id FROM taxon ORDER BY 1") == [(1,), (2,), (3,)]
+    assert _query(path, "SELECT count(*) FROM information_schema.tables WHERE table_name = 'taxon__staging'") == [(0,)]
+    assert _query(path, "SELECT shard, row_count, done FROM _ingest_checkpoint") == [(2, 3, True)]
+
+
+def test_checkpoint_of_another_revision_is_not_resumed(tmp_path, hub):
+    path = hub["path"]
+    first = _shard(tmp_path, "taxon-0", _taxa([1]))
+    assert not _ingest(path, "taxon", [(first, "a@1"), (str(tmp_path / "gone.parquet"), "b@1")], "rev1")
+    second = _shard(tmp_path, "taxon-1", _taxa([2]))
+    assert _ingest(path, "taxon", [(second, "c@1")], "rev2")
+    assert _query(path, "SELECT taxon_id FROM taxon") == [(2,)]
+
+
+def test_unchanged_revision_is_a_no_op(tmp_path, hub):
+    shard = _shard(tmp_path, "taxon-0", _taxa([1]))
+    hub["shards"] = {"taxon": [(shard, "a@1")]}
+    hf_ingest.build_duckdb_from_hf()
+    os.remove(shard)  # a second build at the same revision must not read it
+    hf_ingest.build_duckdb_from_hf()
+    assert _query(hub["path"], "SELECT taxon_id FROM taxon") == [(1,)]
+
+
+def test_new_shards_are_appended_and_changed_ones_reloaded(tmp_path, hub):
+    path = hub["path"]
+    first = _shard(tmp_path, "taxon-0", _taxa([1]))
+    assert _ingest(path, "taxon", [(first, "a@1")], "rev1")
+    second = _shard(tmp_path, "taxon-1", _taxa([2]))
+    os.remove(first)  # appending reads only the new shard
+    assert _ingest(path, "taxon", [(first, "a@1"), (second, "b@1")], "rev2")
+    assert _query(path, "SELECT taxon_id FROM taxon ORDER BY 1") == [(1,), (2,)]
+
+    rewritten = _shard(tmp_path, "taxon-0b", _taxa([5]))
+    assert _ingest(path, "taxon", [(rewritten, "a@2"), (second, "b@1")], "rev3")
+    assert _query(path, "SELECT taxon_id FROM taxon ORDER BY 1") == [(2,), (5,)]
+
+
+def test_streamed_table_kept_without_a_revision(tmp_path, hub, monkeypatch):
+    datasets = pytest.importorskip("datasets")
+    rows = _taxa([1, 2])
+    monkeypatch.setattr(hf_ingest, "INGEST_MODE", "stream")
+    monkeypatch.setattr(
+        hf_ingest, "load_dataset",
+        lambda repo, table, split, streaming: datasets.Dataset.from_list(rows).to_iterable_dataset()
+        if table == "taxon" else _not_in_dataset(repo, table, split, streaming),
+    )
+    hub["revision"] = ""
+    hf_ingest.build_duckdb_from_hf()
+    rows = _taxa([7])  # a reload would pick this up
+    hf_ingest.build_duckdb_from_hf()
+    assert _query(hub["path"], "SELECT taxon_id FROM taxon ORDER BY 1") == [(1,), (2,)]
+
+
+def test_revision_lookup_degrades_without_the_hub(monkeypatch):
+    import builtins
+
+    real_import = builtins.__import__
+
+    def no_hub(name, *args, **kwargs):
+        if name == "huggingface_hub":
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", no_hub)
+    assert hf_ingest._dataset_revision() == ""
+
+
+def _summary(con):
+    return con.execute("SELECT taxon_id, n, minlon, minlat, maxlon, maxlat, years, tiles FROM occurrence_summary ORDER BY 1").fetchall()
+
+
+def test_incremental_occurrence_summary_matches_rebuild():
+    con = duckdb.connect()
+    con.execute("CREATE TABLE occurrence (taxon_id BIGINT, longitude DOUBLE, latitude DOUBLE, year INTEGER)")
+    con.execute("INSERT INTO occurrence VALUES (1, 10, 5, 2020), (1, 12, -3, 2021), (2, -70, 40, NULL)")
+    hf_ingest._refresh_occurrence_summary(con)
+    con.execute("CREATE TABLE delta AS SELECT * FROM (VALUES (1, 100.0, 60.0, 2020), (3, 0.5, 0.5, 1999)) t(taxon_id, longitude, latitude, year)")
+    con.execute("INSERT INTO occurrence SELECT * FROM delta")
+    hf_ingest._refresh_occurrence_summary(con, "delta")
+    merged = _summary(con)
+    hf_ingest._refresh_occurrence_summary(con)
+    assert merged == _summary(con)
+
+    lion = dict(zip(["taxon_id", "n", "minlon", "minlat", "maxlon", "maxlat", "years", "tiles"], merged[0]))
+    assert (lion["n"], lion["minlon"], lion["maxlat"]) == (3, 10.0, 60.0)
+    assert lion["years"] == [{"year": 2020, "n": 2}, {"year": 2021, "n": 1}]
+    assert sum(t["n"] for t in lion["tiles"]) == 3
+
+
+def test_no_summary_without_coordinates():
+    con = duckdb.connect()
+    con.execute("CREATE TABLE occurrence (taxon_id BIGINT, year INTEGER)")
+    hf_ingest._refresh_occurrence_summary(con)
+    assert not hf_ingest._table_exists(con, "occurrence_summary")
@@ -0,0 +1,76 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from src.tools import http_cache, http_client
+from src.tools.http_cache import HttpCache, cache_key, ttl_for
+
+
+def test_cache_key_ignores_param_order_and_host_case():
+    a = cache_key("https://API.gbif.org/v1/occurrence/search?limit=5", {"q": "lion", "mediaType": "StillImage"})
+    b = cache_key("https://api.gbif.org/v1/occurrence/search", {"mediaType": "StillImage", "q": "lion", "limit": 5})
+    assert a == b
+    assert a != cache_key("https://api.gbif.org/v1/occurrence/search", {"q": "tiger", "limit": 5})
+
+
+def test_ttl_per_source():
+    assert ttl_for("https://en.wikipedia.org/api/x") == http_cache.HTTP_CACHE_TTLS["wikipedia.org"]
+    assert ttl_for("https://api.gbif.org/v1") == http_cache.HTTP_CACHE_TTLS["gbif.org"]
+    assert ttl_for("https://example.org/") == http_cache.HTTP_CACHE_DEFAULT_TTL
+
+
+def test_fresh_stale_and_validators(tmp_path):
+    cache = HttpCache(str(tmp_path / "c.sqlite"))
+    assert cache.lookup("k") is None
+    cache.store("k", "https://x", b"body", '"v1"', "Mon, 01 Jan 2024 00:00:00 GMT", ttl=60)
+    assert cache.lookup("k") == (b"body", True, {"If-None-Match": '"v1"', "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"})
+    cache.store("k", "https://x", b"body", '"v1"', None, ttl=-1)
+    assert cache.lookup("k")[1] is False
+    cache.refresh("k", ttl=60)
+    assert cache.lookup("k")[1] is True
+    assert cache.stats()["revalidated"] == 1
+
+
+def test_lru_eviction_keeps_recent_entries(tmp_path):
+    cache = HttpCache(str(tmp_path / "c.sqlite"), max_bytes=100)
+    for i in range(3):
+        cache.store(f"k{i}", "https://x", b"x" * 40, None, None, ttl=60)
+        cache.lookup("k0")  # k0 stays most recently used
+    assert cache.lookup("k1") is None
+    assert cache.lookup("k0") is not None and cache.lookup("k2") is not None
+    assert cache.stats()["bytes"] <= 100
+
+
+def test_get_json_revalidates_stale_entries(tmp_path, monkeypatch):
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, json={"n": 1}, headers={"ETag": '"v1"'})
+
+    cache = HttpCache(str(tmp_path / "c.sqlite"))
+    monkeypatch.setattr(http_client, "get_http_cache", lambda: cache)
+    monkeypatch.setattr(http_client, "ttl_for", lambda url: -1)  # every entry is stale at once
+
+    async def scenario():
+        monkeypatch.setattr(http_client, "_CLIENT", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        monkeypatch.setattr(http_client, "_HOST_LIMITS", {})
+        return [await http_client.get_json("https://example.org/a") for _ in range(2)]
+
+    assert asyncio.run(scenario()) == [{"n": 1}, {"n": 1}]
+    assert seen == [None, '"v1"']
+    assert cache.stats()["revalidated"] == 1
+
+
+def test_offline_serves_only_cached(tmp_path, monkeypatch):
+    cache = HttpCache(str(tmp_path / "c.sqlite"))
+    cache.store(cache_key("https://example.org/a"), "https://example.org/a", json.dumps({"n": 2}).encode(), None, None, ttl=-1)
+    monkeypatch.setattr(http_client, "get_http_cache", lambda: cache)
+    monkeypatch.setattr(http_client, "HTTP_CACHE_OFFLINE", True)
+    assert asyncio.run(http_client.get_json("https://example.org/a")) == {"n": 2}
+    with pytest.raises(http_cache.OfflineCacheMiss):
+        asyncio.run(http_client.get_json("https://example.org/b"))
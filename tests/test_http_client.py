@@ -0,0 +1,32 @@
+import asyncio
+import time
+
+import httpx
+
+from src.tools import http_client
+
+
+def test_host_slot_released_during_backoff(monkeypatch):
+    calls = {"slow": 0}
+
+    def handler(request):
+        if request.url.path == "/slow":
+            calls["slow"] += 1
+            return httpx.Response(503 if calls["slow"] == 1 else 200)
+        return httpx.Response(200)
+
+    async def scenario():
+        monkeypatch.setattr(http_client, "_CLIENT", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        monkeypatch.setattr(http_client, "_HOST_LIMITS", {"example.org": asyncio.Semaphore(1)})
+        monkeypatch.setattr(http_client, "_backoff", lambda attempt, retry_after: 0.5)
+        slow = asyncio.ensure_future(http_client.get("https://example.org/slow"))
+        await asyncio.sleep(0.05)  # the slow request is now backing off after its 503
+        t0 = time.monotonic()
+        fast = await http_client.get("https://example.org/fast")
+        waited = time.monotonic() - t0
+        assert (await slow).status_code == 200
+        return fast.status_code, waited
+
+    status, waited = asyncio.run(scenario())
+    assert status == 200
+    assert waited < 0.3
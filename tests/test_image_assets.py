@@ -0,0 +1,42 @@
+from src.data.image_assets import load_payload, validate
+
+
+def _row(**kw):
+    return {"taxon_id": 1, "url": f"https://img.example/{kw.pop('n', 0)}.jpg", "license": "CC-BY", "attribution": "x", **kw}
+
+
+def test_bad_values_are_invalid_rows():
+    rows, results = validate(load_payload({"rows": [
+        _row(n=0, captured_on="2020-02-30"),
+        _row(n=1, width="3000000000"),
+        _row(n=2, taxon_id="99999999999999999999"),
+        _row(n=3, height="12px"),
+        _row(n=4, url="ftp://img.example/4.jpg"),
+        _row(n=5, license=" "),
+    ]}))
+    assert rows.num_rows == 0
+    errors = {r["row"]: r["error"] for r in results if r["status"] == "invalid"}
+    assert errors == {
+        0: "captured_on not a YYYY-MM-DD date",
+        1: "width out of range",
+        2: "taxon_id out of range",
+        3: "height not an integer",
+        4: "url must be http(s)",
+        5: "missing license",
+    }
+
+
+def test_valid_rows_are_normalized():
+    rows, results = validate(load_payload({"rows": [
+        _row(n=0, captured_on="2020-02-29T10:15:00Z", width="2147483647"),
+        _row(n=1),
+    ]}))
+    assert results == []
+    assert rows.column("captured_on").to_pylist() == ["2020-02-29", None]
+    assert rows.column("_row").to_pylist() == [0, 1]
+
+
+def test_last_row_per_url_wins():
+    rows, results = validate(load_payload({"rows": [_row(n=0, title="a"), _row(n=0, title="b")]}))
+    assert rows.column("title").to_pylist() == ["b"]
+    assert results == [{"row": 0, "status": "duplicate", "error": "superseded by row 1"}]
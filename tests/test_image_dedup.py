@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from src.tools import image_dedup
+from src.tools.image_dedup import HashIndex, ImageHashStore, _bands
+
+
+def _flip(h, bits):
+    for b in bits:
+        h ^= 1 << b
+    return h
+
+
+@pytest.mark.parametrize("max_distance", [0, 4, 7])
+def test_find_at_distance_boundary(max_distance):
+    base = 0x0123456789ABCDEF
+    index = HashIndex(max_distance)
+    index.add(base, "canonical")
+    # spread the flipped bits so that no single band absorbs them
+    bits = [i * 64 // (max_distance + 1) for i in range(max_distance + 1)]
+    assert index.find(_flip(base, bits[:max_distance])) == "canonical"
+    assert index.find(_flip(base, bits)) is None
+
+
+def test_bands_cover_all_bits():
+    for n in (0, 3, 4, 63):
+        bands = _bands(n)
+        assert len(bands) == n + 1
+        assert sum(bin(mask).count("1") for _, mask in bands) == 64
+
+
+def test_empty_index():
+    assert HashIndex().find(0) is None
+
+
+def test_taxon_index_is_loaded_once_and_updated_by_put_many(tmp_path):
+    store = ImageHashStore(str(tmp_path / "h.sqlite"))
+    store.put_many("1", [("a", 0xFF, "a"), ("b", 0xFE, "a")])
+    index = store.taxon_index("1")
+    assert index.find(0xFF) == "a"
+    store.put_many("1", [("c", 1 << 60, "c")])
+    assert store.taxon_index("1") is index  # no second read from SQLite
+    assert index.find(1 << 60) == "c"
+    assert store.taxon_index("2").find(0xFF) is None  # clusters are per taxon
+    # a fresh store (another process) sees the same clusters
+    assert ImageHashStore(str(tmp_path / "h.sqlite")).taxon_index("1").find(1 << 60) == "c"
+
+
+def test_taxon_indexes_are_bounded(tmp_path):
+    store = ImageHashStore(str(tmp_path / "h.sqlite"), max_indexes=2)
+    first = store.taxon_index("1")
+    store.taxon_index("2")
+    store.taxon_index("3")
+    assert store.taxon_index("1") is not first
+
+
+def test_collapse_shares_clusters_across_calls(tmp_path, monkeypatch):
+    hashes = {"a": 0x0F0F, "b": 0x0F0E, "c": 1 << 62, "d": 0x0F0F}
+    fetched = []
+
+    async def fake_hash(img):
+        fetched.append(img["url"])
+        return hashes[img["url"]]
+
+    monkeypatch.setattr(image_dedup, "_STORE", ImageHashStore(str(tmp_path / "h.sqlite")))
+    monkeypatch.setattr(image_dedup, "_hash_one", fake_hash)
+    monkeypatch.setattr(image_dedup, "pil_available", lambda: True)
+    imgs = lambda *urls: [{"url": u} for u in urls]
+
+    kept = asyncio.run(image_dedup.collapse_near_duplicates("1", imgs("a", "b", "c", "a")))
+    assert [im["url"] for im in kept] == ["a", "c"]
+    kept = asyncio.run(image_dedup.collapse_near_duplicates("1", imgs("d", "b")))
+    assert [im["url"] for im in kept] == ["d"]  # d collapses onto stored canonical a; b is known
+    assert fetched == ["a", "b", "c", "d"]  # every URL hashed once
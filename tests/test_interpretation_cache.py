@@ -0,0 +1,53 @@
+import numpy as np
+
+from src.tools.interpretation_cache import InterpretationCache
+
+
+def _bag_of_words(text):
+    vec = np.zeros(256)
+    for w in text.lower().replace("?", "").split():
+        vec[sum(map(ord, w)) % 256] += 1
+    return vec
+
+
+def _cache(**kw):
+    return InterpretationCache("fp", _bag_of_words, path="", min_similarity=0.8, **kw)
+
+
+def test_exact_hit_on_normalized_text():
+    cache = _cache()
+    cache.put("Status of Panthera leo?", [1], {"task": "lookup"})
+    assert cache.get("status of  panthera LEO", [1])[0] == {"task": "lookup"}
+    assert cache.stats()["hits"] == 1
+
+
+def test_near_hit_requires_same_taxa():
+    cache = _cache()
+    cache.put("what is the status of the lion", [1], {"entities": ["Panthera leo"]})
+    assert cache.get("what is status of the lion", [1])[0] == {"entities": ["Panthera leo"]}
+    assert cache.get("what is the status of the tiger", [2])[0] is None
+
+
+def test_different_species_without_taxa_do_not_share_a_parse():
+    cache = _cache()
+    cache.put("what is the conservation status of the javan rhino", [], {"entities": ["Rhinoceros sondaicus"]})
+    out, _ = cache.get("what is the conservation status of the sumatran rhino", [])
+    assert out is None
+    # a rewording with the same content words still hits
+    out, _ = cache.get("what is the conservation status of javan rhino", [])
+    assert out == {"entities": ["Rhinoceros sondaicus"]}
+
+
+def test_lru_eviction_frees_vector_slots():
+    cache = _cache(max_entries=2)
+    for i in range(3):
+        cache.put(f"question {i} about zebras", [9], {"i": i})
+    assert cache.stats()["entries"] == 2
+    assert cache.get("question 0 about zebras", [9])[0] is None
+
+
+def test_persists_and_drops_on_fingerprint_change(tmp_path):
+    path = str(tmp_path / "c.sqlite")
+    InterpretationCache("fp1", _bag_of_words, path=path).put("status of lion", [1], {"task": "lookup"})
+    assert InterpretationCache("fp1", _bag_of_words, path=path).get("status of lion", [1])[0] == {"task": "lookup"}
+    assert InterpretationCache("fp2", _bag_of_words, path=path).get("status of lion", [1])[0] is None
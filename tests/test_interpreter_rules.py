@@ -0,0 +1,36 @@
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from src.agents import interpreter_rules
+from src.data.name_index import NameIndex
+
+ROWS = [
+    (1, "Panthera leo", ["Lion"], None),
+    (2, "Panthera tigris", ["Tiger"], None),
+]
+
+
+@pytest.fixture(autouse=True)
+def index(monkeypatch):
+    index = NameIndex(lambda: iter(ROWS), lambda: len(ROWS))
+    index.refresh(force=True)
+    monkeypatch.setattr(interpreter_rules, "_name_index", lambda: index)
+    return index
+
+
+def test_fully_explained_questions_skip_the_llm():
+    out = interpreter_rules._interpret_rules("What is the status of the lion?")
+    assert out["task"] == "lookup" and out["entities"] == ["Panthera leo"]
+    out = interpreter_rules._interpret_rules("compare lion vs tiger")
+    assert out["task"] == "compare" and out["entities"] == ["Panthera leo", "Panthera tigris"]
+
+
+@pytest.mark.parametrize("text", [
+    "status of lion in Kenya",      # a place the rules would drop
+    "status of lion in kenya",
+    "lion cubs photos",             # one unknown word is enough
+    "status of lion and tiger",     # two species without "compare"
+])
+def test_unexplained_words_go_to_the_llm(text):
+    assert interpreter_rules._interpret_rules(text) is None
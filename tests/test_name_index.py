@@ -0,0 +1,79 @@
+from src.data.name_index import NameIndex, normalize_name
+
+ROWS = [
+    (1, "Panthera leo", ["Lion", "African lion"], None),
+    (2, "Panthera uncia", ["Snow leopard"], ["Uncia uncia"]),
+    (3, "Panthera tigris", ["Tiger"], None),
+    (4, "Éclipta alba", None, None),
+]
+
+
+def _index(rows=ROWS):
+    index = NameIndex(lambda: iter(rows), lambda: len(rows))
+    index.refresh(force=True)
+    assert index.wait_fuzzy(timeout=10)
+    return index
+
+
+def test_normalize_name():
+    assert normalize_name("Éclipta  Alba") == "eclipta alba"
+    assert normalize_name("snow-leopard!") == "snow leopard"
+
+
+def test_lookup_scientific_synonym_and_common_names():
+    index = _index()
+    assert index.lookup("panthera LEO") == 1
+    assert index.lookup("Uncia uncia") == 2
+    assert index.lookup("snow leopard") == 2
+    assert index.lookup("eclipta alba") == 4
+    assert index.lookup("unicorn") is None
+
+
+def test_resolve_one_per_taxon():
+    index = _index()
+    out = index.resolve(["Lion", "Panthera leo", "Tiger", "unicorn"])
+    assert [(name, tid, fuzzy) for name, tid, fuzzy in out] == [("Lion", 1, None), ("Tiger", 3, None)]
+
+
+def test_resolve_falls_back_to_best_fuzzy_match():
+    index = _index()
+    out = index.resolve(["Panthera tigirs"])
+    assert len(out) == 1 and out[0][1] == 3 and out[0][2][0] == "panthera tigris"
+
+
+def test_resolve_fuzzy_misses_for_compare():
+    index = _index()
+    tids = [tid for _, tid, _ in index.resolve(["Lion", "Snow leoprd"], fuzzy_misses=True)]
+    assert tids == [1, 2]
+
+
+def test_resolve_fuzzy_misses_keep_input_order():
+    index = _index()
+    out = index.resolve(["Snow leoprd", "Tiger", "Panthera leoo", "Lion"], fuzzy_misses=True)
+    # the fuzzy match for taxon 1 gives way to the exact "Lion" but the order follows the input
+    assert [(name, tid, fuzzy is not None) for name, tid, fuzzy in out] == [
+        ("Snow leoprd", 2, True), ("Tiger", 3, False), ("Lion", 1, False)
+    ]
+
+
+def test_fuzzy_scores_and_threshold():
+    index = _index()
+    (tid, matched, score), *_ = index.fuzzy("panthera lео")  # Cyrillic letters: not an exact match
+    assert tid == 1 and 0.6 <= score < 1
+    assert index.fuzzy("zzzz qqqq") == []
+
+
+def test_fuzzy_is_empty_until_background_build_finishes():
+    index = NameIndex(lambda: iter(ROWS), lambda: 1)
+    index._build_fuzzy = lambda names: None  # simulate a build that hasn't finished
+    index.refresh(force=True)
+    assert index.lookup("lion") == 1
+    assert index.fuzzy("Panthera tigirs") == []
+
+
+def test_find_in_text_takes_longest_span():
+    index = _index()
+    words = normalize_name("photos of the african lion and snow leopard").split()
+    spans = index.find_in_text("photos of the african lion and snow leopard")
+    assert [(" ".join(words[a:b]), tid) for a, b, tid in spans] == [("african lion", 1), ("snow leopard", 2)]
+    assert index.scientific_name(2) == "Panthera uncia"
@@ -0,0 +1,41 @@
+import time
+
+from src.tools.profile_cache import ProfileCache
+
+
+def test_put_skipped_after_invalidation_during_compute():
+    cache = ProfileCache("t", db_path="")
+    generation = cache.generation()
+    cache.invalidate([1])  # a write lands while the profile is being computed
+    cache.put_many({1: {"v": "stale"}}, "base", generation)
+    assert cache.get_many([1], "base") == {}
+    cache.put_many({1: {"v": "fresh"}}, "base", cache.generation())
+    assert cache.get_many([1], "base") == {1: {"v": "fresh"}}
+
+
+def test_shared_tier_sees_other_workers_invalidations(tmp_path):
+    path = str(tmp_path / "profiles.sqlite")
+    a, b = ProfileCache("t", db_path=path), ProfileCache("t", db_path=path)
+    generation = a.generation()
+    b.invalidate([1])
+    a.put_many({1: {"v": "stale"}}, "base", generation)
+    assert a.get_many([1], "base") == {} and b.get_many([1], "base") == {}
+    a.put_many({1: {"v": "fresh"}}, "base", a.generation())
+    assert b.get_many([1], "base") == {1: {"v": "fresh"}}
+
+
+def test_own_invalidations_do_not_void_later_puts(tmp_path):
+    cache = ProfileCache("t", db_path=str(tmp_path / "profiles.sqlite"))
+    cache.invalidate([1])
+    generation = cache.generation()
+    cache.put_many({1: {"v": 1}}, "base", generation)
+    assert cache.get_many([1], "base") == {1: {"v": 1}}
+
+
+def test_invalidation_log_pruned_after_ttl(tmp_path):
+    cache = ProfileCache("t", ttl=0.05, db_path=str(tmp_path / "profiles.sqlite"))
+    cache.invalidate([1, 2])
+    time.sleep(0.1)
+    cache.invalidate([3])
+    rows = cache._db.execute("SELECT taxon_id FROM profile_invalidation").fetchall()
+    assert rows == [(3,)]
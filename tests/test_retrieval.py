@@ -0,0 +1,23 @@
+from src.tools.retrieval import reciprocal_rank_fusion
+
+
+def test_docs_in_both_lists_rank_first():
+    vector = [{"id": 1}, {"id": 2}, {"id": 3}]
+    keyword = [{"id": 3}, {"id": 4}, {"id": 1}]
+    fused = reciprocal_rank_fusion([vector, keyword], k=60)
+    assert [d["id"] for d in fused] == [1, 3, 2, 4]
+    assert fused[0]["score"] == 1 / 61 + 1 / 63
+
+
+def test_limit_and_fields_kept():
+    fused = reciprocal_rank_fusion([[{"id": 1, "text": "a"}, {"id": 2, "text": "b"}]], limit=1)
+    assert fused == [{"id": 1, "text": "a", "score": 1 / 61}]
+
+
+def test_chunks_without_id_match_by_text():
+    fused = reciprocal_rank_fusion([[{"text": "x"}], [{"text": "y"}, {"text": "x"}]])
+    assert [d["text"] for d in fused] == ["x", "y"]
+
+
+def test_no_results():
+    assert reciprocal_rank_fusion([[], []]) == []
@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+from src.agents import web_researcher as wr
+
+
+def _record(*urls, license="CC-BY 4.0"):
+    return {"species": "Panthera leo", "recordedBy": "someone",
+            "media": [{"identifier": u, "license": license} for u in urls]}
+
+
+@pytest.fixture
+def gbif(monkeypatch):
+    """Serve `pages` (a list of GBIF result pages, or exceptions) by offset; record each call."""
+    calls = []
+    pages = []
+
+    async def fetch(url, params=None):
+        calls.append(dict(params or {}))
+        page = pages[params["offset"] // wr.GBIF_PAGE_SIZE]
+        if isinstance(page, Exception):
+            raise page
+        return page
+
+    monkeypatch.setattr(wr, "GBIF_PAGE_SIZE", 2)
+    monkeypatch.setattr(wr, "_fetch_json", fetch)
+    return pages, calls
+
+
+def _drain(want):
+    async def run():
+        return [img["url"] async for img in wr.gbif_image_stream("Panthera leo", want)]
+    return asyncio.run(run())
+
+
+def test_follows_offset_pages_until_enough_images(gbif):
+    pages, calls = gbif
+    pages += [
+        {"results": [_record("a"), _record("b")], "endOfRecords": False},
+        {"results": [_record("c"), _record("d")], "endOfRecords": False},
+        {"results": [_record("e")], "endOfRecords": True},
+    ]
+    assert _drain(3) == ["a", "b", "c"]
+    assert [c["offset"] for c in calls] == [0, 2]  # the third page is never requested
+    assert calls[0]["license"] == wr.GBIF_RECORD_LICENSES and calls[0]["mediaType"] == "StillImage"
+
+
+def test_stops_at_end_of_records(gbif):
+    pages, calls = gbif
+    pages += [{"results": [_record("a"), _record("b")], "endOfRecords": True}]
+    assert _drain(10) == ["a", "b"]
+    assert len(calls) == 1
+
+
+def test_skips_duplicates_and_unsafe_licenses(gbif):
+    pages, _ = gbif
+    pages += [
+        {"results": [_record("a", "a"), _record("x", license="All rights reserved")], "endOfRecords": False},
+        {"results": [_record("a"), _record("b", license="CC0")], "endOfRecords": True},
+    ]
+    assert _drain(10) == ["a", "b"]
+
+
+def test_failed_page_keeps_images_already_found(gbif, monkeypatch):
+    pages, _ = gbif
+    pages += [
+        {"results": [_record("a"), _record("b")], "endOfRecords": False},
+        RuntimeError("502"),
+    ]
+    assert _drain(10) == ["a", "b"]
+
+    async def wiki(title):
+        return {"title": "Lion", "originalimage": {"source": "w"}}
+
+    async def collapse(taxon, images):
+        return images
+
+    monkeypatch.setattr(wr, "_wiki_summary", wiki)
+    monkeypatch.setattr(wr, "collapse_near_duplicates", collapse)
+    out = asyncio.run(wr.web_research_async({"entities": ["Panthera leo"]}))
+    assert [i["url"] for i in out["image_candidates"]] == ["w", "a", "b"]
+
+
+@pytest.mark.parametrize("raw, tag", [
+    ("CC-BY 4.0", "CC-BY"),
+    ("http://creativecommons.org/licenses/by/4.0/", "CC-BY"),
+    ("https://creativecommons.org/licenses/by-sa/4.0/", "CC-BY-SA"),
+    ("http://creativecommons.org/publicdomain/zero/1.0/", "CC0"),
+])
+def test_license_tag_recognizes_names_and_urls(raw, tag):
+    assert wr._license_tag(raw) == tag
+
+
+@pytest.mark.parametrize("raw", [
+    "CC-BY-NC 4.0",
+    "CC-BY-NC-SA",
+    "CC-BY-ND",
+    "http://creativecommons.org/licenses/by-nc/4.0/",
+    "http://creativecommons.org/licenses/by-nc-sa/4.0/",
+])
+def test_license_tag_rejects_nc_nd(raw):
+    assert wr._license_tag(raw) not in wr.SAFE_LICENSES
+
+
+def test_hash_store_key_is_the_resolved_taxon(duck_db):
+    assert wr._taxon_key({"db_results": {"taxon_id": 2}}, "tiger") == "2"
+    assert wr._taxon_key({}, "African lion") == wr._taxon_key({}, "Panthera leo") == "1"
+    assert wr._taxon_key({}, "Unicornis") == "unicornis"  # not in the index: the normalized name